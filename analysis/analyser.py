@@ -27,12 +27,9 @@ def read_file(path):
 
 def distance_from_t_location(data, show=True):
     df_data = {
-        'distance': [],
-        'time': []
+        'distance': Gps.get_distances([d['c_location'] for d in data], [d['t_location'] for d in data]),
+        'time': [d['time_since_start'] for d in data]
     }
-    for d in data:
-        df_data['distance'].append(Gps.get_distance(d['c_location'], d['t_location']))
-        df_data['time'].append(d['time_since_start'])
 
     df = pd.DataFrame(df_data)
 
@@ -48,14 +45,10 @@ def distance_from_t_location(data, show=True):
 
 def direction_to_t_location(data, show=True):
     df_data = {
-        'direction': [],
-        'time': []
+        'direction': Gps.get_directions([d['c_location'] for d in data], [d['t_location'] for d in data]),
+        'time': [d['time_since_start'] for d in data]
     }
 
-    for d in data:
-        df_data['direction'].append(Gps.get_direction(d['c_location'], d['t_location']))
-        df_data['time'].append(d['time_since_start'])
-
     df = pd.DataFrame(df_data)
 
     fig = px.line(df, x='time', y='direction', title='Direction to target location')
@@ -166,11 +159,8 @@ def pid_angles(data, show=True):
 def distance_phone_rtk(gps, show=True):
     df_gps = {
         'time': [d['time_since_start'] for d in gps],
-        'distance': []
+        'distance': Gps.get_distances([d['phone_loc'] for d in gps], [d['rtk_loc'] for d in gps])
     }
-    for d in gps:
-        distance = Gps.get_distance(d['phone_loc'], d['rtk_loc'])
-        df_gps['distance'].append(distance)
 
     mean = st.mean(df_gps['distance'])
     median = st.median(df_gps['distance'])
@@ -190,11 +180,7 @@ def distance_phone_rtk(gps, show=True):
 
 
 def length_of_line(line):
-    length = 0
-    for i, p in enumerate(line):
-        if i > 0:
-            length += Gps.get_distance(line[i - 1], p)
-    return round(length, 4)
+    return round(Gps.get_track_length(line), 4)
 
 def distance_to_nominal(gps, nominal_fn, show=True):
     rtk_line = [d['rtk_loc'] for d in gps]
@@ -202,28 +188,17 @@ def distance_to_nominal(gps, nominal_fn, show=True):
     nominal_line = read_file(nominal_fn)
 
     nominal_line = LineString(nominal_line)
-    counter = 0
+
+    # Closest points on the nominal line
+    rtk_nominal = [nominal_line.interpolate(nominal_line.project(Point(p))).coords[0] for p in rtk_line]
+    phone_nominal = [nominal_line.interpolate(nominal_line.project(Point(p))).coords[0] for p in phone_line]
 
     df_gps = {
         'time': [d['time_since_start'] for d in gps],
-        'RTK': [],
-        'Phone': []
-    }
-
-    for point in rtk_line:
-        p = Point(point)
-        np = nominal_line.interpolate(nominal_line.project(p))
         # * 100 to get cm
-        d = Gps.get_distance([np.x, np.y], point) * 100
-        df_gps['RTK'].append(d)
-        counter += 1
-
-    for point in phone_line:
-        p = Point(point)
-        np = nominal_line.interpolate(nominal_line.project(p))
-        d = Gps.get_distance([np.x, np.y], point)
-        df_gps['Phone'].append(d)
-        counter += 1
+        'RTK': list(Gps.get_distances(rtk_nominal, rtk_line) * 100),
+        'Phone': list(Gps.get_distances(phone_nominal, phone_line))
+    }
 
     df = pd.DataFrame(df_gps)
 
@@ -266,14 +241,10 @@ def deviation_heading(data, nominal_fn, show=True):
     target_heading = Gps.get_direction(nominal[0], nominal[1])
 
     df_data = {
-        'time': [],
-        'deviation': []
+        'time': [d['time_since_start'] for d in data],
+        'deviation': Gps.angle_differences(target_heading, [d['c_heading'] for d in data])
     }
 
-    for d in data:
-        df_data['deviation'].append(Gps.angle_difference(target_heading, d['c_heading']))
-        df_data['time'].append(d['time_since_start'])
-
     df = pd.DataFrame(df_data)
 
     fig = px.line(df, y='deviation', x='time', labels={'time': 'Time since start (s)', 'deviation': 'Deviation (°)'},
@@ -7,6 +7,8 @@ Last Modified: 10.06.2021
 import os
 from datetime import datetime as dt
 
+import telemetry_reader as tr
+
 
 def autonomous_data_parser(file):
     with open(file, 'r') as data_file:
@@ -46,6 +48,34 @@ def autonomous_data_parser(file):
     return all_data
 
 
+def autonomous_binary_parser(file):
+    epoch, records = tr.read_telemetry(file)
+    section, time_since_start = tr.autonomous_section(records)
+    events = {v: k for k, v in tr.EVENTS.items()}
+    name = file.split('/')[-1][:-4]
+
+    all_data = []
+    for r, t in zip(section, time_since_start):
+        all_data.append({
+            'name': name,
+            'time': str(dt.fromtimestamp(epoch + r['time'])),
+            'time_since_start': float(t),
+            'c_location': [float(r['lat']), float(r['lng'])],
+            'c_heading': float(r['heading']),
+            'speed': float(r['speed']),
+            't_location': [float(r['target_lat']), float(r['target_lng'])],
+            'engine_left': float(r['engine_left']),
+            'engine_right': float(r['engine_right']),
+            # Same layout as the text parser: event at index 0, its arguments from index 1
+            'command': [events.get(int(r['event']), '')] + [str(a) for a in r['args']]
+        })
+
+    if not os.path.exists(f"images/{name}"):
+        os.mkdir(f"images/{name}")
+
+    return all_data
+
+
 def gps_data_parser(file):
     with open(file, 'r') as gps_file:
         all_gps = []
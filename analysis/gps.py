@@ -1,3 +1,4 @@
+import numpy as np
 from numpy import arctan2, sin, cos, degrees, sqrt
 import re
 import math
@@ -15,6 +16,9 @@ class Gps:
 
     WAIT = 3
 
+    # Earth radius in m
+    EARTH_RADIUS = 6371000
+
     """
     Convert the degree coordinates to the decimal format
 
@@ -101,6 +105,88 @@ class Gps:
     def angle_difference(a1, a2):
         return ((a2 - a1 + 540) % 360) - 180
 
+    """
+    Calculate the distances between two arrays of gps points.
+
+    :param p1: N×2 array of first points (lat, lng)
+    :param p2: N×2 array of second points or a single point
+    :returns:  array of distances between the points in meters
+    """
+    @staticmethod
+    def get_distances(p1, p2):
+        p1 = np.radians(np.asarray(p1, dtype=float))
+        p2 = np.radians(np.asarray(p2, dtype=float))
+        lat1, lng1 = p1[..., Gps.LAT], p1[..., Gps.LNG]
+        lat2, lng2 = p2[..., Gps.LAT], p2[..., Gps.LNG]
+
+        a = np.sin((lat1 - lat2) / 2) ** 2 + np.sin((lng1 - lng2) / 2) ** 2 * np.cos(lat1) * np.cos(lat2)
+
+        return Gps.EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    """
+    Calculate the directions between two arrays of gps points.
+
+    :param pos:  N×2 array of start points (lat, lng)
+    :param dest: N×2 array of destination points or a single point
+    :returns:    array of directions in degrees (0-360)
+    """
+    @staticmethod
+    def get_directions(pos, dest):
+        pos = np.radians(np.asarray(pos, dtype=float))
+        dest = np.radians(np.asarray(dest, dtype=float))
+        lat_pos, lat_dest = pos[..., Gps.LAT], dest[..., Gps.LAT]
+        d_lng = dest[..., Gps.LNG] - pos[..., Gps.LNG]
+
+        x = np.cos(lat_dest) * np.sin(d_lng)
+        y = np.cos(lat_pos) * np.sin(lat_dest) - np.sin(lat_pos) * np.cos(lat_dest) * np.cos(d_lng)
+
+        return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+    """
+    Calculate the differences between two arrays of angles.
+
+    :param a1: array of first angles
+    :param a2: array of second angles or a single angle
+    :returns:  array of differences between -180 and 180
+    """
+    @staticmethod
+    def angle_differences(a1, a2):
+        return ((np.asarray(a2, dtype=float) - np.asarray(a1, dtype=float) + 540) % 360) - 180
+
+    """
+    Calculate the distances between all pairs of two arrays of gps points.
+
+    :param p1: N×2 array of points (lat, lng)
+    :param p2: M×2 array of points
+    :returns:  N×M array of distances in meters
+    """
+    @staticmethod
+    def get_pairwise_distances(p1, p2):
+        p1 = np.asarray(p1, dtype=float)
+        p2 = np.asarray(p2, dtype=float)
+        return Gps.get_distances(p1[:, np.newaxis, :], p2[np.newaxis, :, :])
+
+    """
+    Calculate the lengths of the segments between consecutive points of a track.
+
+    :param track: N×2 array of points (lat, lng)
+    :returns:     array of N-1 segment lengths in meters
+    """
+    @staticmethod
+    def get_segment_distances(track):
+        track = np.asarray(track, dtype=float)
+        return Gps.get_distances(track[:-1], track[1:])
+
+    """
+    Calculate the length of a track.
+
+    :param track: N×2 array of points (lat, lng)
+    :returns:     length of the track in meters
+    """
+    @staticmethod
+    def get_track_length(track):
+        return float(np.sum(Gps.get_segment_distances(track)))
+
     """
     Convert degrees to radians.
     
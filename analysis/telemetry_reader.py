@@ -0,0 +1,157 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import glob
+import math
+import os
+import re
+import sys
+from datetime import datetime as dt
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'controls', 'raspberry-pi'))
+
+from telemetry import TelemetryLogger
+
+# Binary format of the TelemetryLogger in controls/raspberry-pi/telemetry.py
+MAGIC = TelemetryLogger.MAGIC
+VERSION = TelemetryLogger.VERSION
+HEADER = TelemetryLogger.HEADER
+EVENTS = TelemetryLogger.EVENTS
+
+RECORD = np.dtype([
+    ('time', '<f8'),
+    ('lat', '<f8'),
+    ('lng', '<f8'),
+    ('heading', '<f4'),
+    ('speed', '<f4'),
+    ('target_lat', '<f8'),
+    ('target_lng', '<f8'),
+    ('engine_left', 'i1'),
+    ('engine_right', 'i1'),
+    ('event', 'u1'),
+    ('pad', 'u1'),
+    ('args', '<f4', (3,))
+])
+
+# Positions are logged as list or tuple, the fused position and the target as tuple
+LINE = re.compile(r'^(\S+ \S+) (None|\([^)]*\)|\[[^\]]*\]) (\S+) (\S+) (None|\([^)]*\)|\[[^\]]*\]) (\S+) (\S+) ?(.*)$')
+
+"""
+Memory map a binary telemetry file into a structured array.
+
+:param file: path of the binary telemetry file
+:returns: epoch time of the monotonic clock zero and the complete records
+"""
+
+
+def read_telemetry(file):
+    with open(file, 'rb') as data_file:
+        magic, version, size, epoch = HEADER.unpack(data_file.read(HEADER.size))
+
+    if magic != MAGIC or version != VERSION or size != RECORD.itemsize:
+        raise ValueError(f"Unsupported telemetry file: {file}")
+
+    # A power loss while writing leaves a partial record at the end, it is ignored
+    count = (os.path.getsize(file) - HEADER.size) // RECORD.itemsize
+    if count == 0:
+        return epoch, np.empty(0, dtype=RECORD)
+    return epoch, np.memmap(file, dtype=RECORD, mode='r', offset=HEADER.size, shape=(count,))
+
+
+"""
+Get the records of the first autonomous drive with the time since its start.
+
+:param records: structured array of records
+:returns: records of the autonomous drive and time since start in seconds
+"""
+
+
+def autonomous_section(records):
+    events = records['event']
+    start = np.flatnonzero(events == EVENTS['Started autonomous drive'])
+    if len(start) == 0:
+        return records[:0], np.empty(0)
+    start = start[0] + 1
+
+    end = np.flatnonzero(events[start:] == EVENTS['End autonomous drive'])
+    end = start + end[0] if len(end) > 0 else len(records)
+
+    section = records[start:end]
+    return section, section['time'] - section['time'][0] if len(section) > 0 else np.empty(0)
+
+
+"""
+Convert a text data file written by the controller into the binary format.
+
+:param file: path of the text data file
+:param out: path of the binary file to be written
+:returns: number of converted records
+"""
+
+
+def convert_text_log(file, out):
+    rows = []
+    epoch = None
+
+    with open(file, 'r') as data_file:
+        for l in data_file:
+            match = LINE.match(l.rstrip('\n'))
+            if match is None:
+                continue
+            time, pos, heading, speed, target, eng_l, eng_r, rest = match.groups()
+
+            t = dt.strptime(time, '%Y-%m-%d %H:%M:%S.%f').timestamp()
+            if epoch is None:
+                epoch = t
+
+            lat, lng = _parse_pair(pos)
+            target_lat, target_lng = _parse_pair(target)
+
+            event, args = _parse_event(rest.strip())
+
+            rows.append((t - epoch, lat, lng, _float(heading), _float(speed), target_lat, target_lng,
+                         round(float(eng_l)), round(float(eng_r)), event, 0, args))
+
+    records = np.array(rows, dtype=RECORD)
+    with open(out, 'wb') as out_file:
+        out_file.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize, epoch if epoch is not None else 0))
+        out_file.write(records.tobytes())
+
+    return len(records)
+
+
+def _parse_pair(s):
+    if s == 'None':
+        return math.nan, math.nan
+    values = s.strip('[]()').split(',')
+    return float(values[0]), float(values[1])
+
+
+def _parse_event(rest):
+    for name in ('Started autonomous drive', 'End autonomous drive'):
+        if rest.startswith(name):
+            return EVENTS[name], [math.nan] * 3
+
+    words = rest.split(' ')
+    args = [_float(w) for w in words[1:4]]
+    args += [math.nan] * (3 - len(args))
+    return EVENTS.get(words[0], 0), args
+
+
+def _float(s):
+    try:
+        return float(s)
+    except ValueError:
+        return math.nan
+
+
+if __name__ == '__main__':
+    files = sys.argv[1:] if len(sys.argv) > 1 else glob.glob('data/*.txt')
+    for fn in files:
+        n = convert_text_log(fn, f"{fn[:-4]}.bin")
+        print(f"Converted {n} records from {fn}")
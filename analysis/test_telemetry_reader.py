@@ -0,0 +1,70 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import math
+
+import telemetry_reader as tr
+from telemetry import TelemetryLogger
+
+
+def write_records(fn, records, tail=b''):
+    with open(fn, 'wb') as f:
+        f.write(TelemetryLogger.HEADER.pack(TelemetryLogger.MAGIC, TelemetryLogger.VERSION,
+                                            TelemetryLogger.RECORD.size, 1000.0))
+        for r in records:
+            f.write(TelemetryLogger.RECORD.pack(*r))
+        f.write(tail)
+
+
+def record(t, event=0):
+    return t, 47.0, 8.0, 90.0, 1.5, math.nan, math.nan, 10, -10, event, 1.0, 2.0, 3.0
+
+
+def test_read_records(tmp_path):
+    fn = tmp_path / 'data.bin'
+    write_records(fn, [record(1), record(2, tr.EVENTS['halt'])])
+
+    epoch, records = tr.read_telemetry(fn)
+
+    assert epoch == 1000.0
+    assert list(records['time']) == [1, 2]
+    assert records['event'][1] == tr.EVENTS['halt']
+    assert list(records['args'][0]) == [1, 2, 3]
+
+
+def test_read_truncated_record(tmp_path):
+    fn = tmp_path / 'data.bin'
+    partial = TelemetryLogger.RECORD.pack(*record(3))[:TelemetryLogger.RECORD.size // 2]
+    write_records(fn, [record(1), record(2)], partial)
+
+    _, records = tr.read_telemetry(fn)
+
+    assert list(records['time']) == [1, 2]
+
+
+def test_read_header_only(tmp_path):
+    fn = tmp_path / 'data.bin'
+    # The header is written when the logger is created
+    TelemetryLogger(str(fn), TelemetryLogger.BINARY)
+
+    _, records = tr.read_telemetry(fn)
+
+    assert len(records) == 0
+
+
+def test_convert_text_log_with_tuple_positions(tmp_path):
+    fn = tmp_path / 'data.txt'
+    fn.write_text('2021-05-20 10:00:00.000000 [47.0, 8.0] 90 1.5 None 10 -10 throttle 1 2 \n'
+                  '2021-05-20 10:00:01.000000 (47.1, 8.1) 91 1.6 (47.2, 8.2) 20 -20 halt \n')
+    out = tmp_path / 'data.bin'
+
+    assert tr.convert_text_log(fn, out) == 2
+
+    _, records = tr.read_telemetry(out)
+    assert list(records['time']) == [0, 1]
+    assert records['lat'][1] == 47.1
+    assert records['target_lng'][1] == 8.2
+    assert list(records['event']) == [tr.EVENTS['throttle'], tr.EVENTS['halt']]
@@ -2,8 +2,8 @@
  * Title: AUGIS Driving controls for Arduino
  * Author: Manuel Gasser
  * Created: 27.02.2021
- * Updated: 11.06.2021
- * Version: 1.5
+ * Updated: 18.10.2026
+ * Version: 1.6
  *
  * Description:
  * Script to control the steering and throttle of the AUGIS
@@ -45,6 +45,14 @@
 #define   DEL_PREFIX        ':'
 #define   DEL_SEP           ','
 
+// Binary frames: sync, type, sequence number, payload, crc
+#define   FRAME_SYNC        0xA5
+#define   FRAME_HEADER      3
+#define   FRAME_ENGINE      0x01
+#define   FRAME_MODE        0x02
+#define   FRAME_CONN        0x03
+#define   FRAME_MAX         8
+
 // Time to wait when no commands sent in milliseconds
 #define   RASP_WAIT         5000
 #define   RASP_INTERVAL     500
@@ -104,6 +112,10 @@ Mode mode;
 
 boolean ledState = false;
 
+// Binary protocol negotiated with the Raspberry Pi
+boolean binaryProtocol = false;
+uint8_t frameSeq = 0;
+
 // Time when last command was sent
 unsigned long timeLastConnReceived;
 unsigned long timeLastConnSent;
@@ -257,13 +269,116 @@ void emergencyMode() {
 void checkForCommands() {
   // Check if new command was sent
   if(SerialUSB.available() > 0) {
+    // Binary frames start with the sync byte, text commands never do
+    if(SerialUSB.peek() == FRAME_SYNC) {
+      readFrame();
+    } else {
+      // Read the command
+      Command cmd = readCommand();
+      executeCommand(cmd);
+    }
+  }
+}
+
+/**
+ * Returns the payload length of a binary frame type.
+ *
+ * @param type of the frame
+ * @return payload length or -1 if the type is unknown
+ */
+int framePayloadLength(uint8_t type) {
+  switch(type) {
+    case FRAME_ENGINE:
+      return 2;
+    case FRAME_MODE:
+    case FRAME_CONN:
+      return 1;
+    default:
+      return -1;
+  }
+}
+
+/**
+ * Calculate the CRC-8 (polynomial 0x07) of the given bytes.
+ *
+ * @param data bytes to calculate the checksum of
+ * @param length of the data
+ * @return checksum
+ */
+uint8_t crc8(const uint8_t *data, size_t length) {
+  uint8_t crc = 0;
+  for(size_t i = 0; i < length; i++) {
+    crc ^= data[i];
+    for(int j = 0; j < 8; j++) {
+      crc = crc & 0x80 ? (crc << 1) ^ 0x07 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+/**
+ * Read a binary frame from the SerialUSB connection and execute it.
+ * Frames with an unknown type or invalid checksum are discarded.
+ */
+void readFrame() {
+  uint8_t frame[FRAME_MAX];
 
-    // Read the command
-    Command cmd = readCommand();
-    executeCommand(cmd);
+  if(SerialUSB.readBytes(frame, FRAME_HEADER) != FRAME_HEADER) {
+    return;
+  }
+  int length = framePayloadLength(frame[1]);
+  if(length < 0) {
+    return;
+  }
+  if(SerialUSB.readBytes(&frame[FRAME_HEADER], length + 1) != (size_t)(length + 1)) {
+    return;
+  }
+  if(crc8(&frame[1], FRAME_HEADER - 1 + length) != frame[FRAME_HEADER + length]) {
+    return;
+  }
+
+  uint8_t *payload = &frame[FRAME_HEADER];
+  switch(frame[1]) {
+    case FRAME_ENGINE:
+      setEngineValues((int8_t)payload[0], (int8_t)payload[1]);
+      break;
+    case FRAME_MODE:
+      if(payload[0] == 0) {
+        mode = AUTONOMOUS;
+        mqttClient.publish(INFO_MODE, "auto");
+      } else if(payload[0] == 1) {
+        mode = RADIO_REMOTE;
+        mqttClient.publish(INFO_MODE, "radio-remote");
+      }
+      break;
+    case FRAME_CONN:
+      // Device 0 is the Raspberry Pi
+      if(payload[0] == 0) {
+        timeLastConnReceived = millis();
+        mqttClient.publish(INFO_CONN, "rasp-ard");
+      }
+      break;
   }
 }
 
+/**
+ * Send a binary frame on the SerialUSB connection.
+ *
+ * @param type of the frame
+ * @param payload of the frame
+ * @param length of the payload
+ */
+void sendFrame(uint8_t type, const uint8_t *payload, size_t length) {
+  uint8_t frame[FRAME_MAX];
+
+  frame[0] = FRAME_SYNC;
+  frame[1] = type;
+  frame[2] = frameSeq++;
+  memcpy(&frame[FRAME_HEADER], payload, length);
+  frame[FRAME_HEADER + length] = crc8(&frame[1], FRAME_HEADER - 1 + length);
+  SerialUSB.write(frame, FRAME_HEADER + length + 1);
+}
+
 /**
  * Write current throttle values to both engines and handle direction
  * change from forward to backward.
@@ -310,22 +425,7 @@ void executeCommand(Command cmd) {
   debugPrint(prefix + ": " + data);
   if(prefix.equals("ENGINE")) {
     int i = data.indexOf(",");
-    int valueLeft = data.substring(0, i).toInt();
-    int valueRight = data.substring(i+1).toInt();
-    if(valueLeft > 0) {
-      engineLeft.cValue = map(valueLeft, 0, 100, FWD_DZ, FWD_THROTTLE_MAX);
-    } else if(valueLeft == 0) {
-      engineLeft.cValue = NO_THROTTLE;
-    } else {
-      engineLeft.cValue = map(valueLeft, -100, 0, BWD_THROTTLE_MAX, BWD_DZ);
-    }
-    if(valueRight > 0) {
-      engineRight.cValue = map(valueRight, 0, 100, FWD_DZ, FWD_THROTTLE_MAX);
-    } else if(valueRight == 0) {
-      engineRight.cValue = NO_THROTTLE;
-    } else {
-      engineRight.cValue = map(valueRight, -100, 0, BWD_THROTTLE_MAX, BWD_DZ);
-    }
+    setEngineValues(data.substring(0, i).toInt(), data.substring(i+1).toInt());
   } else if(prefix.equals("MODE")) {
     data.toLowerCase();
     if(data.equals("auto")) {
@@ -335,6 +435,37 @@ void executeCommand(Command cmd) {
       mode = RADIO_REMOTE;
       mqttClient.publish(INFO_MODE, "radio-remote");
     }
+  } else if(prefix.equals("PROTO")) {
+    // Acknowledge binary protocol in text, the Raspberry Pi switches after receiving it
+    if(data.equals("binary")) {
+      binaryProtocol = true;
+      sendCommand(Command("proto", "binary"));
+    } else {
+      binaryProtocol = false;
+    }
+  }
+}
+
+/**
+ * Map engine values between -100 and 100 to the throttle range of the engines.
+ *
+ * @param valueLeft value of the left engine
+ * @param valueRight value of the right engine
+ */
+void setEngineValues(int valueLeft, int valueRight) {
+  if(valueLeft > 0) {
+    engineLeft.cValue = map(valueLeft, 0, 100, FWD_DZ, FWD_THROTTLE_MAX);
+  } else if(valueLeft == 0) {
+    engineLeft.cValue = NO_THROTTLE;
+  } else {
+    engineLeft.cValue = map(valueLeft, -100, 0, BWD_THROTTLE_MAX, BWD_DZ);
+  }
+  if(valueRight > 0) {
+    engineRight.cValue = map(valueRight, 0, 100, FWD_DZ, FWD_THROTTLE_MAX);
+  } else if(valueRight == 0) {
+    engineRight.cValue = NO_THROTTLE;
+  } else {
+    engineRight.cValue = map(valueRight, -100, 0, BWD_THROTTLE_MAX, BWD_DZ);
   }
 }
 
@@ -423,7 +554,13 @@ void raspberryConnCheck() {
   unsigned long now = millis();
 
   if(now - timeLastConnSent > RASP_INTERVAL) {
-    sendCommand(Command("conn", "arduino"));
+    if(binaryProtocol) {
+      // Device 1 is the Arduino
+      const uint8_t device = 1;
+      sendFrame(FRAME_CONN, &device, 1);
+    } else {
+      sendCommand(Command("conn", "arduino"));
+    }
     timeLastConnSent = now;
   }
 
@@ -431,6 +568,8 @@ void raspberryConnCheck() {
   if(now - timeLastConnReceived > RASP_WAIT) {
     // Failsafe A
     mode = RADIO_REMOTE;
+    // Raspberry Pi has to negotiate the protocol again after reconnecting
+    binaryProtocol = false;
     engineLeft.cValue = NO_THROTTLE;
     engineRight.cValue = NO_THROTTLE;
 
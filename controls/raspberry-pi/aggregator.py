@@ -0,0 +1,113 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import json
+import threading
+import time
+
+from sensor_codec import SensorCodec
+from topics import Topics
+
+
+class TelemetryAggregator:
+    # Time values are collected before they are published as one frame in seconds
+    WINDOW = .2
+
+    # Topics collected in the frame with their key in the frame
+    KEYS = {
+        Topics.INFO_SPEED: 'speed',
+        Topics.SENSOR_GPS_DRG: 'drg'
+    }
+
+    """
+    Collect the latest values of high rate telemetry topics and publish them
+    together as one frame. Can be used in place of the MQTT client, messages
+    on other topics are published directly. Every process publishing frames
+    uses its own topic, so the sequence numbers of the frames do not collide.
+
+    :param client: Mqtt client the frames are published with
+    :param window: time values are collected in seconds
+    :param legacy: also publish every value on its own topic
+    :param local:  function called with topic and payload of every collected value,
+                   used to deliver values to this process without the broker
+    :param topic:  topic the frames are published on
+    """
+
+    def __init__(self, client, window=WINDOW, legacy=False, local=None, topic=Topics.INFO_TELEMETRY):
+        self.client = client
+        self.topic = topic
+        self.window = window
+        self.legacy = legacy
+        self.local = local
+        self.frames = 0
+        self.values = 0
+        self.__seq = 0
+        self.__cond = threading.Condition()
+        self.__frame = {}
+
+        self.__thread = threading.Thread(target=self.__publish_loop, name='telemetry-aggregator')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    """
+    Publish a payload. Values of collected topics are added to the next frame.
+
+    :param topic:   The topic is the place where the message should be published
+    :param payload: The payload is the data that should be published
+    :param qos:     Quality of service, None to use the policy of the topic
+    """
+
+    def pub(self, topic, payload, qos=None, retain=False):
+        key = TelemetryAggregator.KEYS.get(topic)
+        if key is None:
+            self.client.pub(topic, payload, qos=qos, retain=retain)
+            return
+
+        if self.legacy:
+            # Value comes back over the broker
+            self.client.pub(topic, payload, qos=qos, retain=retain)
+        elif self.local is not None:
+            self.local(topic, payload)
+
+        # Frames are JSON, binary sensor values are added decoded
+        if isinstance(payload, bytes):
+            payload = SensorCodec.decode(payload)
+
+        with self.__cond:
+            self.__frame[key] = payload
+            self.values += 1
+            self.__cond.notify()
+
+    """
+    Get the counters of the aggregator.
+
+    :returns: published frames and collected values
+    """
+
+    def stats(self):
+        with self.__cond:
+            return {
+                'frames': self.frames,
+                'values': self.values
+            }
+
+    def __publish_loop(self):
+        while True:
+            with self.__cond:
+                while len(self.__frame) == 0:
+                    self.__cond.wait()
+
+            # Collect the values arriving during the window
+            time.sleep(self.window)
+
+            with self.__cond:
+                frame = self.__frame
+                self.__frame = {}
+                self.__seq += 1
+                self.frames += 1
+                frame['seq'] = self.__seq
+
+            self.client.pub(self.topic, json.dumps(frame, separators=(',', ':')))
@@ -0,0 +1,279 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import asyncio
+import logging as log
+import time
+
+from picamera import PiCamera
+from picamera.exc import PiCameraMMALError, PiCameraError
+
+import augis_controller as ac
+import ip
+import request_handler as rh
+from aggregator import TelemetryAggregator
+from async_serial import AsyncCommandPort, AsyncSerial
+from config import Config
+from engine import Engine
+from fusion import GpsFusion
+from gps import Gps
+from mqtt import Mqtt, MqttLoop, OfflineQueue
+from pid import Pid
+from route_cache import RouteCache
+from scheduler import Scheduler
+from telemetry import TelemetryLogger
+from thread_handler import s_print
+from timers import AsyncTimers
+from topics import Topics
+
+# Alternative entry point of the controller. MQTT, the serial ports, the timers and
+# the drive loop run on one asyncio event loop instead of their own threads. The
+# handlers and the drive steps of augis_controller are reused, slow handlers still
+# run on the worker pool of the dispatcher and blocking engine maneuvers on the executor.
+
+# Maximum length of a line from the Dragino before it is dropped
+MAX_GPS_LINE = 1024
+
+loop = None
+
+
+class DriveTask:
+
+    """
+    Drive running as task on the event loop, can be checked like the drive thread.
+
+    :param future: future of the drive
+    """
+
+    def __init__(self, future):
+        self.future = future
+
+    def is_alive(self):
+        return not self.future.done()
+
+
+"""
+Start an autonomous drive through a plan as task on the event loop.
+Can be called from any thread.
+
+:param plan: RoutePlan with the waypoints to drive through
+:returns:    DriveTask of the drive
+"""
+
+
+def start_drive(plan):
+    return DriveTask(asyncio.run_coroutine_threadsafe(autonomous_drive(plan, lambda: ac.stop_drive), loop))
+
+
+"""
+Drive through a planned route with the steps of augis_controller.drive_steps.
+The blocking engine maneuvers run on the executor.
+
+:param plan: RoutePlan with the waypoints to drive through
+:param stop: To stop the drive
+"""
+
+
+async def autonomous_drive(plan, stop):
+    rate = None
+    try:
+        for step in ac.drive_steps(plan, stop):
+            if isinstance(step, str):
+                # A new control loop starts after every maneuver
+                if rate is None or rate.name != step:
+                    rate = ac.scheduler.rate(step, Engine.TIME_BETWEEN_UPDATES)
+                await rate.sleep_async()
+            else:
+                func, args = step
+                await loop.run_in_executor(None, func, *args)
+                rate = None
+    except Exception as ex:
+        log.exception(f"Autonomous drive failed, Stacktrace {ex}")
+        ac.engine.stop()
+        await loop.run_in_executor(None, ac.engine.halt)
+
+
+"""
+Send heartbeats to the Arduino and reconnect the serial port if the Arduino does not answer.
+
+:param port: AsyncCommandPort of the Arduino
+"""
+
+
+async def conn_arduino(port):
+    while True:
+        if ac.arduino_heartbeat(port.failed):
+            # Close the old port before the new one is opened
+            port.set_serial(None)
+            # Opening the port blocks
+            ac.serial_ard = await loop.run_in_executor(None, ac.connect_serial, Config.SERIAL_PORT_ARD,
+                                                       Config.BAUDRATE)
+            port.set_serial(ac.serial_ard)
+            ac.negotiate_protocol()
+
+        await asyncio.sleep(ac.HEARTBEAT_INTERVAL / 1000)
+
+
+"""
+Reconnect the serial port of the Dragino if it failed, e.g. because it was unplugged.
+
+:param port: AsyncSerial of the Dragino
+"""
+
+
+async def conn_dragino(port):
+    lost = False
+    while True:
+        await asyncio.sleep(ac.RECONNECT_WAIT / 1000)
+        # A Dragino that was never connected is not retried
+        lost = lost or port.failed
+        if lost:
+            port.set_serial(None)
+            # Opening the port blocks
+            ac.serial_drg = await loop.run_in_executor(None, ac.connect_serial, Config.SERIAL_PORT_DRG,
+                                                       Config.BAUDRATE)
+            port.set_serial(ac.serial_drg)
+            lost = ac.serial_drg is None
+
+
+"""
+Publish the GPS positions of the lines received from the Dragino.
+
+:param port: AsyncSerial of the Dragino
+"""
+
+
+def read_gps_lines(port):
+    buffer = bytearray()
+
+    def on_data(data):
+        buffer.extend(data)
+        while True:
+            end = buffer.find(b'\n')
+            if end < 0:
+                if len(buffer) > MAX_GPS_LINE:
+                    buffer.clear()
+                return
+            line = bytes(buffer[:end + 1])
+            del buffer[:end + 1]
+            Gps.publish_line(line, ac.uplink, ac.SENSOR_PAYLOAD_FORMAT)
+
+    port.on_data = on_data
+
+
+async def timing_task():
+    while True:
+        await asyncio.sleep(ac.TIMING_INTERVAL)
+        ac.publish_timing()
+
+
+async def route_delta_task():
+    seq = ac.driven_route_AUGIS.seq
+    while True:
+        await asyncio.sleep(ac.CURRENT_ROUTE_INTERVAL)
+        seq = ac.publish_route_delta(seq)
+
+
+async def main():
+    global loop
+
+    loop = asyncio.get_running_loop()
+
+    # Connection flag for base station
+    ac.connected_to_base = False
+
+    # Get IP Address
+    ac.ip_addr = ip.get_ip_address('wlan0')
+    if ac.ip_addr is None:
+        ac.ip_addr = ip.get_ip_address('eth0')
+
+    # Setup dispatcher for MQTT messages, inline handlers run on the event loop
+    ac.dispatcher = ac.create_dispatcher()
+
+    # Timer service for sensor deadlines and failsafes on the event loop
+    ac.timers = AsyncTimers(loop)
+    # Fusion of the GPS devices and the heading sensor
+    ac.fusion = GpsFusion()
+    # Routes and lakes loaded before
+    ac.route_cache = RouteCache(ac.ROUTE_CACHE_DIR)
+    # Uploads to the aws api are sent in the background, also after a restart
+    rh.start_uploads(ac.UPLOAD_SPILL_FILE)
+    # Drives run as task on the event loop instead of in their own thread
+    ac.set_drive_starter(start_drive)
+
+    # Setup MQTT client, its network I/O runs on the event loop
+    client = ac.client = Mqtt()
+    client.connected = False
+    # Subscribing does not block, so no thread is needed for the connect handler
+    client.on_connect = ac.on_connect
+    client.on_disconnect = ac.on_disconnect
+    client.on_message = ac.on_message_callback
+    client.will_set(Topics.LWT, payload='raspberry')
+    # Messages published without connection to the broker are sent after the reconnect
+    client.set_offline_queue(OfflineQueue(ac.MQTT_SPILL_FILE))
+
+    # High rate values are published in frames, the Dragino fixes are delivered directly to the dispatcher
+    ac.uplink = TelemetryAggregator(client, ac.TELEMETRY_WINDOW, ac.TELEMETRY_LEGACY_TOPICS, ac.dispatcher.dispatch)
+
+    # Connect to Dragino and Arduino over Serial Ports, opening the ports blocks
+    ac.serial_ard = await loop.run_in_executor(None, ac.connect_serial, Config.SERIAL_PORT_ARD, Config.BAUDRATE)
+    ac.serial_drg = await loop.run_in_executor(None, ac.connect_serial, Config.SERIAL_PORT_DRG, Config.BAUDRATE)
+
+    # Non-blocking port writing and reading the commands of the Arduino
+    port = AsyncCommandPort(loop, ac.serial_ard)
+    port.on_error = ac.on_serial_error
+    port.subscribe('conn', ac.on_arduino_conn)
+    port.subscribe('proto', ac.on_arduino_proto)
+    ac.serial_writer = port
+    ac.serial_reader = port
+    ac.negotiate_protocol()
+
+    # Timing of the control loops
+    ac.scheduler = Scheduler()
+
+    # Initialize engine and Pid controller
+    ac.engine = Engine()
+    ac.engine.set_scheduler(ac.scheduler)
+    ac.engine.set_serial_writer(port)
+    ac.engine.set_mqtt_client(ac.uplink)
+    ac.pid = Pid()
+
+    # Deadlines to keep sensor data current
+    ac.create_sensor_timers()
+
+    # Get GPS information from Dragino
+    gps_port = AsyncSerial(loop, ac.serial_drg)
+    read_gps_lines(gps_port)
+
+    ac.camera = None
+    try:
+        ac.camera = PiCamera()
+        ac.camera.resolution = (1280, 720)
+        ac.camera.framerate = 24
+    except (PiCameraMMALError, PiCameraError) as err:
+        s_print(err)
+
+    # Create file to log data, written in the background
+    data_ext = 'bin' if ac.TELEMETRY_FORMAT == TelemetryLogger.BINARY else 'txt'
+    data_fn = f"/home/pi/Desktop/data/data_{int(time.time())}.{data_ext}"
+    f = open(data_fn, 'x')
+    f.close()
+    ac.telemetry = TelemetryLogger(data_fn, ac.TELEMETRY_FORMAT)
+    ac.engine.set_logger(ac.telemetry)
+
+    # Connect to the broker last, the handlers run as soon as the socket is watched by the event loop
+    mqtt_loop = MqttLoop(client, loop)
+    await mqtt_loop.start(Config.DOMAIN, Config.PORT, keepalive=3)
+
+    await asyncio.gather(conn_arduino(port), conn_dragino(gps_port), timing_task(), route_delta_task())
+
+
+if __name__ == '__main__':
+    # Setup for log file
+    log.basicConfig(filename='augis.log', format='%(asctime)s %(levelname)s %(message)s', datefmt='%m/%d/%Y %H:%M:%S',
+                    level=log.INFO)
+
+    asyncio.run(main())
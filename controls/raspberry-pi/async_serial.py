@@ -0,0 +1,296 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import collections
+import logging as log
+import threading
+import time
+
+from serial.serialutil import SerialException
+
+from loop_handler import call_in_loop
+from protocol import Decoder, Protocol
+
+
+class AsyncSerial:
+
+    """
+    Non-blocking adapter over a serial.Serial on an asyncio event loop. The port is
+    watched by the event loop, received bytes are passed to on_data and written
+    bytes are buffered until the port is writable.
+
+    :param loop: event loop the port is watched by
+    :param s:    serial connection, None if not connected
+    """
+
+    def __init__(self, loop, s=None):
+        self.loop = loop
+        self.serial = None
+        self.failed = False
+        # Callbacks called in the event loop
+        self.on_data = None
+        self.on_drain = None
+        self.on_error = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.__fd = None
+        self.__out = bytearray()
+        self.__lock = threading.Lock()
+        if s is not None:
+            self.set_serial(s)
+
+    """
+    Replace the serial connection, the port is switched to non-blocking mode
+    and the replaced port is closed.
+
+    :param s: serial connection, None if not connected
+    """
+
+    def set_serial(self, s):
+        call_in_loop(self.loop, self.__set_serial, s)
+
+    """
+    Write bytes to the port as soon as it is writable. Bytes written without
+    connection are dropped.
+
+    :param data: bytes to be written
+    """
+
+    def write(self, data):
+        with self.__lock:
+            self.__out.extend(data)
+        call_in_loop(self.loop, self.__start_writing)
+
+    """
+    Check if there are bytes waiting to be written.
+
+    :returns: true if the port has not written everything yet
+    """
+
+    def busy(self):
+        with self.__lock:
+            return len(self.__out) > 0
+
+    def __set_serial(self, s):
+        self.__detach()
+        with self.__lock:
+            self.__out.clear()
+        # The replaced port is not used anymore, so its file descriptor is released
+        if self.serial is not None and self.serial is not s:
+            try:
+                self.serial.close()
+            except (SerialException, OSError) as ex:
+                log.warning(f"Could not close Serial Port: {self.serial.port}, Stacktrace {ex}")
+        self.serial = s
+        self.failed = False
+        if s is None:
+            return
+        s.timeout = 0
+        s.write_timeout = 0
+        self.__fd = s.fileno()
+        self.loop.add_reader(self.__fd, self.__on_readable)
+
+    def __detach(self):
+        if self.__fd is not None:
+            self.loop.remove_reader(self.__fd)
+            self.loop.remove_writer(self.__fd)
+            self.__fd = None
+
+    def __start_writing(self):
+        if self.__fd is None:
+            with self.__lock:
+                self.__out.clear()
+            return
+        self.loop.add_writer(self.__fd, self.__on_writable)
+
+    def __on_readable(self):
+        s = self.serial
+        try:
+            data = s.read(max(1, s.in_waiting))
+        except (SerialException, OSError) as ex:
+            log.error(f"Raspberry Pi could not read from Serial USB connection, Stacktrace {ex}")
+            self.__fail()
+            return
+
+        self.bytes_read += len(data)
+        if len(data) > 0 and self.on_data is not None:
+            self.on_data(data)
+
+    def __on_writable(self):
+        with self.__lock:
+            data = bytes(self.__out)
+        try:
+            n = self.serial.write(data) or 0
+        except (SerialException, OSError) as ex:
+            log.error(f"Raspberry Pi could not write on Serial USB connection, Stacktrace {ex}")
+            self.__fail()
+            return
+
+        self.bytes_written += n
+        with self.__lock:
+            del self.__out[:n]
+            drained = len(self.__out) == 0
+        if drained:
+            self.loop.remove_writer(self.__fd)
+            if self.on_drain is not None:
+                self.on_drain()
+
+    def __fail(self):
+        self.__detach()
+        with self.__lock:
+            self.__out.clear()
+        self.failed = True
+        if self.on_error is not None:
+            self.on_error()
+
+
+class AsyncCommandPort:
+    # Commands where only the latest value has to be sent
+    COALESCE = ('engine',)
+
+    """
+    Commands to and from the Arduino on an asyncio event loop, with the interface
+    of SerialWriter and SerialReader. Commands are encoded when the port is ready
+    for them, a coalescable command replaces a not yet sent command with the same prefix.
+
+    :param loop: event loop the port is watched by
+    :param s:    serial connection, None if not connected
+    """
+
+    def __init__(self, loop, s=None):
+        self.port = AsyncSerial(loop)
+        self.port.on_data = self.__on_data
+        self.port.on_drain = self.__flush
+        self.port.on_error = self.__on_error
+        self.protocol = Protocol.TEXT
+        self.on_error = None
+        self.__seq = 0
+        self.__decoder = Decoder()
+        self.__subscribers = {}
+        self.__lock = threading.Lock()
+        self.__queue = collections.deque()
+        # Pending coalescable commands by prefix
+        self.__pending = {}
+        self.__flush_scheduled = False
+        self.__written = 0
+        self.__coalesced = 0
+        self.__failed = 0
+        self.__latency_total = 0.0
+        self.__latency_max = 0.0
+        self.set_serial(s)
+
+    @property
+    def failed(self):
+        return self.port.failed
+
+    def set_serial(self, s):
+        call_in_loop(self.port.loop, self.__set_serial, s)
+
+    def set_protocol(self, protocol):
+        self.protocol = protocol
+
+    """
+    Subscribe to commands with the given prefix. The callback is executed
+    in the event loop and has to return quickly.
+
+    :param prefix:   Prefix of the commands
+    :param callback: Function called with the received command
+    """
+
+    def subscribe(self, prefix, callback):
+        with self.__lock:
+            self.__subscribers.setdefault(prefix, []).append(callback)
+
+    """
+    Queue a command to be sent to the Arduino. Can be called from any thread.
+
+    :param prefix:  The name of the message
+    :param value:   The payload of the message
+    """
+
+    def send(self, prefix, value):
+        with self.__lock:
+            entry = self.__pending.get(prefix)
+            if entry is not None:
+                entry[1] = value
+                self.__coalesced += 1
+                return
+
+            entry = [prefix, value, time.perf_counter()]
+            if prefix in AsyncCommandPort.COALESCE:
+                self.__pending[prefix] = entry
+            self.__queue.append(entry)
+            if self.__flush_scheduled:
+                return
+            self.__flush_scheduled = True
+        call_in_loop(self.port.loop, self.__flush)
+
+    """
+    Get the counters of the port.
+
+    :returns: written, coalesced and failed commands, write latency in milliseconds,
+              frames with invalid checksum and frames lost according to the sequence numbers
+    """
+
+    def stats(self):
+        with self.__lock:
+            return {
+                'written': self.__written,
+                'coalesced': self.__coalesced,
+                'failed': self.__failed,
+                'queued': len(self.__queue),
+                'avg_latency_ms': self.__latency_total / self.__written * 1000 if self.__written > 0 else 0,
+                'max_latency_ms': self.__latency_max * 1000,
+                'crc_errors': self.__decoder.crc_errors,
+                'lost': self.__decoder.lost
+            }
+
+    def __set_serial(self, s):
+        # A new connection always starts with the text protocol
+        self.protocol = Protocol.TEXT
+        self.__decoder = Decoder()
+        self.port.set_serial(s)
+
+    def __flush(self):
+        with self.__lock:
+            self.__flush_scheduled = False
+            # The queued commands are encoded when the port has written the last ones
+            if self.port.busy() or len(self.__queue) == 0:
+                return
+            entries = list(self.__queue)
+            self.__queue.clear()
+            self.__pending.clear()
+
+        if self.port.serial is None or self.port.failed:
+            with self.__lock:
+                self.__failed += len(entries)
+            return
+
+        data = bytearray()
+        now = time.perf_counter()
+        with self.__lock:
+            for prefix, value, queued in entries:
+                self.__seq = (self.__seq + 1) & 0xFF
+                data.extend(Protocol.encode(self.protocol, prefix, value, self.__seq))
+                latency = now - queued
+                self.__written += 1
+                self.__latency_total += latency
+                self.__latency_max = max(self.__latency_max, latency)
+        self.port.write(data)
+
+    def __on_data(self, data):
+        for cmd in self.__decoder.feed(data):
+            with self.__lock:
+                callbacks = list(self.__subscribers.get(cmd.get_prefix(), ()))
+            for callback in callbacks:
+                try:
+                    callback(cmd)
+                except Exception as ex:
+                    log.exception(f"Subscriber for serial command {cmd.get_prefix()} failed, Stacktrace {ex}")
+
+    def __on_error(self):
+        if self.on_error is not None:
+            self.on_error()
@@ -6,8 +6,9 @@ Last Modified: 17.06.2021
 
 import json
 import logging as log
+import multiprocessing
+import os
 import time
-from datetime import datetime as dt
 
 import serial
 from picamera import PiCamera
@@ -17,15 +18,29 @@ from serial.serialutil import SerialException
 import file_handler as fh
 import ip
 import request_handler as rh
+import sensor_process
 import thread_handler as th
-from command import Command as Cmd
+from aggregator import TelemetryAggregator
 from config import Config
+from dispatcher import Dispatcher
 from engine import Engine
+from fusion import GpsFusion
 from gps import Gps
 from lake import Lake
-from mqtt import Mqtt
+from mqtt import Mqtt, OfflineQueue
 from pid import Pid
+from planner import plan_route
+from protocol import Protocol
+from route_cache import RouteCache
+from scheduler import Scheduler
+from sensor_codec import SensorCodec
+from sensor_state import SensorState
+from serial_reader import SerialReader
+from serial_writer import SerialWriter
+from telemetry import TelemetryLogger
 from thread_handler import s_print, start_thread
+from timers import Timers
+from track import TrackStore
 from topics import Topics
 
 # Variables for drive thread
@@ -35,16 +50,30 @@ stop_drive = False
 # Time to wait for command in milliseconds
 COMMAND_WAIT = 5000
 RECONNECT_WAIT = 3000
-time_last_command = time.time()
+# Interval of heartbeat commands to the Arduino in milliseconds
+HEARTBEAT_INTERVAL = 500
+# Timeout for reading from serial ports in seconds
+SERIAL_TIMEOUT = .5
+# Protocol requested from the Arduino (Protocol.TEXT or Protocol.BINARY)
+SERIAL_PROTOCOL = Protocol.BINARY
+time_last_command = time.monotonic() * 1000
+time_last_reconnect = time_last_command
 conn_err = False
+arduino_lost = False
 
 created_route_AUGIS = []
-driven_route_AUGIS = []
+# Waypoints of the created route with detours around shore and obstacles
+planned_route_AUGIS = None
+# Track driven by the AUGIS
+driven_route_AUGIS = TrackStore()
 # Polygon of the lake the AUGIS is driving in
 lake = None
+# Id of the loaded route
+route_id = None
 
 heading = 0
-heading_time = time.time()
+# Heading sensor in the sensor deadlines
+HEADING = 'heading'
 
 gps_pos = {
     Gps.RTK: None,
@@ -54,73 +83,256 @@ gps_pos = {
 
 start_pos = None
 
-gps_times = {
-    Gps.RTK: time.time(),
-    Gps.PHONE: time.time(),
-    Gps.DRG: time.time()
-}
+# Deadlines of the sensors, re-armed with every update
+sensor_timers = {}
+# Scheduled callback of Failsafe C
+failsafe_c_timer = None
 
 DISTANCE_EPSILON = 1
+# Default tolerance of the simplified driven route in meters
+CURRENT_ROUTE_TOLERANCE = 1
+# Interval of publishing new points of the driven route in seconds
+CURRENT_ROUTE_INTERVAL = 2
+# Distance of the point on the path the AUGIS steers to when following the path in meters
+LOOKAHEAD_DISTANCE = 5
+FOLLOW_THROTTLE = Engine.MAX_THROTTLE * .7
+
+# Stop at every waypoint and turn on the spot or follow the path without stopping
+DRIVE_STOP_AND_TURN = 'stop-and-turn'
+DRIVE_FOLLOW_PATH = 'follow-path'
+DRIVE_MODE = DRIVE_STOP_AND_TURN
 FAIL_C_DISTANCE_EPSILON = 5
 FAIL_C_WAIT = 30
+# Time after the connection loss the start position of Failsafe C is taken in seconds
+FAIL_C_START_WAIT = 5
+
+# Interval of publishing the timing of the control loops in seconds
+TIMING_INTERVAL = 5
+
+# Encoding of the sensor values published by the Raspberry Pi (SensorCodec.TEXT or SensorCodec.BINARY),
+# binary only when every consumer of the sensor topics decodes it
+SENSOR_PAYLOAD_FORMAT = SensorCodec.TEXT
+
+# Files the MQTT messages are spilled to when the broker is not reachable for a long time,
+# the priority of the messages is appended to the name
+MQTT_SPILL_FILE = '/home/pi/Desktop/data/mqtt_spill'
+# File of the uploads to the aws api waiting to be sent
+UPLOAD_SPILL_FILE = '/home/pi/Desktop/data/upload_spill'
+
+# Directory of the cached routes and lakes
+ROUTE_CACHE_DIR = '/home/pi/Desktop/data/cache'
+
+# Read and fuse the sensors in their own process, the control process reads
+# the fused state from shared memory without locking
+SENSOR_PROCESS = False
+# Interval the control process checks the shared sensor state for updates in seconds
+SENSOR_POLL_INTERVAL = .02
+
+# Window of the telemetry frames published over MQTT in seconds
+TELEMETRY_WINDOW = .2
+# Also publish the values of the telemetry frames on their own topics, read by the
+# consumers not migrated to the frames yet, e.g. the iOS app
+TELEMETRY_LEGACY_TOPICS = True
+
+# Format of the telemetry data file (TelemetryLogger.TEXT or TelemetryLogger.BINARY)
+TELEMETRY_FORMAT = TelemetryLogger.TEXT
 
 """
-Drive through a route of points.
+Drive through a planned route. The route is checked against the lake before,
+the drive only follows the waypoints.
 
-:param points:   List filled with GPS points
+:param plan:     RoutePlan with the waypoints to drive through
 :param stop:     To stop the thread
 """
 
 
-def autonomous_drive(points, stop):
-    global stop_drive
+def autonomous_drive(plan, stop):
+    rate = None
+    try:
+        for step in drive_steps(plan, stop):
+            if isinstance(step, str):
+                # A new control loop starts after every maneuver
+                if rate is None or rate.name != step:
+                    rate = scheduler.rate(step, Engine.TIME_BETWEEN_UPDATES)
+                rate.sleep()
+            else:
+                func, args = step
+                func(*args)
+                rate = None
+    except Exception as ex:
+        log.exception(f"Autonomous drive failed, Stacktrace {ex}")
+        engine.stop()
+        engine.halt()
+
+
+"""
+Start an autonomous drive through a plan with the drive starter of the entry point.
+
+:param plan: RoutePlan with the waypoints to drive through
+"""
+
+
+def start_drive(plan):
+    global drive_thread
+
+    drive_thread = drive_starter(plan)
+
+
+"""
+Start an autonomous drive through a plan in its own thread.
+
+:param plan: RoutePlan with the waypoints to drive through
+:returns:    drive thread
+"""
+
+
+def start_drive_thread(plan):
+    return start_thread(autonomous_drive, (plan, lambda: stop_drive,))
+
+
+drive_starter = start_drive_thread
+
+"""
+Set the function that starts autonomous drives, e.g. to run them on an event loop.
+
+:param starter: function called with the RoutePlan, returns a handle with is_alive
+"""
+
+
+def set_drive_starter(starter):
+    global drive_starter
+
+    drive_starter = starter
+
+
+"""
+Steps of an autonomous drive, run by the threaded and the asyncio entry point.
+A step is either a blocking engine maneuver as function and arguments or the
+name of the control loop to wait for its next period.
+
+:param plan:     RoutePlan with the waypoints to drive through
+:param stop:     To stop the drive
+"""
+
+
+def drive_steps(plan, stop):
     engine.log_data('Started autonomous drive')
     client.pub(Topics.INFO_STATUS, "Started autonomous drive")
+    start = time.monotonic()
+
+    if DRIVE_MODE == DRIVE_FOLLOW_PATH:
+        yield from follow_path(plan, stop)
+    else:
+        yield from stop_and_turn(plan, stop)
+
+    duration = time.monotonic() - start
+    engine.log_data('mission', duration, plan.length, len(plan.waypoints))
+    client.pub(Topics.INFO_STATUS, f"Autonomous drive took {duration:.1f} s for {plan.length:.0f} m in mode "
+                                   f"{DRIVE_MODE}")
+    engine.log_data('End autonomous drive')
+
+
+"""
+Drive to every waypoint, stop and turn on the spot towards the next one.
 
-    # engine.halt()
+:param plan:     RoutePlan with the waypoints to drive through
+:param stop:     To stop the thread
+"""
+
+
+def stop_and_turn(plan, stop):
     # Get current GPS position
     pos = get_best_gps_pos()
 
-    # Drive through points on route
-    for i, point in enumerate(points):
-        # Check if straight route to next point is possible
-        if lake.no_intersection(pos, point):
-            # Calculate and drive new route
-            new_route = lake.calc_new_route(pos, point)
-            # Check if route could be created
-            if new_route is None:
-                log.error(f"Can not drive straight to next point and new route could not be calculated: Current Point: "
-                          f"{pos}, Next Point: {point}")
-                client.pub(Topics.ERROR_DRIVE, f"Can not drive straight to next point and new route could not be "
-                                               f"calculated: Current Point: {pos}, Next Point: {point}")
-                engine.stop()
-                stop_drive = True
-            else:
-                autonomous_drive(new_route, lambda: stop_drive, )
-        else:
-            engine.set_target(point)
+    # Drive through waypoints of the plan
+    for point, bearing in zip(plan.waypoints, plan.bearings):
+        engine.set_target(point)
+        # Turn towards point
+        yield engine.turn_to_on_spot, (bearing,)
+        # Put engine on full throttle
+        engine.throttle(Engine.MAX_THROTTLE * .7)
+        # Drive towards point until AUGIS is close
+        while Gps.get_distance(pos, point) > DISTANCE_EPSILON and not stop():
+            # Get current GPS position
+            pos = get_best_gps_pos()
             # Get direction to next point
             direction = Gps.get_direction(pos, point)
-            # Turn towards point
-            engine.turn_to_on_spot(direction)
-            # Put engine on full throttle
-            engine.throttle(Engine.MAX_THROTTLE * .7)
-            # Drive towards point until AUGIS is close
-            while Gps.get_distance(pos, point) > DISTANCE_EPSILON and not stop_drive:
-                # Get current GPS position
-                pos = get_best_gps_pos()
-                # Get direction to next point
-                direction = Gps.get_direction(pos, point)
-                # Calculate correction angle
-                c_angle = pid.control(direction, heading, 1)
-                # Turn by correction angle
-                engine.turn_by(c_angle)
-                engine.log_data('autonomous', direction, c_angle)
-                time.sleep(Engine.TIME_BETWEEN_UPDATES)
+            # Calculate correction angle
+            c_angle = pid.control(direction, heading, 1)
+            # Turn by correction angle
+            engine.turn_by(c_angle)
+            engine.log_data('autonomous', direction, c_angle)
+            yield 'stop_and_turn'
 
         # Stop the AUGIS when it has reached the point
-        engine.halt()
-    engine.log_data('End autonomous drive')
+        yield engine.halt, ()
+
+
+"""
+Follow the path through the waypoints with pure pursuit. The AUGIS steers towards
+a point a lookahead distance ahead on the path, keeps its speed through the
+waypoints and only halts at the end of the route.
+
+:param plan:     RoutePlan with the waypoints to drive through
+:param stop:     To stop the thread
+"""
+
+
+def follow_path(plan, stop):
+    if len(plan.waypoints) == 0:
+        return
+
+    last = plan.waypoints[-1]
+    index = 0
+
+    # The AUGIS is standing still, so turn towards the path first
+    engine.set_target(plan.waypoints[0])
+    yield engine.turn_to_on_spot, (plan.bearings[0],)
+    pos = get_best_gps_pos()
+    while not stop():
+        if pos is None:
+            # Failsafe D stops the AUGIS without position, the drive continues with the next fix
+            yield 'follow_path'
+            pos = get_best_gps_pos()
+            continue
+        if Gps.get_distance(pos, last) <= DISTANCE_EPSILON:
+            break
+
+        index, target = plan.lookahead(pos, index, LOOKAHEAD_DISTANCE)
+        engine.set_target(target)
+        engine.steer(Gps.get_direction(pos, target), FOLLOW_THROTTLE, index)
+        yield 'follow_path'
+        # Get current GPS position
+        pos = get_best_gps_pos()
+
+    # Stop the AUGIS at the end of the route
+    yield engine.halt, ()
+
+
+"""
+Plan a drive from a position. Only the leg to the first point has to be
+checked, the loaded route is planned when it is loaded.
+
+:param pos:    position the drive starts at
+:param points: points to drive to, None to drive the loaded route
+:returns:      RoutePlan or None if the drive is not possible
+"""
+
+
+def plan_drive(pos, points=None):
+    if points is None:
+        if planned_route_AUGIS is None:
+            client.pub(Topics.ERROR_DRIVE, "No drivable route loaded")
+            log.error("No drivable route loaded")
+            return None
+        plan = planned_route_AUGIS.from_position(lake, pos)
+    else:
+        plan = plan_route(lake, [pos] + points)
+
+    if plan is None:
+        log.error(f"Can not drive from current position to route: Current Point: {pos}")
+        client.pub(Topics.ERROR_DRIVE, f"Can not drive from current position to route: Current Point: {pos}")
+    return plan
 
 
 """
@@ -132,170 +344,319 @@ Function that will send a message to the arduino.
 
 
 def send_command(prefix, value):
-    start_thread(send_command_thread, (prefix, value,))
+    serial_writer.send(prefix, value)
 
 
-def send_command_thread(prefix, value):
-    with th.locks["serial_lock"]:
-        try:
-            if serial_ard is not None:
-                serial_ard.write(f"{prefix}: {value}\n".encode("utf-8"))
-        except SerialException as ex:
-            log.error(f"Raspberry Pi could not write on Serial USB connection, Stacktrace {ex}")
+"""
+Callback of the serial reader for heartbeat commands of the Arduino.
+
+:param cmd: received conn command
+"""
+
+
+def on_arduino_conn(cmd):
+    global time_last_command
+
+    if cmd.get_data() == 'arduino':
+        time_last_command = time_ms()
 
 
 """
-Read commands and convert them into a Command object.
+Callback of the serial reader for the protocol acknowledgement of the Arduino.
+The binary protocol is only used after the Arduino confirmed it.
 
-:returns: command that was read
+:param cmd: received proto command
 """
 
 
-def read_command():
-    with th.locks["serial_read_lock"]:
-        try:
-            if serial_ard is not None:
-                line_splits = serial_ard.readline().decode('utf-8').split(':')
-                if len(line_splits) == 2:
-                    return Cmd(line_splits[0].strip(), line_splits[1].strip())
-        except SerialException as ex:
-            log.error(f"Raspberry Pi could not read from Serial USB connection, Stacktrace {ex}")
-            client.pub(Topics.ERROR_CONN, "Raspberry Pi could not read from Serial USB connection.")
-            return None
+def on_arduino_proto(cmd):
+    if cmd.get_data() == Protocol.BINARY:
+        serial_writer.set_protocol(Protocol.BINARY)
+        log.info('Using binary protocol for Arduino commands.')
+
+
+"""
+Callback of the serial reader if the serial connection to the Arduino failed.
+"""
 
 
-def on_message_callback(client, userdata, msg):
-    start_thread(on_message, (client, userdata, msg,))
+def on_serial_error():
+    client.pub(Topics.ERROR_CONN, "Raspberry Pi could not read from Serial USB connection.")
 
 
 """
 Callback method if the subscription receive a message.
 
-:param client:   Client instance
+:param c:        Client instance
 :param userdata: Information about the user
 :param msg:      The message itself with topic and payload inside
 """
 
 
-def on_message(client, userdata, msg):
+def on_message_callback(c, userdata, msg):
+    payload = msg.payload
+
+    # Binary sensor payloads are passed on undecoded
+    if type(payload) is bytes and not SensorCodec.is_binary(payload):
+        payload = payload.decode('utf-8', errors='replace')
+
+    dispatcher.dispatch(msg.topic, payload)
+
+
+"""
+Create the dispatcher and register the handlers for all subscribed topics.
+Sensor topics are handled inline in the MQTT thread, slow handlers are
+offloaded to the worker pool of the dispatcher.
+
+:returns: dispatcher with all routes registered
+"""
+
+
+def create_dispatcher():
+    d = Dispatcher()
+    d.route(Topics.ITEM_ROUTE_ID, on_route_id, offload=True)
+    d.route(Topics.ITEM_CURRENT_ROUTE, on_current_route, offload=True)
+    d.route(Topics.COMMAND_ENGINE, on_command_engine)
+    d.route(Topics.COMMAND_MODE, on_command_mode)
+    d.route(Topics.COMMAND_DRIVE, on_command_drive, offload=True)
+    d.route(Topics.RTK_ROVER_ONLINE, on_rtk_online)
+    d.route(Topics.RTK_ROVER_EVENT, on_rtk_event)
+    d.route(Topics.SENSOR_GPS_ALL, on_sensor_gps)
+    d.route(Topics.SENSOR_HEADING, on_sensor_heading)
+    d.route(Topics.LWT, on_lwt)
+    d.route(Topics.HELLO_REQ, on_hello_req)
+    d.route(Topics.MOCK_ALL, on_mock, offload=True)
+    d.route(Topics.RECORD, on_record, offload=True)
+    return d
+
+
+"""
+Handlers for the messages of the subscribed topics.
+
+:param topic:   The topic the message was received on
+:param payload: The decoded payload of the message
+"""
+
+
+def on_route_id(topic, payload):
+    load_route(payload)
+
+
+def on_current_route(topic, payload):
+    args = payload.split(' ')
+    if args[0] == 'get':
+        if len(driven_route_AUGIS) > 0:
+            # Tolerance of the simplified route in meters can be requested with 'get <tolerance>'
+            try:
+                tolerance = float(args[1]) if len(args) > 1 else CURRENT_ROUTE_TOLERANCE
+            except ValueError:
+                tolerance = CURRENT_ROUTE_TOLERANCE
+            points, seq = driven_route_AUGIS.simplified(tolerance)
+            gj = fh.create_geojson(points)
+            # Deltas continue at this sequence number
+            gj['seq'] = seq
+            client.pub(Topics.ITEM_CURRENT_ROUTE, json.dumps(gj))
+        else:
+            client.pub(Topics.ITEM_CURRENT_ROUTE, 'none')
+    elif args[0] == 'since' and len(args) > 1:
+        try:
+            publish_route_delta(int(args[1]))
+        except ValueError:
+            log.error(f"Invalid sequence number for current route: {payload}")
+
+
+"""
+Publish the points of the driven route since a sequence number.
+
+:param since: sequence number of the first point
+:returns:     sequence number after the last published point
+"""
+
+
+def publish_route_delta(since):
+    points, start, end = driven_route_AUGIS.points(since)
+    if len(points) > 0:
+        client.pub(Topics.ITEM_CURRENT_ROUTE_DELTA, json.dumps({'from': start, 'to': end, 'points': points}))
+    return end
+
+
+"""
+Publish the new points of the driven route in batches.
+"""
+
+
+def route_delta_thread():
+    seq = driven_route_AUGIS.seq
+    while True:
+        time.sleep(CURRENT_ROUTE_INTERVAL)
+        seq = publish_route_delta(seq)
+
+
+def on_command_engine(topic, payload):
+    send_command('engine', payload)
+
+
+def on_command_mode(topic, payload):
+    global stop_drive
+
+    mode = payload.lower()
+
+    if mode == 'auto':
+        send_command('mode', mode)
+    elif mode == 'radio-remote':
+        # Stop the thread running the drive
+        stop_drive = True
+        send_command('mode', mode)
+
+
+def on_command_drive(topic, payload):
     global stop_drive
-    global drive_thread
-    global conn_err
-    global created_route_AUGIS
-    global driven_route_AUGIS
-    global heading
-    global heading_time
-    global lake
     global start_pos
+
+    if payload == 'start':
+        stop_drive = False
+        start_pos = get_best_gps_pos()
+        if start_pos is not None:
+            if Gps.frame is None:
+                Gps.set_origin(start_pos)
+            plan = plan_drive(start_pos)
+            if plan is not None:
+                engine.reset()
+                start_drive(plan)
+        else:
+            client.pub(Topics.ERROR_DRIVE, "No GPS data available")
+            log.error("No GPS data available")
+    elif payload == 'stop':
+        stop_drive = True
+        engine.stop()
+        engine.halt()
+        client.pub(Topics.INFO_STATUS, "Stopped autonomous drive")
+    elif payload == 'return':
+        stop_drive = True
+        engine.stop()
+        time.sleep(5)
+        engine.reset()
+        stop_drive = False
+        plan = plan_drive(get_best_gps_pos(), [start_pos])
+        if plan is not None:
+            start_drive(plan)
+
+
+def on_rtk_online(topic, payload):
+    client.pub(Topics.RTK_ROVER_INTENT, '224CC28A9F')
+
+
+def on_rtk_event(topic, payload):
+    pos = SensorCodec.decode_position(payload)
+    if pos is None:
+        log.error(f"Could not read RTK data: {payload}")
+        return
+    update_gps_pos(Gps.RTK, pos)
+
+
+def on_sensor_gps(topic, payload):
+    t = topic.split('/')[-1]
+    pos = SensorCodec.decode_position(payload)
+    if pos is None or t not in gps_pos:
+        log.error(f"Could not read GPS data on topic: {topic}, Payload: {payload}")
+        return
+    update_gps_pos(t, pos)
+
+
+def on_sensor_heading(topic, payload):
+    global heading
+
+    h = SensorCodec.decode_heading(payload)
+    if h is None:
+        log.error(f"Could not read heading: {payload}")
+        return
+    heading = h
+    timers.rearm(sensor_timers[HEADING], Gps.WAIT)
+    fusion.update_heading(heading)
+    engine.update_heading(heading)
+
+
+def on_lwt(topic, payload):
+    global stop_drive
     global connected_to_base
+    global failsafe_c_timer
+
+    if payload == 'base-station':
+        connected_to_base = False
+        # Failsafe C
+        log.warning('Raspberry Pi lost connection to Base-Station.')
+        log.info('Executing Failsafe C.')
+        stop_drive = True
+        engine.stop()
+        if not th.locks["engine_halt_lock"].locked():
+            dispatcher.submit(engine.halt)
+        send_command('mode', 'radio.remote')
+        timers.cancel(failsafe_c_timer)
+        failsafe_c_timer = timers.schedule(FAIL_C_START_WAIT, failsafe_c_start)
 
-    payload = msg.payload
 
-    if type(payload) is bytes:
-        payload = payload.decode('utf-8')
+def on_hello_req(topic, payload):
+    global connected_to_base
+
+    connected_to_base = True
+    # Base-Station is back, Failsafe C is not needed anymore
+    timers.cancel(failsafe_c_timer)
+    client.pub(Topics.HELLO_RESP, 'raspberry')
 
-    if msg.topic == Topics.ITEM_ROUTE_ID:
-        start_thread(load_route, (payload,))
-    elif msg.topic == Topics.ITEM_CURRENT_ROUTE:
-        if payload == 'get':
-            if len(driven_route_AUGIS) > 0:
-                gj = json.dumps(fh.create_geojson(driven_route_AUGIS))
-                client.pub(Topics.ITEM_CURRENT_ROUTE, gj)
-            else:
-                client.pub(Topics.ITEM_CURRENT_ROUTE, 'none')
-    elif msg.topic == Topics.COMMAND_ENGINE:
-        send_command('engine', payload)
-    elif msg.topic == Topics.COMMAND_MODE:
-        mode = payload.lower()
-
-        if mode == 'auto':
-            send_command('mode', mode)
-        elif mode == 'radio-remote':
-            # Stop the thread running the drive
-            stop_drive = True
-            send_command('mode', mode)
-    elif msg.topic == Topics.COMMAND_DRIVE:
-        if payload == 'start':
-            stop_drive = False
-            start_pos = get_best_gps_pos()
-            if start_pos is not None:
-                engine.reset()
-                drive_thread = start_thread(autonomous_drive, (created_route_AUGIS, lambda: stop_drive,))
-            else:
-                client.pub(Topics.ERROR_DRIVE, "No GPS data available")
-                log.error("No GPS data available")
-        elif payload == 'stop':
-            stop_drive = True
-            engine.stop()
-            start_thread(engine.halt, ())
-            client.pub(Topics.INFO_STATUS, "Stopped autonomous drive")
-        elif payload == 'return':
-            stop_drive = True
-            engine.stop()
-            time.sleep(5)
-            engine.reset()
-            stop_drive = False
-            drive_thread = start_thread(autonomous_drive, ([start_pos], lambda: stop_drive,))
-    elif msg.topic == Topics.RTK_ROVER_ONLINE:
-        client.pub(Topics.RTK_ROVER_INTENT, '224CC28A9F')
-    elif msg.topic == Topics.RTK_ROVER_EVENT:
-        try:
-            data = payload.split(',')
-            gps_pos[Gps.RTK] = [float(data[0]), float(data[1])]
-            gps_times[Gps.RTK] = time.time()
-            pos = get_best_gps_pos()
-            # Only update gps position if location is different
-            if len(driven_route_AUGIS) == 0 or driven_route_AUGIS[-1] != pos:
-                driven_route_AUGIS.append(pos)
-            engine.update_gps_pos(pos)
-        except:
-            print(dt.now(), "Could not read RTK data.")
-    elif msg.topic.startswith(Topics.SENSOR_GPS_ALL[:-1]):
-        t = msg.topic.split('/')[-1]
-        coords = payload.split(',')
-
-        gps_pos[t] = [float(coords[Gps.LAT]), float(coords[Gps.LNG])]
-        gps_times[t] = time.time()
-        pos = get_best_gps_pos()
-        # Only update gps position if location is different
-        if len(driven_route_AUGIS) == 0 or driven_route_AUGIS[-1] != pos:
-            driven_route_AUGIS.append(pos)
-        engine.update_gps_pos(pos)
-    elif msg.topic == Topics.SENSOR_HEADING:
-        heading = float(payload)
-        heading_time = time.time()
-        engine.update_heading(heading)
-    elif msg.topic == Topics.LWT:
-        if payload == 'base-station':
-            connected_to_base = False
-            # Failsafe C
-            log.warning('Raspberry Pi lost connection to Base-Station.')
-            log.info('Executing Failsafe C.')
-            stop_drive = True
-            engine.stop()
-            if not th.locks["engine_halt_lock"].locked():
-                start_thread(engine.halt, ())
-            send_command('mode', 'radio.remote')
-            start_thread(check_movement, (FAIL_C_WAIT,))
-    elif msg.topic == Topics.HELLO_REQ:
-        connected_to_base = True
-        client.pub(Topics.HELLO_RESP, 'raspberry')
-    elif msg.topic.startswith(Topics.MOCK_ALL[:-1]):
-        cmd = msg.topic.split('/')[-1]
-        if cmd == 'done':
-            return
-        start_thread(handle_command, (cmd, msg.payload,))
-    elif msg.topic == Topics.RECORD:
-        if camera is None:
-            return
-        if payload == 'start':
-            camera.start_preview()
-            camera.start_recording(f"/home/pi/Desktop/recordings/water_{int(time.time())}.h264")
-            client.pub(Topics.INFO_STATUS, "Started recording")
-        elif payload == 'stop':
-            camera.stop_recording()
-            camera.stop_preview()
-            client.pub(Topics.INFO_STATUS, "Stopped recording")
+
+def on_mock(topic, payload):
+    cmd = topic.split('/')[-1]
+    if cmd == 'done':
+        return
+    handle_command(cmd, payload)
+
+
+def on_record(topic, payload):
+    if camera is None:
+        return
+    if payload == 'start':
+        camera.start_preview()
+        camera.start_recording(f"/home/pi/Desktop/recordings/water_{int(time.time())}.h264")
+        client.pub(Topics.INFO_STATUS, "Started recording")
+    elif payload == 'stop':
+        camera.stop_recording()
+        camera.stop_preview()
+        client.pub(Topics.INFO_STATUS, "Stopped recording")
+
+
+"""
+Update the position of a GPS source and add the fused position to the driven route.
+
+:param source: GPS source (Gps.RTK, Gps.PHONE, Gps.DRG)
+:param pos:    new position of the source
+"""
+
+
+def update_gps_pos(source, pos):
+    gps_pos[source] = pos
+    timers.rearm(sensor_timers[source], Gps.WAIT)
+    fusion.update_gps(source, pos)
+    update_fused_pos()
+
+
+"""
+Take the heading and the position of the fusion after a GPS update
+and add the position to the driven route.
+"""
+
+
+def update_fused_pos():
+    global heading
+
+    # Without heading sensor the heading is taken from the movement of the AUGIS
+    h = fusion.heading()
+    if h is not None:
+        heading = h
+
+    pos = get_best_gps_pos()
+    # Only points far enough from the last point are stored
+    driven_route_AUGIS.append(pos)
+    engine.update_gps_pos(pos, fusion.speed(heading))
 
 
 """
@@ -328,55 +689,169 @@ def handle_command(cmd, value):
 
 
 """
-Load route from aws api.
+Load route. A cached route is used right away and revalidated with the aws api
+in the background, so a known route can be loaded without connectivity on the lake.
+Routes not in the cache are loaded from the aws api.
+
+:param id: of the route
 """
 
 
 def load_route(id):
+    route_json = route_cache.get_route(id)
+    cached = route_cache.get_lake(route_json['lake']) if route_json is not None else None
+    if cached is not None:
+        set_route(id, route_json, cached[1], 'cache')
+        start_thread(revalidate_route, (id, route_json, cached[0]))
+        return
+
+    try:
+        route_json, _, route_lake = fetch_route(id)
+    except Exception as ex:
+        log.error(f"Could not load route with id: {id}, Stacktrace {ex}")
+        client.pub(Topics.ERROR_DRIVE, f"Could not load route with id: {id}")
+        return
+    set_route(id, route_json, route_lake, 'DB')
+
+
+"""
+Get a route and its lake from the aws api and store them in the cache.
+The lake is only built again if its GeoJSON changed.
+
+:param id:      of the route
+:param lake_id: expected id of the lake to fetch it with the route, None if unknown
+:returns:       JSON of the route and the lake and the Lake
+"""
+
+
+def fetch_route(id, lake_id=None):
+    route_json, lake_json = rh.get_route_and_lake(id, lake_id)
+
+    cached = route_cache.get_lake(route_json['lake'])
+    if cached is not None and RouteCache.content_hash(cached[0]) == RouteCache.content_hash(lake_json):
+        route_lake = cached[1]
+    else:
+        route_lake = Lake(lake_json['json'])
+        route_cache.put_lake(route_json['lake'], lake_json, route_lake)
+    route_cache.put_route(id, route_json)
+    return route_json, lake_json, route_lake
+
+
+"""
+Check a cached route against the aws api. A changed route is loaded
+if it is still the loaded route and no drive is running.
+
+:param id:         of the route
+:param route_json: cached JSON of the route
+:param lake_json:  cached JSON of the lake
+"""
+
+
+def revalidate_route(id, route_json, lake_json):
+    try:
+        new_route_json, new_lake_json, route_lake = fetch_route(id, route_json['lake'])
+    except Exception as ex:
+        log.warning(f"Could not revalidate route with id: {id}, the cached route is used, Stacktrace {ex}")
+        return
+
+    if RouteCache.content_hash(new_route_json) == RouteCache.content_hash(route_json) and \
+            RouteCache.content_hash(new_lake_json) == RouteCache.content_hash(lake_json):
+        return
+
+    if route_id == id and (drive_thread is None or not drive_thread.is_alive()):
+        set_route(id, new_route_json, route_lake, 'DB')
+    else:
+        client.pub(Topics.INFO_STATUS, f"Route with id: {id} changed in the DB, load it again to use it")
+
+
+"""
+Set the route and lake the AUGIS drives on and plan the route.
+
+:param id:         of the route
+:param route_json: JSON of the route
+:param route_lake: Lake the route is on
+:param source:     where the route was loaded from
+"""
+
+
+def set_route(id, route_json, route_lake, source):
     global created_route_AUGIS
+    global planned_route_AUGIS
     global lake
+    global route_id
 
-    route_json = rh.get_route_by_id(id)
+    route_id = id
     created_route_AUGIS = fh.parse_route_geojson(route_json['json'])
-    lake_json = rh.get_lake_by_id(route_json['lake'])
-    lake = Lake(lake_json['json'])
-    client.pub(Topics.INFO_STATUS, f"Got lake from DB with id: {id}")
+    lake = route_lake
+    # Distances and directions on the lake are calculated in its local frame
+    Gps.set_origin(lake.origin)
+    client.pub(Topics.INFO_STATUS, f"Got lake from {source} with id: {id}")
 
+    # Check every leg of the route before the drive starts
+    planned_route_AUGIS = plan_route(lake, created_route_AUGIS)
+    if planned_route_AUGIS is None:
+        log.error(f"Route with id: {id} can not be driven on the lake")
+        client.pub(Topics.ERROR_DRIVE, f"Route with id: {id} can not be driven on the lake")
+    else:
+        client.pub(Topics.INFO_STATUS, f"Planned route with {len(planned_route_AUGIS.waypoints)} waypoints and "
+                                       f"{planned_route_AUGIS.length:.0f} m")
 
-"""
-Function for Failsafe C to check if AUGIS has moved after given time.
 
-:param t: time to wait for AUGIS to move in seconds
+"""
+Failsafe C: take the position after the connection to the Base-Station was lost
+and schedule the check if the AUGIS has moved.
 """
 
 
-def check_movement(t):
-    time.sleep(5)
+def failsafe_c_start():
+    global failsafe_c_timer
+
     s_pos = get_best_gps_pos()
     if s_pos is not None and not connected_to_base:
-        time.sleep(t - 5)
-        e_pos = get_best_gps_pos()
-        if Gps.get_distance(s_pos, e_pos) < FAIL_C_DISTANCE_EPSILON:
-            autonomous_drive([start_pos], lambda: stop_drive)
+        failsafe_c_timer = timers.schedule(FAIL_C_WAIT - FAIL_C_START_WAIT, failsafe_c_check, (s_pos,))
 
 
 """
-Get the best current GPS location from the different devices (RTK, Phone, Dragino).
+Failsafe C: drive back to the start position if the AUGIS has not moved
+since the connection to the Base-Station was lost.
+
+:param s_pos: position after the connection was lost
 """
 
 
-# noinspection PyUnresolvedReferences
-def get_best_gps_pos():
-    global gps_pos
+def failsafe_c_check(s_pos):
+    e_pos = get_best_gps_pos()
+    if e_pos is not None and Gps.get_distance(s_pos, e_pos) < FAIL_C_DISTANCE_EPSILON:
+        # Planning can build the visibility graph, so it runs on the worker pool instead of the timer
+        dispatcher.submit(failsafe_c_return, (e_pos,))
+
+
+"""
+Failsafe C: plan and start the drive back to the start position.
+
+:param e_pos: current position of the AUGIS
+"""
+
+
+def failsafe_c_return(e_pos):
+    plan = plan_drive(e_pos, [start_pos])
+    if plan is not None:
+        start_drive(plan)
 
-    if gps_pos[Gps.RTK] is not None:
-        return gps_pos[Gps.RTK]
-    elif gps_pos[Gps.PHONE] is not None:
-        return gps_pos[Gps.PHONE]
-    elif gps_pos[Gps.DRG] is not None:
-        return gps_pos[Gps.DRG]
 
-    return None
+"""
+Get the best current GPS location. The fixes of all devices (RTK, Phone, Dragino)
+are fused and the position is dead reckoned to the current time.
+
+:returns: position or None if no device has current data
+"""
+
+
+def get_best_gps_pos():
+    if gps_pos[Gps.RTK] is None and gps_pos[Gps.PHONE] is None and gps_pos[Gps.DRG] is None:
+        return None
+
+    return fusion.position()
 
 
 def on_connect_callback(c, userdata, flags, rc):
@@ -399,9 +874,11 @@ def on_connect(c, userdata, flags, rc):
     log.info(f"Successfully connected to MQTT Broker on {ip_addr}:{Config.PORT}")
     client.sub(Topics.ITEM_ROUTE_ID)
     client.sub(Topics.ITEM_CURRENT_ROUTE)
-    client.sub(Topics.RTK_ROVER_EVENT)
-    client.sub(Topics.SENSOR_GPS_ALL)
-    client.sub(Topics.SENSOR_HEADING)
+    # The sensor process subscribes to the sensors itself
+    if not SENSOR_PROCESS:
+        client.sub(Topics.RTK_ROVER_EVENT)
+        client.sub(Topics.SENSOR_GPS_ALL)
+        client.sub(Topics.SENSOR_HEADING)
     client.sub(Topics.COMMAND_DRIVE)
     client.sub(Topics.COMMAND_ENGINE)
     client.sub(Topics.COMMAND_MODE)
@@ -439,49 +916,84 @@ Send ping pong signal to arduino to confirm connection is still up.
 
 
 def conn_arduino():
-    global time_last_command
+    while True:
+        if arduino_heartbeat(serial_reader.failed):
+            reconnect_arduino()
+        time.sleep(HEARTBEAT_INTERVAL / 1000)
+
+
+"""
+Send a heartbeat to the Arduino and report lost and reestablished connections.
+Shared by the threaded and the asyncio entry point.
+
+:param failed: true if the serial port of the Arduino failed
+:returns:      true if the serial port has to be reconnected
+"""
+
+
+def arduino_heartbeat(failed):
     global conn_err
-    global ip_addr
-    global serial_ard
+    global arduino_lost
+    global time_last_reconnect
 
-    fs = False
-    time_last_command = time_ms()
-    time_last_reconnect = time_ms()
+    send_command('conn', 'raspberry-pi')
 
-    while True:
-        send_command('conn', 'raspberry-pi')
+    conn_err = time_ms() - time_last_command > COMMAND_WAIT
+
+    if conn_err and not arduino_lost:
+        log.error('Raspberry Pi lost connection to Arduino.')
+        client.pub(Topics.ERROR_CONN, 'rasp-ard')
+        arduino_lost = True
+    elif not conn_err and arduino_lost:
+        arduino_lost = False
+        log.error("Reestablished connection to Arduino.")
+        client.pub(Topics.INFO_CONN, 'rasp-ard')
 
-        cmd = read_command()
+    # Reconnect without waiting on the dead port, the reader only blocks its own thread
+    if (serial_ard is None or failed or conn_err) and time_ms() - time_last_reconnect > RECONNECT_WAIT:
+        time_last_reconnect = time_ms()
+        return True
+    return False
 
-        if cmd is not None:
-            if cmd.get_prefix() == 'conn' and cmd.get_data() == 'arduino':
-                time_last_command = time_ms()
-        elif time_ms() - time_last_reconnect > RECONNECT_WAIT:
-            serial_ard = connect_serial(Config.SERIAL_PORT_ARD, Config.BAUDRATE)
 
-        conn_err = time_ms() - time_last_command > COMMAND_WAIT
+"""
+Replace the serial connection to the Arduino of the serial writer and reader.
+"""
 
-        if conn_err and not fs:
-            log.error('Raspberry Pi lost connection to Arduino.')
-            client.pub(Topics.ERROR_CONN, 'rasp-ard')
-            fs = True
-        elif not conn_err and fs:
-            fs = False
-            log.error(f"Reestablished connection to Arduino.")
-            client.pub(Topics.INFO_CONN, 'rasp-ard')
 
-        time.sleep(1)
+def reconnect_arduino():
+    global serial_ard
+
+    # The old port is closed first, the reader has left it when it is detached
+    serial_writer.set_serial(None)
+    serial_reader.set_serial(None)
+    close_serial(serial_ard)
+    serial_ard = connect_serial(Config.SERIAL_PORT_ARD, Config.BAUDRATE)
+    serial_writer.set_serial(serial_ard)
+    serial_reader.set_serial(serial_ard)
+    negotiate_protocol()
+
+
+"""
+Ask the Arduino to switch to the configured protocol. The connection stays
+on the text protocol until the Arduino acknowledges the request.
+"""
+
+
+def negotiate_protocol():
+    if SERIAL_PROTOCOL == Protocol.BINARY:
+        send_command('proto', Protocol.BINARY)
 
 
 """
-Returns time in milliseconds since epoch.
+Returns time in milliseconds of a monotonic clock.
 
-:returns: Time in milliseconds since epoch
+:returns: Time in milliseconds
 """
 
 
 def time_ms():
-    return time.time() * 1000
+    return time.monotonic() * 1000
 
 
 """
@@ -495,7 +1007,8 @@ Connect to serial USB port to connect with devices.
 
 def connect_serial(serial_port, baudrate):
     try:
-        s = serial.Serial(serial_port, baudrate=Config.BAUDRATE, writeTimeout=.3, rtscts=False, dsrdtr=False)
+        s = serial.Serial(serial_port, baudrate=Config.BAUDRATE, timeout=SERIAL_TIMEOUT, writeTimeout=.3, rtscts=False,
+                          dsrdtr=False)
         s.flush()
         log.info(f"Successfully Connected to Serial Port: {serial_port}")
         return s
@@ -506,52 +1019,135 @@ def connect_serial(serial_port, baudrate):
 
 
 """
-Check if sensor data is current information and set it to None if not.
+Close a serial connection.
+
+:param s: serial connection, None is ignored
+"""
+
+
+def close_serial(s):
+    if s is None:
+        return
+    try:
+        s.close()
+    except (SerialException, OSError) as ex:
+        log.warning(f"Could not close Serial Port: {s.port}, Stacktrace {ex}")
+
+
+"""
+Create the deadlines of the sensors. A sensor that is not updated within
+Gps.WAIT seconds is considered stale.
+"""
+
+
+def create_sensor_timers():
+    for source in (Gps.RTK, Gps.PHONE, Gps.DRG, HEADING):
+        sensor_timers[source] = timers.schedule(Gps.WAIT, on_sensor_stale, (source,))
+
+
+"""
+Called when a sensor missed its deadline.
+
+:param source: GPS source or HEADING
 """
 
 
-def check_sensor_data():
-    global gps_times
-    global gps_pos
-    global heading_time
+def on_sensor_stale(source):
     global heading
 
-    prev_pos = None
-    prev_heading = None
+    if source == HEADING:
+        heading = None
+        return
+
+    gps_pos[source] = None
+
+    # Failsafe D
+    if get_best_gps_pos() is None:
+        fusion.reset()
+        log.error('No GPS Position data available.')
+        log.info('Executing Failsafe D.')
+        client.pub(Topics.ERROR_SENSOR, 'No GPS Position data available.')
+        engine.stop()
+        if not th.locks["engine_halt_lock"].locked():
+            start_thread(engine.halt, ())
+
+
+"""
+Start the process reading and fusing the sensors.
+
+:param name: name of the shared memory of the SensorState
+:returns:    started process
+"""
+
+
+def start_sensor_process(name):
+    # A forked process would inherit the locks of the running threads
+    ctx = multiprocessing.get_context('spawn')
+    process = ctx.Process(target=sensor_process.run, name='sensors', daemon=True,
+                          args=(name, os.getpid(), SENSOR_PAYLOAD_FORMAT, TELEMETRY_WINDOW, TELEMETRY_LEGACY_TOPICS,))
+    process.start()
+    return process
+
+
+"""
+Take the updates of the sensor process from the shared sensor state. New fixes
+re-arm the sensor deadlines from the time they were received.
+"""
+
+
+def sensor_link_thread():
+    global heading
 
+    seq = None
+    fix_times = {}
+    heading_time = None
     while True:
-        current_time = time.time()
+        time.sleep(SENSOR_POLL_INTERVAL)
+        state = fusion.read()
+        if state is None or state['seq'] == seq:
+            continue
+        seq = state['seq']
+
+        moved = False
+        for source, (t, pos) in state['fixes'].items():
+            if t is not None and t != fix_times.get(source):
+                fix_times[source] = t
+                gps_pos[source] = pos
+                timers.rearm(sensor_timers[source], max(0, Gps.WAIT - (time.monotonic() - t)))
+                moved = True
+
+        if state['heading_time'] is not None and state['heading_time'] != heading_time:
+            heading_time = state['heading_time']
+            heading = state['heading']
+            timers.rearm(sensor_timers[HEADING], max(0, Gps.WAIT - (time.monotonic() - heading_time)))
+            engine.update_heading(heading)
+
+        if moved:
+            update_fused_pos()
 
-        if current_time - gps_times[Gps.RTK] > Gps.WAIT:
-            gps_pos[Gps.RTK] = None
-        if current_time - gps_times[Gps.PHONE] > Gps.WAIT:
-            gps_pos[Gps.PHONE] = None
-        if current_time - gps_times[Gps.DRG] > Gps.WAIT:
-            gps_pos[Gps.DRG] = None
 
-        if current_time - heading_time > Gps.WAIT:
-            heading = None
+"""
+Publish the timing of the control loops since the last call and write it to the telemetry log.
+"""
 
-        pos = get_best_gps_pos()
 
-        # Failsafe D
-        if pos is None:
-            log.error('No GPS Position data available.')
-            log.info('Executing Failsafe D.')
-            client.pub(Topics.ERROR_SENSOR, 'No GPS Position data available.')
-            engine.stop()
-            if not th.locks["engine_halt_lock"].locked():
-                start_thread(engine.halt, ())
-        elif heading is None:
-            if prev_pos is not None:
-                if prev_pos[Gps.LAT] != pos[Gps.LAT] and prev_pos[Gps.LNG] != pos[Gps.LNG]:
-                    heading = Gps.get_direction(prev_pos, pos)
-                else:
-                    heading = prev_heading
-
-        prev_pos = pos
-        prev_heading = heading
-        time.sleep(.5)
+def publish_timing():
+    stats = scheduler.stats(reset=True)
+    if len(stats) == 0:
+        return
+    client.pub(Topics.INFO_TIMING, json.dumps(stats))
+    for name, loop in stats.items():
+        # The binary format has no field for the loop name, so every loop has its own event
+        event = f"timing_{name}"
+        if event not in TelemetryLogger.EVENTS:
+            event = 'timing'
+        engine.log_data(event, loop['jitter_ms']['p95'], loop['latency_ms']['p95'], loop['missed'], name)
+
+
+def timing_thread():
+    while True:
+        time.sleep(TIMING_INTERVAL)
+        publish_timing()
 
 
 def lock_thread():
@@ -574,54 +1170,102 @@ if __name__ == '__main__':
     if ip_addr is None:
         ip_addr = ip.get_ip_address('eth0')
 
-    # Setup MQTT client
-    client = Mqtt()
-    client.connected = False
-    client.on_connect = on_connect_callback
-    client.on_disconnect = on_disconnect
-    client.on_message = on_message_callback
-    client.will_set(Topics.LWT, payload='raspberry')
-
-    client.connect_to_client(Config.DOMAIN, Config.PORT, keepalive=3)
-
-    # Connect to Dragino and Arduino over Serial Ports
-    serial_ard = connect_serial(Config.SERIAL_PORT_ARD, Config.BAUDRATE)
-    serial_drg = connect_serial(Config.SERIAL_PORT_DRG, Config.BAUDRATE)
-
-    # Initialize engine and Pid controller
-    engine = Engine()
-    if serial_ard is not None:
-        engine.set_serial(serial_ard)
-    engine.set_mqtt_client(client)
-    pid = Pid()
-
-    # Start getting GPS information from Dragino
-    if serial_drg is not None:
-        start_thread(Gps.gps_reader, (serial_drg, client,))
-
-    # Thread to keep sensor data current
-    start_thread(check_sensor_data, ())
-    # Start thread for connection check
-    start_thread(conn_arduino, ())
-
-    # Thread to check status of locks
-    # start_thread(lock_thread, ())
-
+    # Setup dispatcher for MQTT messages
+    dispatcher = create_dispatcher()
+
+    # Timer service for sensor deadlines and failsafes
+    timers = Timers()
+    # Fusion of the GPS devices and the heading sensor
+    if SENSOR_PROCESS:
+        fusion = SensorState()
+        sensors = start_sensor_process(fusion.name)
+    else:
+        fusion = GpsFusion()
     try:
-        camera = PiCamera()
-        camera.resolution = (1280, 720)
-        camera.framerate = 24
-    except (PiCameraMMALError, PiCameraError) as err:
-        s_print(err)
-
-    # Create file to log data
-    data_fn = f"/home/pi/Desktop/data/data_{int(time.time())}.txt"
-    engine.set_data_filename(data_fn)
-    f = open(data_fn, 'x')
-    f.close()
-
-    # MQTT loop
-    client.loop_forever()
+        # Routes and lakes loaded before
+        route_cache = RouteCache(ROUTE_CACHE_DIR)
+        # Uploads to the aws api are sent in the background, also after a restart
+        rh.start_uploads(UPLOAD_SPILL_FILE)
+
+        # Setup MQTT client
+        client = Mqtt()
+        client.connected = False
+        client.on_connect = on_connect_callback
+        client.on_disconnect = on_disconnect
+        client.on_message = on_message_callback
+        client.will_set(Topics.LWT, payload='raspberry')
+        # Messages published without connection to the broker are sent after the reconnect
+        client.set_offline_queue(OfflineQueue(MQTT_SPILL_FILE))
+
+        client.connect_to_client(Config.DOMAIN, Config.PORT, keepalive=3)
+
+        # High rate values are published in frames, the Dragino fixes are delivered directly to the dispatcher
+        uplink = TelemetryAggregator(client, TELEMETRY_WINDOW, TELEMETRY_LEGACY_TOPICS, dispatcher.dispatch)
+
+        # Connect to Dragino and Arduino over Serial Ports
+        serial_ard = connect_serial(Config.SERIAL_PORT_ARD, Config.BAUDRATE)
+        serial_drg = None if SENSOR_PROCESS else connect_serial(Config.SERIAL_PORT_DRG, Config.BAUDRATE)
+
+        # Single writer owning the serial connection to the Arduino
+        serial_writer = SerialWriter(serial_ard)
+        # Reader dispatching the commands of the Arduino to its subscribers
+        serial_reader = SerialReader(serial_ard)
+        serial_reader.on_error = on_serial_error
+        serial_reader.subscribe('conn', on_arduino_conn)
+        serial_reader.subscribe('proto', on_arduino_proto)
+        negotiate_protocol()
+
+        # Timing of the control loops
+        scheduler = Scheduler()
+
+        # Initialize engine and Pid controller
+        engine = Engine()
+        engine.set_scheduler(scheduler)
+        engine.set_serial_writer(serial_writer)
+        engine.set_mqtt_client(uplink)
+        pid = Pid()
+
+        # Deadlines to keep sensor data current, created before the first fix can arrive
+        create_sensor_timers()
+
+        # Start getting GPS information from Dragino
+        if serial_drg is not None:
+            start_thread(Gps.gps_reader, (serial_drg, uplink, SENSOR_PAYLOAD_FORMAT,))
+        if SENSOR_PROCESS:
+            start_thread(sensor_link_thread, ())
+        # Start thread for connection check
+        start_thread(conn_arduino, ())
+
+        # Thread to check status of locks
+        # start_thread(lock_thread, ())
 
-    while True:
-        pass
+        try:
+            camera = PiCamera()
+            camera.resolution = (1280, 720)
+            camera.framerate = 24
+        except (PiCameraMMALError, PiCameraError) as err:
+            s_print(err)
+
+        # Create file to log data, written in the background
+        data_ext = 'bin' if TELEMETRY_FORMAT == TelemetryLogger.BINARY else 'txt'
+        data_fn = f"/home/pi/Desktop/data/data_{int(time.time())}.{data_ext}"
+        f = open(data_fn, 'x')
+        f.close()
+        telemetry = TelemetryLogger(data_fn, TELEMETRY_FORMAT)
+        engine.set_logger(telemetry)
+
+        # Thread to publish the timing of the control loops
+        start_thread(timing_thread, ())
+        # Thread to publish new points of the driven route
+        start_thread(route_delta_thread, ())
+
+        # MQTT loop
+        client.loop_forever()
+
+        while True:
+            pass
+    finally:
+        # The shared memory of the sensor state was created by this process, so it is removed here
+        if SENSOR_PROCESS:
+            fusion.close()
+            fusion.unlink()
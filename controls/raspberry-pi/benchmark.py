@@ -0,0 +1,112 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import json
+import math
+import time
+import timeit
+
+import numpy as np
+from gps import Gps
+from lake import Lake
+
+# Number of calls per measurement
+N = 100000
+
+POS = (47.106686667, 7.216857333)
+DEST = (47.106653985807164, 7.216847330313385)
+
+"""
+Reference implementation of the distance calculation with NumPy ufuncs on scalars.
+"""
+
+
+def numpy_distance(p1, p2):
+    d_lat = np.radians(p1[Gps.LAT] - p2[Gps.LAT])
+    d_lon = np.radians(p1[Gps.LNG] - p2[Gps.LNG])
+    a = np.sin(d_lat / 2) * np.sin(d_lat / 2) + np.sin(d_lon / 2) * np.sin(d_lon / 2) * \
+        np.cos(np.radians(p1[Gps.LAT])) * np.cos(np.radians(p2[Gps.LAT]))
+    return Gps.EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+"""
+Print the time per call of a function in microseconds.
+
+:param name: of the measurement
+:param func: function to be measured
+:returns:    time per call in microseconds
+"""
+
+
+def measure(name, func):
+    t = min(timeit.repeat(func, number=N, repeat=3)) / N * 1e6
+    print(f"\t{name:<32}{t:8.3f} us")
+    return t
+
+
+def bench_geodesy():
+    print('Geodesy (distance and direction per call):')
+    Gps.set_origin(None)
+    ref = measure('numpy scalar distance', lambda: numpy_distance(POS, DEST))
+    measure('haversine distance', lambda: Gps.get_distance(POS, DEST))
+    measure('haversine direction', lambda: Gps.get_direction(POS, DEST))
+
+    Gps.set_origin(POS)
+    fast = measure('local frame distance', lambda: Gps.get_distance(POS, DEST))
+    measure('local frame direction', lambda: Gps.get_direction(POS, DEST))
+    print(f"\tSpeedup local frame vs numpy scalar: {ref / fast:.1f}x")
+
+    err = abs(Gps.get_distance(POS, DEST) - Gps.get_distance_haversine(POS, DEST))
+    print(f"\tDifference to haversine: {err * 1000:.3f} mm")
+    Gps.set_origin(None)
+
+
+"""
+Create the GeoJSON of a star shaped synthetic lake.
+
+:param n:      number of vertices of the outline
+:param center: center point of the lake
+:param radius: radius of the lake in degrees
+:returns:      lake GeoJSON string
+"""
+
+
+def synthetic_lake(n, center=POS, radius=.01):
+    def ring(scale):
+        points = []
+        for i in range(n):
+            a = 2 * math.pi * i / n
+            r = radius * scale * (1 + .3 * math.sin(5 * a))
+            points.append([center[Gps.LNG] + r * math.sin(a), center[Gps.LAT] + r * math.cos(a)])
+        points.append(points[0])
+        return points
+
+    features = [{'geometry': {'coordinates': [[ring(s)]]}} for s in (1, .95)]
+    return json.dumps({'features': features})
+
+
+def bench_lake():
+    print('Lake (find_path between two lobes):')
+    for n in (500, 2000, 5000):
+        # Points in two neighbouring lobes of the star
+        a1, a2 = math.pi / 10, math.pi / 10 + 2 * math.pi / 5
+        cp = (POS[Gps.LAT] + .01 * math.cos(a1), POS[Gps.LNG] + .01 * math.sin(a1))
+        np_ = (POS[Gps.LAT] + .01 * math.cos(a2), POS[Gps.LNG] + .01 * math.sin(a2))
+
+        lake = Lake(synthetic_lake(n))
+        start = time.perf_counter()
+        assert lake.find_path(cp, np_) is not None
+        build = (time.perf_counter() - start) * 1000
+
+        path = min(timeit.repeat(lambda: lake.find_path(cp, np_), number=3, repeat=3)) / 3 * 1000
+        pred = min(timeit.repeat(lambda: lake.no_intersection(cp, np_), number=100, repeat=3)) / 100 * 1000
+        print(f"\t{n:>6} vertices: first find_path with graph {build:9.3f} ms, find_path {path:7.3f} ms, "
+              f"no_intersection {pred:6.3f} ms")
+
+
+if __name__ == '__main__':
+    bench_geodesy()
+    bench_lake()
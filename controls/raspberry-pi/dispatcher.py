@@ -0,0 +1,153 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import logging as log
+import queue
+import threading
+import time
+
+
+class Dispatcher:
+    # Number of worker threads for offloaded handlers
+    WORKERS = 4
+    # Maximum number of offloaded messages waiting for a worker
+    QUEUE_SIZE = 64
+
+    def __init__(self, workers=WORKERS, queue_size=QUEUE_SIZE):
+        self.__routes = {}
+        self.__prefixes = []
+        self.__queue = queue.Queue(maxsize=queue_size)
+        self.__workers = []
+        self.__stats_lock = threading.Lock()
+        self.__stats = {}
+        self.__dropped = 0
+        self.__max_depth = 0
+
+        for i in range(workers):
+            worker = threading.Thread(target=self.__work, name=f"dispatcher-{i}")
+            worker.daemon = True
+            worker.start()
+            self.__workers.append(worker)
+
+    """
+    Register a handler for a topic. Topics ending with the MQTT multi level
+    wildcard '#' are matched by prefix.
+
+    :param topic:   Topic or wildcard topic the handler is responsible for
+    :param handler: Function called with topic and decoded payload
+    :param offload: True if the handler is slow and should run on the worker pool
+    """
+
+    def route(self, topic, handler, offload=False):
+        if topic.endswith('#'):
+            self.__prefixes.append((topic[:-1], handler, offload))
+            # Longest prefix has to be checked first
+            self.__prefixes.sort(key=lambda p: len(p[0]), reverse=True)
+        else:
+            self.__routes[topic] = (handler, offload)
+
+    """
+    Dispatch a received message to its handler. Inline handlers are executed
+    in the calling thread, offloaded handlers are queued for the worker pool.
+
+    :param topic:   Topic of the message
+    :param payload: Payload of the message
+    :returns:       True if a handler was found, false otherwise
+    """
+
+    def dispatch(self, topic, payload):
+        entry = self.__lookup(topic)
+        if entry is None:
+            return False
+
+        handler, offload = entry
+        if not offload:
+            self.__run(topic, handler, topic, payload)
+            return True
+
+        try:
+            self.__queue.put_nowait((topic, handler, (topic, payload,)))
+        except queue.Full:
+            with self.__stats_lock:
+                self.__dropped += 1
+            log.error(f"Dispatcher queue is full, dropped message on topic: {topic}")
+            return True
+
+        depth = self.__queue.qsize()
+        if depth > self.__max_depth:
+            self.__max_depth = depth
+        return True
+
+    """
+    Submit a function to the worker pool without going through the routing table.
+
+    :param func: Function to be executed by a worker
+    :param args: Arguments for the function
+    :returns:    True if the function was queued, false if the queue is full
+    """
+
+    def submit(self, func, args=()):
+        try:
+            self.__queue.put_nowait((func.__name__, func, args))
+            return True
+        except queue.Full:
+            with self.__stats_lock:
+                self.__dropped += 1
+            log.error(f"Dispatcher queue is full, dropped call to: {func.__name__}")
+            return False
+
+    """
+    Get the counters of the dispatcher.
+
+    :returns: queue depth, dropped messages and handler latency per topic in milliseconds
+    """
+
+    def stats(self):
+        with self.__stats_lock:
+            handlers = {
+                key: {
+                    'count': s[0],
+                    'avg_ms': s[1] / s[0] * 1000 if s[0] > 0 else 0,
+                    'max_ms': s[2] * 1000
+                } for key, s in self.__stats.items()
+            }
+            return {
+                'queue_depth': self.__queue.qsize(),
+                'max_queue_depth': self.__max_depth,
+                'dropped': self.__dropped,
+                'handlers': handlers
+            }
+
+    def __lookup(self, topic):
+        entry = self.__routes.get(topic)
+        if entry is not None:
+            return entry
+
+        for prefix, handler, offload in self.__prefixes:
+            if topic.startswith(prefix):
+                return handler, offload
+
+        return None
+
+    def __work(self):
+        while True:
+            key, func, args = self.__queue.get()
+            self.__run(key, func, *args)
+            self.__queue.task_done()
+
+    def __run(self, key, func, *args):
+        start = time.perf_counter()
+        try:
+            func(*args)
+        except Exception as ex:
+            log.exception(f"Handler for {key} failed, Stacktrace {ex}")
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.__stats_lock:
+                s = self.__stats.setdefault(key, [0, 0.0, 0.0])
+                s[0] += 1
+                s[1] += elapsed
+                s[2] = max(s[2], elapsed)
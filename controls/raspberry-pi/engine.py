@@ -4,14 +4,11 @@ Created: 18.03.2021
 Last Modified: 13.06.2021
 """
 
-import logging as log
 import time
-from datetime import datetime as dt
-
-from serial.serialutil import SerialException
 
 import thread_handler as th
 from gps import Gps
+from scheduler import Scheduler
 from topics import Topics
 
 
@@ -27,9 +24,11 @@ class Engine:
 
     BWD_PW_ADJ = 3
     ANGLE_PW_ADJ = 8
+    # Throttle difference between the engines per degree of turn angle when following a path
+    STEER_GAIN = .5
 
     def __init__(self):
-        self.serial = None
+        self.writer = None
         self.mqttClient = None
         self.gps_pos = [47, 7.3]
         self.heading = 0
@@ -38,14 +37,18 @@ class Engine:
         self.speed = 0
         self.__stop = False
         self.__time = time.time()
-        self.__data_fn = ''
+        self.__logger = None
         self.__target = None
+        self.__scheduler = Scheduler()
+
+    def set_serial_writer(self, w):
+        self.writer = w
 
-    def set_serial(self, s):
-        self.serial = s
+    def set_scheduler(self, scheduler):
+        self.__scheduler = scheduler
 
-    def set_data_filename(self, fn):
-        self.__data_fn = fn
+    def set_logger(self, logger):
+        self.__logger = logger
 
     def set_target(self, target):
         self.__target = target
@@ -54,23 +57,28 @@ class Engine:
         self.mqttClient = c
 
     """
-    Update GPS position and calculate speed with current and previous GPS position.
+    Update GPS position and speed. Without a speed estimate the speed is
+    calculated with current and previous GPS position.
     
-    :param pos: new GPS position
+    :param pos:   new GPS position
+    :param speed: estimated speed in m/s, negative when driving backwards
     """
 
-    def update_gps_pos(self, pos):
+    def update_gps_pos(self, pos, speed=None):
         with th.locks["engine_update_lock"]:
             temp = time.time()
-            # Calculate speed of the AUGIS
-            t = temp - self.__time
-            s = Gps.get_distance(self.gps_pos, pos)
-            self.speed = s / t
+            if speed is not None:
+                self.speed = speed
+            else:
+                # Calculate speed of the AUGIS
+                t = temp - self.__time
+                s = Gps.get_distance(self.gps_pos, pos)
+                self.speed = s / t
+                # Negate speed if the AUGIS is driving backwards
+                if Gps.angle_difference(Gps.get_direction(self.gps_pos, pos), self.heading) > 180:
+                    self.speed *= -1
             # Update time to current time
             self.__time = temp
-            # Negate speed if the AUGIS is driving backwards
-            if Gps.angle_difference(Gps.get_direction(self.gps_pos, pos), self.heading) > 180:
-                self.speed *= -1
             self.gps_pos = pos
 
             if self.mqttClient is not None:
@@ -107,7 +115,7 @@ class Engine:
 
         self.eng_l = round(eng_l)
         self.eng_r = round(eng_r)
-        self.send_command('engine', f"{self.eng_l},{self.eng_r}")
+        self.send_command('engine', (self.eng_l, self.eng_r))
 
     """
     This function updates the engine throttle to turn the AUGIS
@@ -124,6 +132,7 @@ class Engine:
             return
 
         time_epsilon = 0
+        rate = self.__scheduler.rate('turn_to_on_spot', Engine.TIME_BETWEEN_UPDATES)
         # Turn towards new heading until it is stable
         while time_epsilon < Engine.TURN_TIME_EPSILON and not self.__stop:
             # Calculate the power percentage for each engine
@@ -138,8 +147,8 @@ class Engine:
             self.__update_engines(left, right)
             # Log data into file
             self.log_data('turn_to_on_spot', heading, angle, Engine.TURN_TIME_EPSILON - time_epsilon)
-            # Delay to not repeat the steps to often
-            time.sleep(Engine.TIME_BETWEEN_UPDATES)
+            # Wait for the next step of the loop
+            rate.sleep()
             # Recalculate the turn angle
             angle = self.__turn_angle(heading)
             # Count the time the new heading is in the acceptable limits
@@ -166,6 +175,7 @@ class Engine:
             return
         # Save engine values before turn
         engine_values = [self.eng_l, self.eng_r]
+        rate = self.__scheduler.rate('turn_to', Engine.TIME_BETWEEN_UPDATES)
         # Turn towards new heading until heading is reached
         while abs(angle) > Engine.TURN_TO_ANGLE_EPSILON and not self.__stop:
             # Calculate the percentage which the turn engine should slow down
@@ -177,8 +187,8 @@ class Engine:
                 self.__update_engines(self.eng_l - temp, self.eng_r)
             # Log data into file
             self.log_data('turn_to', heading, angle)
-            # Delay to not repeat the steps to often
-            time.sleep(Engine.TIME_BETWEEN_UPDATES)
+            # Wait for the next step of the loop
+            rate.sleep()
             # Recalculate the turn angle
             angle = self.__turn_angle(heading)
             self.eng_l = engine_values[0]
@@ -207,6 +217,23 @@ class Engine:
         else:
             self.turn_to(heading)
 
+    """
+    Steer towards the given heading while driving without stopping. The throttle
+    difference between the engines is proportional to the turn angle, so one
+    update per control cycle is enough and the call never blocks.
+
+    :param heading:  to steer to
+    :param throttle: mean throttle of both engines
+    :param data:     additional values to be logged
+    """
+
+    def steer(self, heading, throttle, *data):
+        angle = self.__turn_angle(heading)
+        diff = angle * Engine.STEER_GAIN
+        # Positive angle turns clockwise by slowing down the right engine
+        self.__update_engines(throttle + diff / 2, throttle - diff / 2)
+        self.log_data('follow_path', heading, angle, *data)
+
     """
     Determine the direction which is shortest to turn to the new heading and the
     corresponding angle difference.
@@ -246,6 +273,7 @@ class Engine:
             time.sleep(.5)
 
             time_epsilon = 0
+            rate = self.__scheduler.rate('halt', Engine.TIME_BETWEEN_UPDATES)
             # Slow down until speed is stable below speed epsilon
             while time_epsilon < Engine.HALT_TIME_EPSILON and not self.__stop:
                 # Calculate engine throttle proportional to speed (0.02 is equivalent to max speed of 2m/s)
@@ -255,8 +283,8 @@ class Engine:
                 self.__update_engines(temp, temp)
                 # Log data into file
                 self.log_data('halt', Engine.HALT_TIME_EPSILON - time_epsilon)
-                # Delay to not repeat the steps to often
-                time.sleep(Engine.TIME_BETWEEN_UPDATES)
+                # Wait for the next step of the loop
+                rate.sleep()
                 # Count the time the speed is in the acceptable limits
                 if self.speed <= Engine.HALT_SPEED_EPSILON:
                     time_epsilon += Engine.TIME_BETWEEN_UPDATES
@@ -274,20 +302,16 @@ class Engine:
     """
 
     def send_command(self, prefix, value):
-        if th.locks["serial_lock"].locked():
-            return
-        with th.locks["serial_lock"]:
-            try:
-                if self.serial is not None:
-                    self.serial.write(f"{prefix}: {value}\n".encode("utf-8"))
-            except SerialException as ex:
-                log.error(f"Raspberry Pi could not read from Serial USB connection, Stacktrace {ex}")
-                # client.pub(Topics.ERROR_CONN, "Raspberry Pi could not write on Serial USB connection.")
+        if self.writer is not None:
+            self.writer.send(prefix, value)
+
+    """
+    Queue a record with the current state of the AUGIS for the telemetry logger.
+
+    :param data: additional values describing the current action
+    """
 
     def log_data(self, *data):
-        with open(self.__data_fn, 'a') as file:
-            temp = f"{dt.now()} {self.gps_pos} {self.heading} {self.speed} {self.__target} {self.eng_l} {self.eng_r} "
-            for arg in data:
-                temp += f"{arg} "
-            temp += '\n'
-            file.write(temp)
+        if self.__logger is not None:
+            self.__logger.log((time.monotonic(), self.gps_pos, self.heading, self.speed, self.__target, self.eng_l,
+                               self.eng_r) + data)
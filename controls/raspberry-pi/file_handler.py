@@ -1,15 +1,14 @@
 """
 Authors: Manuel Gasser, Julian Haldimann
 Created: 16.03.2021
-Last Modified: 01.05.2021
+Last Modified: 18.10.2026
 """
 
 import json
 
-import requests
 from shapely.geometry.polygon import Polygon
 
-from config import Config
+import request_handler as rh
 
 """
 Read GeoJson File from a route and map it into a list of coordinates.
@@ -40,12 +39,12 @@ def parse_lake_geojson(payload):
     exterior = [(p[1], p[0]) for p in gj['features'][0]['geometry']['coordinates'][0][0]]
     interior = [(p[1], p[0]) for p in gj['features'][1]['geometry']['coordinates'][0][0]]
 
+    # All features after the exterior and interior polygon are obstacles
     obstacles = []
-    """for i in range(2, len(gj['features'])):
-        print(i)
+    for i in range(2, len(gj['features'])):
         poly = [(p[1], p[0]) for p in gj['features'][i]['geometry']['coordinates'][0][0]]
         obstacles.append(Polygon(poly))
-    """
+
     exterior = Polygon(exterior)
     interior = Polygon(interior)
     return exterior, interior, obstacles
@@ -53,7 +52,7 @@ def parse_lake_geojson(payload):
 
 """
 Convert points into geojson format and send it to the api to save 
-it on the server.
+it on the server. The route is uploaded in the background.
 
 :param name: of the route
 :param description: of the route
@@ -74,9 +73,7 @@ def save_geojson(name, description, points):
         "data": json.dumps(data)
     }
 
-    headers = {"Content-Type": "application/json"}
-
-    requests.post(url=f"{Config.HOST}/api/save-route", headers=headers, data=json.dumps(json_data))
+    rh.get_uploads().put('/api/save-route', json_data)
 
 
 """
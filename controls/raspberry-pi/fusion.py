@@ -0,0 +1,232 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import math
+import threading
+import time
+
+from gps import Gps, LocalFrame
+
+
+class GpsFusion:
+    # Standard deviation of the position of each source in meters
+    NOISE = {
+        Gps.RTK: .05,
+        Gps.PHONE: 3,
+        Gps.DRG: 5
+    }
+    # Time from taking a fix to receiving it in seconds
+    LATENCY = {
+        Gps.RTK: .1,
+        Gps.PHONE: .5,
+        Gps.DRG: .3
+    }
+    # Standard deviation of the acceleration of the AUGIS in m/s^2
+    ACCEL_NOISE = .5
+    # Standard deviation of the speed after the first fix in m/s
+    INIT_SPEED_NOISE = 2
+    # Minimum speed for the heading to be taken from the course over ground in m/s
+    COURSE_SPEED = .3
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.updates = {source: 0 for source in GpsFusion.NOISE}
+        self.__heading = None
+        self.__heading_time = None
+        self.reset()
+
+    """
+    Forget the position estimate, the next fix starts a new one.
+    """
+
+    def reset(self):
+        with self.__lock:
+            self.__frame = None
+            self.__time = None
+            # State of each axis (east, north): position, speed and covariance (pp, pv, vv)
+            self.__e = [0, 0, 0, 0, 0]
+            self.__n = [0, 0, 0, 0, 0]
+
+    """
+    Add a GPS fix of a source.
+
+    :param source: GPS source (Gps.RTK, Gps.PHONE, Gps.DRG)
+    :param pos:    position of the fix
+    :param t:      monotonic time the fix was received, now if None
+    """
+
+    def update_gps(self, source, pos, t=None):
+        t = time.monotonic() if t is None else t
+        r = GpsFusion.NOISE[source] ** 2
+
+        with self.__lock:
+            self.updates[source] += 1
+            if self.__frame is None or not self.__frame.covers(pos):
+                self.__frame = LocalFrame(pos)
+                self.__time = t
+                self.__e = [0, 0, r, 0, GpsFusion.INIT_SPEED_NOISE ** 2]
+                self.__n = [0, 0, r, 0, GpsFusion.INIT_SPEED_NOISE ** 2]
+                return
+
+            e, n = self.__frame.to_local(pos)
+            dt = max(0, t - self.__time)
+            self.__time = max(t, self.__time)
+            latency = GpsFusion.LATENCY[source]
+            for axis, z in ((self.__e, e), (self.__n, n)):
+                GpsFusion.__predict(axis, dt)
+                # The fix is old, move it forward by the distance driven since it was taken
+                GpsFusion.__correct(axis, z + axis[1] * latency, r)
+
+    """
+    Add a measurement of the heading sensor.
+
+    :param heading: heading in degrees
+    :param t:       monotonic time the heading was received, now if None
+    """
+
+    def update_heading(self, heading, t=None):
+        with self.__lock:
+            self.__heading = heading
+            self.__heading_time = time.monotonic() if t is None else t
+
+    """
+    Get the estimated position. Between fixes the position is dead reckoned
+    with the estimated velocity.
+
+    :param t: monotonic time of the estimate, now if None
+    :returns: position (lat, lng) or None if there is no estimate
+    """
+
+    def position(self, t=None):
+        t = time.monotonic() if t is None else t
+        with self.__lock:
+            if self.__frame is None:
+                return None
+            dt = max(0, t - self.__time)
+            return self.__frame.to_gps(self.__e[0] + self.__e[1] * dt, self.__n[0] + self.__n[1] * dt)
+
+    """
+    Get the estimated velocity.
+
+    :returns: east and north speed in m/s
+    """
+
+    def velocity(self):
+        with self.__lock:
+            return self.__e[1], self.__n[1]
+
+    """
+    Get the direction the AUGIS is moving to.
+
+    :returns: course over ground in degrees (0-360) or None if the AUGIS is too slow
+    """
+
+    def course(self):
+        return GpsFusion.course_of(*self.velocity())
+
+    """
+    Get the heading of the AUGIS. The heading sensor is used as long as it is
+    current, otherwise the course over ground.
+
+    :returns: heading in degrees (0-360) or None if it is unknown
+    """
+
+    def heading(self):
+        with self.__lock:
+            if self.__heading_time is not None and time.monotonic() - self.__heading_time <= Gps.WAIT:
+                return self.__heading
+        return self.course()
+
+    """
+    Get the estimated speed, negative if the AUGIS is driving backwards.
+
+    :param heading: heading of the AUGIS in degrees, None if unknown
+    :returns:       speed in m/s
+    """
+
+    def speed(self, heading=None):
+        return GpsFusion.speed_of(*self.velocity(), heading)
+
+    """
+    Get the counters and uncertainty of the estimate.
+
+    :returns: fixes by source and standard deviation of position and speed
+    """
+
+    def stats(self):
+        with self.__lock:
+            return {
+                'updates': dict(self.updates),
+                'pos_std': math.sqrt(self.__e[2] + self.__n[2]),
+                'speed_std': math.sqrt(self.__e[4] + self.__n[4])
+            }
+
+    """
+    Calculate the course over ground of a velocity.
+
+    :param ve: east speed in m/s
+    :param vn: north speed in m/s
+    :returns:  course in degrees (0-360) or None if the speed is too low
+    """
+
+    @staticmethod
+    def course_of(ve, vn):
+        if math.hypot(ve, vn) < GpsFusion.COURSE_SPEED:
+            return None
+        return math.degrees(math.atan2(ve, vn)) % 360
+
+    """
+    Calculate the speed of a velocity, negative if it points backwards from the heading.
+
+    :param ve:      east speed in m/s
+    :param vn:      north speed in m/s
+    :param heading: heading of the AUGIS in degrees, None if unknown
+    :returns:       speed in m/s
+    """
+
+    @staticmethod
+    def speed_of(ve, vn, heading=None):
+        speed = math.hypot(ve, vn)
+        if heading is not None and speed >= GpsFusion.COURSE_SPEED:
+            if abs(Gps.angle_difference(math.degrees(math.atan2(ve, vn)) % 360, heading)) > 90:
+                speed *= -1
+        return speed
+
+    """
+    Predict the state of an axis with a constant velocity model.
+
+    :param axis: position, speed and covariance (pp, pv, vv) of the axis
+    :param dt:   time since the last update in seconds
+    """
+
+    @staticmethod
+    def __predict(axis, dt):
+        p, v, pp, pv, vv = axis
+        q = GpsFusion.ACCEL_NOISE ** 2
+        axis[0] = p + v * dt
+        axis[2] = pp + 2 * dt * pv + dt * dt * vv + q * dt ** 4 / 4
+        axis[3] = pv + dt * vv + q * dt ** 3 / 2
+        axis[4] = vv + q * dt * dt
+
+    """
+    Correct the state of an axis with a measured position.
+
+    :param axis: position, speed and covariance (pp, pv, vv) of the axis
+    :param z:    measured position in meters
+    :param r:    variance of the measurement
+    """
+
+    @staticmethod
+    def __correct(axis, z, r):
+        p, v, pp, pv, vv = axis
+        s = pp + r
+        kp, kv = pp / s, pv / s
+        y = z - p
+        axis[0] = p + kp * y
+        axis[1] = v + kv * y
+        axis[2] = (1 - kp) * pp
+        axis[3] = (1 - kp) * pv
+        axis[4] = vv - kv * pv
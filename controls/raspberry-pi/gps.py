@@ -1,16 +1,17 @@
 """
 Authors: Manuel Gasser, Julian Haldimann
 Created: 02.03.2021
-Last Modified: 24.03.2021
+Last Modified: 18.10.2026
 """
 
 import logging as log
 import math
 import re
 
-from numpy import arctan2, sin, cos, degrees, sqrt
+import numpy as np
 from serial.serialutil import SerialException
 
+from sensor_codec import SensorCodec
 from topics import Topics
 
 
@@ -24,6 +25,12 @@ class Gps:
 
     WAIT = 3
 
+    # Earth radius in m
+    EARTH_RADIUS = 6371000
+
+    # Local east/north frame for fast calculations, None if not set
+    frame = None
+
     """
     Convert the degree coordinates to the decimal format
 
@@ -60,6 +67,17 @@ class Gps:
             'altitude': fields[9]
         }
 
+    """
+    Set the origin of the local east/north frame used by get_distance and
+    get_direction for points close to it.
+
+    :param pos: origin of the frame, None to always use the haversine formula
+    """
+
+    @staticmethod
+    def set_origin(pos):
+        Gps.frame = LocalFrame(pos) if pos is not None else None
+
     """
     Calculate the direction from two given points.
     
@@ -70,16 +88,12 @@ class Gps:
 
     @staticmethod
     def get_direction(pos, dest):
-        d_lon = Gps.degrees_to_radians(dest[Gps.LNG] - pos[Gps.LNG])
-        lat_dest = Gps.degrees_to_radians(dest[Gps.LAT])
-        lat_pos = Gps.degrees_to_radians(pos[Gps.LAT])
-
-        x = cos(lat_dest) * sin(d_lon)
-        y = cos(lat_pos) * sin(lat_dest) - sin(lat_pos) * cos(lat_dest) * cos(d_lon)
-
-        bearing = arctan2(x, y)
-
-        return (degrees(bearing) + 360) % 360
+        frame = Gps.frame
+        if frame is not None:
+            direction = frame.get_direction(pos, dest)
+            if direction is not None:
+                return direction
+        return Gps.get_direction_haversine(pos, dest)
 
     """
     Calculate the distance between two gps points.
@@ -91,18 +105,56 @@ class Gps:
 
     @staticmethod
     def get_distance(p1, p2):
-        # Earth radius in km
-        radius = 6371
-        d_lat = Gps.degrees_to_radians(p1[Gps.LAT] - p2[Gps.LAT])
-        d_lon = Gps.degrees_to_radians(p1[Gps.LNG] - p2[Gps.LNG])
+        frame = Gps.frame
+        if frame is not None:
+            distance = frame.get_distance(p1, p2)
+            if distance is not None:
+                return distance
+        return Gps.get_distance_haversine(p1, p2)
 
-        lat_p1 = Gps.degrees_to_radians(p1[Gps.LAT])
-        las_p2 = Gps.degrees_to_radians(p2[Gps.LAT])
+    """
+    Calculate the direction from two given points on the sphere.
 
-        a = sin(d_lat / 2) * sin(d_lat / 2) + sin(d_lon / 2) * sin(d_lon / 2) * cos(lat_p1) * cos(las_p2)
+    :param pos:     The start point
+    :param dest:    The destination point
+    :returns:       The direction in degrees (0-360)
+    """
+
+    @staticmethod
+    def get_direction_haversine(pos, dest):
+        d_lon = math.radians(dest[Gps.LNG] - pos[Gps.LNG])
+        lat_dest = math.radians(dest[Gps.LAT])
+        lat_pos = math.radians(pos[Gps.LAT])
+
+        x = math.cos(lat_dest) * math.sin(d_lon)
+        y = math.cos(lat_pos) * math.sin(lat_dest) - math.sin(lat_pos) * math.cos(lat_dest) * math.cos(d_lon)
 
-        c = 2 * arctan2(sqrt(a), sqrt(1 - a))
-        return radius * c * 1000
+        bearing = math.atan2(x, y)
+
+        return (math.degrees(bearing) + 360) % 360
+
+    """
+    Calculate the distance between two gps points on the sphere with the haversine formula.
+
+    :param p1: first point
+    :param p2: second point
+    :returns: distance between points in meters
+    """
+
+    @staticmethod
+    def get_distance_haversine(p1, p2):
+        d_lat = math.radians(p1[Gps.LAT] - p2[Gps.LAT])
+        d_lon = math.radians(p1[Gps.LNG] - p2[Gps.LNG])
+
+        lat_p1 = math.radians(p1[Gps.LAT])
+        lat_p2 = math.radians(p2[Gps.LAT])
+
+        a = math.sin(d_lat / 2) ** 2 + math.sin(d_lon / 2) ** 2 * math.cos(lat_p1) * math.cos(lat_p2)
+        # Rounding can push a slightly above 1 for antipodal points
+        a = min(a, 1.0)
+
+        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        return Gps.EARTH_RADIUS * c
 
     """
     Calculate the absolute difference between two angles in a circle.
@@ -116,6 +168,96 @@ class Gps:
     def angle_difference(a1, a2):
         return ((a2 - a1 + 540) % 360) - 180
 
+    """
+    Calculate the distances between two arrays of gps points.
+
+    :param p1: N×2 array of first points (lat, lng)
+    :param p2: N×2 array of second points or a single point
+    :returns:  array of distances between the points in meters
+    """
+
+    @staticmethod
+    def get_distances(p1, p2):
+        p1 = np.radians(np.asarray(p1, dtype=float))
+        p2 = np.radians(np.asarray(p2, dtype=float))
+        lat1, lng1 = p1[..., Gps.LAT], p1[..., Gps.LNG]
+        lat2, lng2 = p2[..., Gps.LAT], p2[..., Gps.LNG]
+
+        a = np.sin((lat1 - lat2) / 2) ** 2 + np.sin((lng1 - lng2) / 2) ** 2 * np.cos(lat1) * np.cos(lat2)
+        # Same rounding guard as in get_distance
+        a = np.clip(a, 0.0, 1.0)
+
+        return Gps.EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    """
+    Calculate the directions between two arrays of gps points.
+
+    :param pos:  N×2 array of start points (lat, lng)
+    :param dest: N×2 array of destination points or a single point
+    :returns:    array of directions in degrees (0-360)
+    """
+
+    @staticmethod
+    def get_directions(pos, dest):
+        pos = np.radians(np.asarray(pos, dtype=float))
+        dest = np.radians(np.asarray(dest, dtype=float))
+        lat_pos, lat_dest = pos[..., Gps.LAT], dest[..., Gps.LAT]
+        d_lng = dest[..., Gps.LNG] - pos[..., Gps.LNG]
+
+        x = np.cos(lat_dest) * np.sin(d_lng)
+        y = np.cos(lat_pos) * np.sin(lat_dest) - np.sin(lat_pos) * np.cos(lat_dest) * np.cos(d_lng)
+
+        return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+    """
+    Calculate the differences between two arrays of angles.
+
+    :param a1: array of first angles
+    :param a2: array of second angles or a single angle
+    :returns:  array of differences between -180 and 180
+    """
+
+    @staticmethod
+    def angle_differences(a1, a2):
+        return ((np.asarray(a2, dtype=float) - np.asarray(a1, dtype=float) + 540) % 360) - 180
+
+    """
+    Calculate the distances between all pairs of two arrays of gps points.
+
+    :param p1: N×2 array of points (lat, lng)
+    :param p2: M×2 array of points
+    :returns:  N×M array of distances in meters
+    """
+
+    @staticmethod
+    def get_pairwise_distances(p1, p2):
+        p1 = np.asarray(p1, dtype=float)
+        p2 = np.asarray(p2, dtype=float)
+        return Gps.get_distances(p1[:, np.newaxis, :], p2[np.newaxis, :, :])
+
+    """
+    Calculate the lengths of the segments between consecutive points of a track.
+
+    :param track: N×2 array of points (lat, lng)
+    :returns:     array of N-1 segment lengths in meters
+    """
+
+    @staticmethod
+    def get_segment_distances(track):
+        track = np.asarray(track, dtype=float)
+        return Gps.get_distances(track[:-1], track[1:])
+
+    """
+    Calculate the length of a track.
+
+    :param track: N×2 array of points (lat, lng)
+    :returns:     length of the track in meters
+    """
+
+    @staticmethod
+    def get_track_length(track):
+        return float(np.sum(Gps.get_segment_distances(track)))
+
     """
     Convert degrees to radians.
     
@@ -144,20 +286,115 @@ class Gps:
     
     :param device:      The device from which the GPS data is read
     :param mqtt_client: The mqtt client to publish the GPS data onto
+    :param fmt:         Encoding of the published position (SensorCodec.TEXT or SensorCodec.BINARY)
     """
 
     @staticmethod
-    def gps_reader(serial, mqtt_client):
+    def gps_reader(serial, mqtt_client, fmt=SensorCodec.TEXT):
         while True:
-            line = None
             try:
                 # Read GPS data from dragino hat on serial port
-                line = serial.readline().decode('utf-8')
-                # Only evaluate GPGGA data
-                if line.startswith('$GPGGA'):
-                    gps_data = Gps.convert_gpgga_to_json(line)
-                    mqtt_client.pub(Topics.SENSOR_GPS_DRG, f"{gps_data['latitude']},{gps_data['longitude']}")
+                Gps.publish_line(serial.readline(), mqtt_client, fmt)
             except SerialException as ex:
                 log.exception(f"Could not read on Serial Port: {serial.port}, Stacktrace {ex}")
-            except ValueError as err:
-                log.error(f"Could not convert GPGGA to JSON from string: {line}, Stacktrace {err}")
+
+    """
+    Publish the position of a line read from the GPS device. Only GPGGA data is evaluated.
+
+    :param line:        The line read from the device
+    :param mqtt_client: The mqtt client to publish the GPS data onto
+    :param fmt:         Encoding of the published position (SensorCodec.TEXT or SensorCodec.BINARY)
+    """
+
+    @staticmethod
+    def publish_line(line, mqtt_client, fmt=SensorCodec.TEXT):
+        try:
+            line = line.decode('utf-8')
+            # Only evaluate GPGGA data
+            if line.startswith('$GPGGA'):
+                gps_data = Gps.convert_gpgga_to_json(line)
+                mqtt_client.pub(Topics.SENSOR_GPS_DRG,
+                                SensorCodec.encode_position((gps_data['latitude'], gps_data['longitude']), fmt))
+        except ValueError as err:
+            log.error(f"Could not convert GPGGA to JSON from string: {line}, Stacktrace {err}")
+
+
+class LocalFrame:
+    # Maximum distance from the origin in meters for the planar approximation
+    MAX_RADIUS = 20000
+
+    def __init__(self, origin):
+        self.origin = (origin[Gps.LAT], origin[Gps.LNG])
+        # Meters per degree of latitude and longitude at the origin
+        self.m_lat = math.radians(1) * Gps.EARTH_RADIUS
+        self.m_lng = self.m_lat * math.cos(math.radians(origin[Gps.LAT]))
+        # Bounding box in which the planar approximation is used
+        self.__lat_min = origin[Gps.LAT] - LocalFrame.MAX_RADIUS / self.m_lat
+        self.__lat_max = origin[Gps.LAT] + LocalFrame.MAX_RADIUS / self.m_lat
+        self.__lng_min = origin[Gps.LNG] - LocalFrame.MAX_RADIUS / self.m_lng
+        self.__lng_max = origin[Gps.LNG] + LocalFrame.MAX_RADIUS / self.m_lng
+
+    """
+    Check if a point is close enough to the origin for the planar approximation.
+
+    :param p: point to check
+    :returns: true if the point is covered by the frame
+    """
+
+    def covers(self, p):
+        return self.__lat_min < p[0] < self.__lat_max and self.__lng_min < p[1] < self.__lng_max
+
+    """
+    Project a point into the local frame.
+
+    :param p: point (lat, lng)
+    :returns: east and north offset from the origin in meters
+    """
+
+    def to_local(self, p):
+        return (p[Gps.LNG] - self.origin[Gps.LNG]) * self.m_lng, (p[Gps.LAT] - self.origin[Gps.LAT]) * self.m_lat
+
+    """
+    Convert a point of the local frame back to a gps point.
+
+    :param e: east offset from the origin in meters
+    :param n: north offset from the origin in meters
+    :returns: point (lat, lng)
+    """
+
+    def to_gps(self, e, n):
+        return self.origin[Gps.LAT] + n / self.m_lat, self.origin[Gps.LNG] + e / self.m_lng
+
+    """
+    Calculate the distance between two points in the local frame.
+    Returns None if a point is not covered by the frame.
+
+    :param p1: first point
+    :param p2: second point
+    :returns:  distance between points in meters or None
+    """
+
+    def get_distance(self, p1, p2):
+        lat1, lng1 = p1[0], p1[1]
+        lat2, lng2 = p2[0], p2[1]
+        if not (self.__lat_min < lat1 < self.__lat_max and self.__lat_min < lat2 < self.__lat_max and
+                self.__lng_min < lng1 < self.__lng_max and self.__lng_min < lng2 < self.__lng_max):
+            return None
+        return math.hypot((lng2 - lng1) * self.m_lng, (lat2 - lat1) * self.m_lat)
+
+    """
+    Calculate the direction between two points in the local frame.
+    Returns None if a point is not covered by the frame.
+
+    :param pos:  The start point
+    :param dest: The destination point
+    :returns:    The direction in degrees (0-360) or None
+    """
+
+    def get_direction(self, pos, dest):
+        lat1, lng1 = pos[0], pos[1]
+        lat2, lng2 = dest[0], dest[1]
+        if not (self.__lat_min < lat1 < self.__lat_max and self.__lat_min < lat2 < self.__lat_max and
+                self.__lng_min < lng1 < self.__lng_max and self.__lng_min < lng2 < self.__lng_max):
+            return None
+        return math.degrees(math.atan2((lng2 - lng1) * self.m_lng, (lat2 - lat1) * self.m_lat)) % 360
@@ -1,19 +1,58 @@
 """
 Authors: Manuel Gasser, Julian Haldimann
 Created: 20.03.2021
-Last Modified: 21.03.2021
+Last Modified: 18.10.2026
 """
 
+import threading
+
+from shapely.geometry.base import BaseGeometry
 from shapely.geometry.linestring import LineString
 from shapely.geometry.point import Point
+from shapely.prepared import prep
+from shapely.ops import unary_union
 
 import file_handler as fh
+from planner import VisibilityGraph
 
 
 class Lake:
 
     def __init__(self, lake_geojson):
         self.exterior, self.interior, self.obstacles = fh.parse_lake_geojson(lake_geojson)
+        # Origin for the local east/north frame of the lake
+        self.origin = tuple(self.exterior.centroid.coords[0])
+
+        self.__prepare()
+
+        # Visibility graph for path planning, built on first use
+        self.__planner = None
+        self.__planner_lock = threading.Lock()
+
+    # Only the polygons and the visibility graph are pickled,
+    # the prepared geometry is built again after loading
+    def __getstate__(self):
+        with self.__planner_lock:
+            return {
+                'exterior': self.exterior,
+                'interior': self.interior,
+                'obstacles': self.obstacles,
+                'origin': self.origin,
+                'planner': self.__planner
+            }
+
+    def __setstate__(self, state):
+        self.exterior = state['exterior']
+        self.interior = state['interior']
+        self.obstacles = state['obstacles']
+        self.origin = state['origin']
+        self.__prepare()
+        self.__planner = state['planner']
+        self.__planner_lock = threading.Lock()
+
+    def __prepare(self):
+        # Prepared geometry for fast predicates
+        self.__prepared_exterior = prep(self.exterior)
 
     """
     Function checks if a given geometry is inside the exterior polygon
@@ -24,7 +63,9 @@ class Lake:
     """
 
     def contains(self, geometry):
-        return self.exterior.contains(geometry)
+        if not isinstance(geometry, BaseGeometry):
+            geometry = Point(geometry)
+        return self.__prepared_exterior.contains(geometry)
 
     """
     Function checks if a straight line between the current point
@@ -38,66 +79,36 @@ class Lake:
 
     def no_intersection(self, cp, np):
         line = LineString((cp, np))
-        return not self.exterior.intersects(line)
+        return not self.__prepared_exterior.intersects(line)
 
     """
-    Function calculates new route from current point to next point which
-    does not intersect with the exterior polygon.
-    
-    This algorithm is inspired by the Weiler Atherton algorithm 
-    for polygon clipping.
+    Function calculates the shortest route from current point to next point
+    which stays inside the interior polygon and avoids the obstacles.
     
     :param cp: current point
     :param np: next point
-    :return: calculated route or None if route cannot be calculated
+    :return: calculated route without cp or None if route cannot be calculated
     """
 
-    def calc_new_route(self, cp, np):
-        # Return none if either point is not inside the exterior polygon
+    def find_path(self, cp, np):
         if not self.contains(cp) or not self.contains(np):
             return None
-        # Create line from points
-        line = LineString((cp, np))
-        # Get intersection points between line and exterior polygon
-        ints = line.intersection(self.exterior)
-        # Get intersection points closest to cp and np
-        int_points = [Point(ints[0].coords[1]), Point(ints[len(ints) - 1].coords[0])]
-        # Points of the exterior and interior polygons
-        exterior_points = self.exterior.exterior.coords
-        interior_points = self.interior.exterior.coords
-        # Init loop values
-        c = 0
-        index_i = -1
-        index_o = -1
-        # Loop through all points to find between which points the intersection points are
-        for i, j in zip(exterior_points, exterior_points[1:]):
-            # Check if line between points is close to intersection points
-            if LineString((i, j)).distance(int_points[0]) < 1e-8:
-                index_i = c
-            if LineString((i, j)).distance(int_points[1]) < 1e-8:
-                index_o = c
-            c += 1
-        # Get minimum distance between intersection point indices
-        d = int(Lake.__min_dist_indices(index_i, index_o, len(exterior_points)))
-        # Create new route with the indices along the interior polygon of the lake
-        if d > 0:
-            route = [interior_points[(index_i + i) % len(interior_points)] for i in range(1, d + 1)]
-        else:
-            route = [interior_points[(index_i - i) % len(interior_points)] for i in range(0, -d)]
-        # Add nex point to created route
-        route.append(np)
-
-        return route
+        return self.get_planner().find_path(tuple(cp), tuple(np))
 
     """
-    Function calculates minimum distance between indices of an array.
+    Get the visibility graph of the lake, it is built once and cached.
     
-    :param i1: first index
-    :param i2: second index
-    :param l: length of the array
-    :returns: minimum distance between indices, positive or negative
+    :returns: visibility graph of the lake
     """
 
-    @staticmethod
-    def __min_dist_indices(i1, i2, l):
-        return ((i2 - i1 + 1.5 * l) % l) - l / 2
+    def get_planner(self):
+        with self.__planner_lock:
+            if self.__planner is None:
+                free = self.interior
+                reach = self.exterior
+                if len(self.obstacles) > 0:
+                    obstacles = unary_union(self.obstacles)
+                    free = free.difference(obstacles)
+                    reach = reach.difference(obstacles)
+                self.__planner = VisibilityGraph(free, reach)
+            return self.__planner
@@ -0,0 +1,27 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import asyncio
+
+"""
+Call a function in an event loop, directly if called from the event loop itself.
+Can be called from any thread.
+
+:param loop: event loop the function is called in
+:param func: function to be called
+:param args: arguments of the function
+"""
+
+
+def call_in_loop(loop, func, *args):
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        func(*args)
+    else:
+        loop.call_soon_threadsafe(func, *args)
@@ -10,11 +10,15 @@ from art import *
 
 from config import Config
 from mqtt import Mqtt
+from sensor_codec import SensorCodec
 from thread_handler import start_thread
 from topics import Topics
 
 cmd_done = True
 
+# Encoding of the mocked sensor values (SensorCodec.TEXT or SensorCodec.BINARY)
+SENSOR_PAYLOAD_FORMAT = SensorCodec.TEXT
+
 """
 MQTT Message Hook
 """
@@ -74,6 +78,8 @@ def command_loop():
                 print('\ttt\t-> turn to.\tFormat: tt {heading}')
                 print('\ttb\t-> turn by.\tFormat: tb {angle}')
                 print('\tstop\t-> stop.\t\tFormat: stop')
+                print('\tgps\t-> gps position.\tFormat: gps {lat} {lng}')
+                print('\thd\t-> heading.\tFormat: hd {heading}')
             else:
                 handle_command(cmd)
         command_loop()
@@ -101,6 +107,10 @@ def handle_command(cmd):
         client.publish(Topics.MOCK_TB, cmd[1])
     elif cmd[0] == 'stop':
         client.publish(Topics.MOCK_STOP, 'true')
+    elif cmd[0] == 'gps':
+        client.pub(Topics.SENSOR_GPS_PHONE, SensorCodec.encode_position((cmd[1], cmd[2]), SENSOR_PAYLOAD_FORMAT))
+    elif cmd[0] == 'hd':
+        client.pub(Topics.SENSOR_HEADING, SensorCodec.encode_heading(cmd[1], SENSOR_PAYLOAD_FORMAT))
 
 
 """
@@ -1,28 +1,425 @@
 """
 Authors: Manuel Gasser, Julian Haldimann
 Created: 02.03.2021
-Last Modified: 08.05.2021
+Last Modified: 18.10.2026
 """
 
+import asyncio
+import collections
 import logging as log
+import os
+import struct
+import threading
+import time
 
 import paho.mqtt.client as mqtt
 
-import thread_handler as th
 from config import Config
+from loop_handler import call_in_loop
+from topics import Topics
+
+
+class TopicStats:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.since = time.monotonic()
+        self.published = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.acked = 0
+        self.ack_total = 0.0
+        self.ack_max = 0.0
+
+
+class SpillFile:
+
+    """
+    Append-only file of queued messages of one priority.
+
+    :param fn: path of the file
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.read = 0
+        self.size = 0
+        self.records = 0
+        self.file = open(fn, 'a+b')
+        self.__recover()
+
+    """
+    Append a record to the file.
+
+    :param record: packed message
+    """
+
+    def append(self, record):
+        self.file.write(record)
+        self.file.flush()
+        self.size += len(record)
+        self.records += 1
+
+    """
+    Read the oldest record of the file. The file is truncated when all records were read.
+
+    :returns: priority, qos, flags, topic and payload bytes
+    """
+
+    def pop(self):
+        self.file.seek(self.read)
+        priority, qos, flags, topic_len, data_len = OfflineQueue.RECORD.unpack(
+            self.file.read(OfflineQueue.RECORD.size))
+        topic = self.file.read(topic_len).decode('utf-8')
+        data = self.file.read(data_len)
+        self.read += OfflineQueue.RECORD.size + topic_len + data_len
+        self.records -= 1
+
+        if self.records == 0:
+            # Everything was read, start over with an empty file
+            self.file.truncate(0)
+            self.read = 0
+            self.size = 0
+        return priority, qos, flags, topic, data
+
+    def __recover(self):
+        # Count the records left in the file, e.g. after a restart
+        self.file.seek(0)
+        offset = 0
+        while True:
+            header = self.file.read(OfflineQueue.RECORD.size)
+            if len(header) < OfflineQueue.RECORD.size:
+                break
+            _, _, _, topic_len, data_len = OfflineQueue.RECORD.unpack(header)
+            if len(self.file.read(topic_len + data_len)) < topic_len + data_len:
+                break
+            offset += OfflineQueue.RECORD.size + topic_len + data_len
+            self.records += 1
+        # Drop a record that was only partially written
+        self.file.truncate(offset)
+        self.size = offset
+
+
+class OfflineQueue:
+    # Maximum number of messages kept in memory
+    MEMORY_SIZE = 500
+    # Maximum size of all spill files in bytes
+    SPILL_SIZE = 10 * 1024 * 1024
+
+    # Record of the spill files: priority, qos, flags, topic length, payload length
+    RECORD = struct.Struct('<BBBHI')
+    RETAIN = 0x01
+    BINARY = 0x02
+
+    """
+    Messages waiting for the connection to the broker. Every priority is a FIFO queue,
+    which keeps its oldest messages in memory and continues in its own append-only
+    spill file when the memory is full, so the order of the messages is kept.
+
+    :param fn:          path prefix of the spill files, None to drop messages when the memory is full
+    :param memory_size: maximum number of messages kept in memory
+    :param spill_size:  maximum size of all spill files in bytes
+    """
+
+    def __init__(self, fn=None, memory_size=MEMORY_SIZE, spill_size=SPILL_SIZE):
+        self.fn = fn
+        self.memory_size = memory_size
+        self.spill_size = spill_size
+        self.spilled = 0
+        self.dropped = 0
+        self.__lock = threading.Lock()
+        self.__queues = collections.defaultdict(collections.deque)
+        self.__files = {}
+        self.__count = 0
+
+        if fn is not None:
+            # Messages spilled before a restart are sent as well
+            directory, name = os.path.split(fn)
+            for f in os.listdir(directory or '.'):
+                if f.startswith(f"{name}.") and f[len(name) + 1:].isdigit():
+                    self.__spill_file(int(f[len(name) + 1:]))
+
+    def __len__(self):
+        with self.__lock:
+            return self.__count + sum(f.records for f in self.__files.values())
+
+    """
+    Add a message to the queue.
+
+    :param priority: priority of the topic, lower values are sent first
+    :param topic:    topic of the message
+    :param payload:  payload of the message
+    :param qos:      quality of service
+    :param retain:   retain flag
+    """
+
+    def put(self, priority, topic, payload, qos, retain):
+        with self.__lock:
+            spill = self.__files.get(priority)
+            # Messages stay in order, so once a priority spills the following messages spill as well
+            if self.__count < self.memory_size and (spill is None or spill.records == 0):
+                self.__queues[priority].append((topic, payload, qos, retain))
+                self.__count += 1
+            else:
+                self.__spill(priority, topic, payload, qos, retain)
+
+    """
+    Put a message back to the front of its priority, e.g. if it could not be sent.
+    The message is kept in memory, so it stays the oldest of its priority.
+
+    :param priority: priority of the topic, lower values are sent first
+    :param topic:    topic of the message
+    :param payload:  payload of the message
+    :param qos:      quality of service
+    :param retain:   retain flag
+    """
+
+    def push_front(self, priority, topic, payload, qos, retain):
+        with self.__lock:
+            self.__queues[priority].appendleft((topic, payload, qos, retain))
+            self.__count += 1
+
+    """
+    Take the next message from the queue, the oldest message of the highest priority.
+
+    :returns: topic, payload, qos and retain flag or None if the queue is empty
+    """
+
+    def pop(self):
+        with self.__lock:
+            priorities = [p for p, q in self.__queues.items() if len(q) > 0] + \
+                         [p for p, f in self.__files.items() if f.records > 0]
+            if len(priorities) == 0:
+                return None
+
+            priority = min(priorities)
+            queue = self.__queues[priority]
+            if len(queue) > 0:
+                self.__count -= 1
+                return queue.popleft()
+
+            _, qos, flags, topic, data = self.__files[priority].pop()
+            payload = data if flags & OfflineQueue.BINARY else data.decode('utf-8')
+            return topic, payload, qos, bool(flags & OfflineQueue.RETAIN)
+
+    """
+    Get the counters of the queue.
+
+    :returns: messages in memory and in the spill files, spilled and dropped messages
+    """
+
+    def stats(self):
+        with self.__lock:
+            return {
+                'memory': self.__count,
+                'spill': sum(f.records for f in self.__files.values()),
+                'spill_bytes': sum(f.size - f.read for f in self.__files.values()),
+                'spilled': self.spilled,
+                'dropped': self.dropped
+            }
+
+    def __spill_file(self, priority):
+        spill = self.__files.get(priority)
+        if spill is None and self.fn is not None:
+            try:
+                spill = self.__files[priority] = SpillFile(f"{self.fn}.{priority}")
+            except OSError as err:
+                log.error(f"Could not open MQTT spill file: {self.fn}.{priority}, Stacktrace {err}")
+        return spill
+
+    def __spill(self, priority, topic, payload, qos, retain):
+        flags = OfflineQueue.RETAIN if retain else 0
+        if isinstance(payload, (bytes, bytearray)):
+            flags |= OfflineQueue.BINARY
+            data = bytes(payload)
+        else:
+            data = str(payload).encode('utf-8')
+        t = topic.encode('utf-8')
+        record = OfflineQueue.RECORD.pack(priority, qos, flags, len(t), len(data)) + t + data
+
+        spill = self.__spill_file(priority)
+        if spill is None or sum(f.size for f in self.__files.values()) + len(record) > self.spill_size:
+            self.dropped += 1
+            return
+        try:
+            spill.append(record)
+            self.spilled += 1
+        except OSError as err:
+            log.error(f"Could not write to MQTT spill file: {spill.fn}, Stacktrace {err}")
+            self.dropped += 1
 
 
 class Mqtt(mqtt.Client):
+    # Maximum number of tracked acknowledgements, older ones are forgotten
+    MAX_ACKS = 1000
+    # Maximum number of queued messages sent per second after a reconnect
+    DRAIN_RATE = 20
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_publish = self.__on_publish
+        self.offline = OfflineQueue()
+        self.drain_rate = Mqtt.DRAIN_RATE
+        self.__drain_cond = threading.Condition()
+        self.__stats = {}
+        self.__stats_lock = threading.Lock()
+        # Publish time and topic of messages waiting for the acknowledgement of the broker by message id
+        self.__inflight = {}
+        # Acknowledgements that arrived before publish returned the message id
+        self.__early_acks = {}
+
+        self.__drain_thread = threading.Thread(target=self.__drain_loop, name='mqtt-drain')
+        self.__drain_thread.daemon = True
+        self.__drain_thread.start()
+
+    def set_offline_queue(self, queue):
+        self.offline = queue
+
     """
-    Publish a payload to a specific topic.
+    Publish a payload to a specific topic. Paho is thread safe, so no
+    lock is taken around the publish. Without connection to the broker
+    the message is queued if its topic has an offline priority.
 
     :param topic:   The topic is the place where the message should be published
     :param payload: The payload is the data that should be published
+    :param qos:     Quality of service, None to use the policy of the topic
+    """
+
+    def pub(self, topic, payload, qos=None, retain=False):
+        qos = Topics.qos(topic) if qos is None else qos
+        if not self.is_connected():
+            self.__queue_offline(topic, payload, qos, retain)
+            return
+        # Connection was lost since it was checked
+        rc = self.__publish(topic, payload, qos, retain)
+        if rc == mqtt.MQTT_ERR_NO_CONN and not Mqtt.kept_by_client(rc, qos):
+            self.__queue_offline(topic, payload, qos, retain)
+
+    """
+    Check if paho kept a message that could not be published. Messages with QoS > 0
+    published without connection stay in the inflight queue of paho and are sent after
+    the reconnect, queueing them as well would deliver them twice.
+
+    :param rc:  result of the publish
+    :param qos: quality of service of the message
+    :returns:   true if paho sends the message after the reconnect
+    """
+
+    @staticmethod
+    def kept_by_client(rc, qos):
+        return rc == mqtt.MQTT_ERR_NO_CONN and qos > 0
+
+    def __publish(self, topic, payload, qos, retain):
+        start = time.perf_counter()
+        info = self.publish(topic, payload, qos=qos, retain=retain)
+        latency = time.perf_counter() - start
+
+        stats = self.__topic_stats(topic)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            with stats.lock:
+                stats.failed += 1
+            return info.rc
+
+        with stats.lock:
+            stats.published += 1
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+
+        if qos > 0:
+            acked = self.__early_acks.pop(info.mid, None)
+            if acked is not None:
+                self.__record_ack(topic, acked - start)
+            else:
+                if len(self.__inflight) >= Mqtt.MAX_ACKS:
+                    # Messages lost on the way are never acknowledged
+                    self.__inflight.clear()
+                self.__inflight[info.mid] = (topic, start)
+        return info.rc
+
+    def __queue_offline(self, topic, payload, qos, retain):
+        priority = Topics.priority(topic)
+        if priority is None:
+            return
+        self.offline.put(priority, topic, payload, qos, retain)
+        with self.__drain_cond:
+            self.__drain_cond.notify()
+
+    def __drain_loop(self):
+        # Send the queued messages with a limited rate, so live messages are not delayed by them
+        while True:
+            with self.__drain_cond:
+                while len(self.offline) == 0 or not self.is_connected():
+                    # Connection changes are not notified, check again after a while
+                    self.__drain_cond.wait(1)
+
+            msg = self.offline.pop()
+            if msg is None:
+                continue
+            rc = self.__publish(*msg)
+            if rc != mqtt.MQTT_ERR_SUCCESS:
+                if not Mqtt.kept_by_client(rc, msg[2]):
+                    # Keep the order of the priority, the message is sent again first
+                    self.offline.push_front(Topics.priority(msg[0]), *msg)
+                time.sleep(1)
+            time.sleep(1 / self.drain_rate)
+
     """
+    Get the publish counters of every topic since the last reset.
 
-    def pub(self, topic, payload, qos=1, retain=False):
-        with th.locks["pub_lock"]:
-            self.publish(topic, payload, qos=1, retain=retain)
+    :param reset: start new counters afterwards
+    :returns:     published and failed messages, rate per second and publish
+                  and acknowledge latency in milliseconds by topic
+    """
+
+    def stats(self, reset=False):
+        with self.__stats_lock:
+            topics = list(self.__stats.items())
+
+        now = time.monotonic()
+        result = {}
+        for topic, stats in topics:
+            with stats.lock:
+                result[topic] = {
+                    'published': stats.published,
+                    'failed': stats.failed,
+                    'rate': stats.published / max(now - stats.since, 1e-3),
+                    'avg_latency_ms': stats.latency_total / stats.published * 1000 if stats.published > 0 else 0,
+                    'max_latency_ms': stats.latency_max * 1000,
+                    'avg_ack_ms': stats.ack_total / stats.acked * 1000 if stats.acked > 0 else 0,
+                    'max_ack_ms': stats.ack_max * 1000
+                }
+                if reset:
+                    stats.reset()
+        return result
+
+    def __topic_stats(self, topic):
+        stats = self.__stats.get(topic)
+        if stats is None:
+            with self.__stats_lock:
+                stats = self.__stats.setdefault(topic, TopicStats())
+        return stats
+
+    def __record_ack(self, topic, latency):
+        stats = self.__topic_stats(topic)
+        with stats.lock:
+            stats.acked += 1
+            stats.ack_total += latency
+            stats.ack_max = max(stats.ack_max, latency)
+
+    def __on_publish(self, client, userdata, mid):
+        entry = self.__inflight.pop(mid, None)
+        if entry is None:
+            # QoS 0 messages or an acknowledgement faster than publish returned
+            if len(self.__early_acks) >= Mqtt.MAX_ACKS:
+                self.__early_acks.clear()
+            self.__early_acks[mid] = time.perf_counter()
+            return
+        topic, start = entry
+        self.__record_ack(topic, time.perf_counter() - start)
 
     """
     Subscribe to a specific topic to receive messages
@@ -44,3 +441,72 @@ class Mqtt(mqtt.Client):
             self.connect(domain, port, keepalive=keepalive)
         except (ConnectionError, OSError, ValueError) as err:
             log.error(f"Could not connect to MQTT on: {domain}:{port}, Stacktrace {err}")
+
+
+class MqttLoop:
+    # Interval of the keepalive handling of the client in seconds
+    MISC_INTERVAL = 1
+    # Time to wait between reconnects to the broker in seconds
+    RECONNECT_WAIT = 3
+
+    """
+    Run the network I/O of a MQTT client on an asyncio event loop instead of
+    loop_forever. The socket of the client is watched by the event loop, only
+    the blocking connect to the broker runs on the executor.
+
+    :param client: Mqtt client, has to be created before connecting
+    :param loop:   event loop the network I/O runs on
+    """
+
+    def __init__(self, client, loop):
+        self.client = client
+        self.loop = loop
+        self.reconnects = 0
+        self.__task = None
+        client.on_socket_open = self.__on_socket_open
+        client.on_socket_close = self.__on_socket_close
+        client.on_socket_register_write = self.__on_socket_register_write
+        client.on_socket_unregister_write = self.__on_socket_unregister_write
+
+    """
+    Connect to the broker and start the keepalive task. The client reconnects
+    by itself if the connection is lost.
+
+    :param domain:    of the broker
+    :param port:      of the broker
+    :param keepalive: interval of the keepalive pings in seconds
+    """
+
+    async def start(self, domain=Config.DOMAIN, port=Config.PORT, keepalive=60):
+        await self.loop.run_in_executor(None, self.client.connect_to_client, domain, port, keepalive)
+        self.__task = self.loop.create_task(self.__misc_loop())
+
+    async def __misc_loop(self):
+        while True:
+            # No socket means the connection was lost or never established
+            if self.client.loop_misc() == mqtt.MQTT_ERR_NO_CONN:
+                await self.__reconnect()
+            await asyncio.sleep(MqttLoop.MISC_INTERVAL)
+
+    async def __reconnect(self):
+        await asyncio.sleep(MqttLoop.RECONNECT_WAIT)
+        self.reconnects += 1
+        try:
+            await self.loop.run_in_executor(None, self.client.reconnect)
+        except (ConnectionError, OSError, ValueError) as err:
+            log.error(f"Could not reconnect to MQTT, Stacktrace {err}")
+
+    # The socket is opened and written to from other threads when connecting
+    # or publishing, so the event loop is only changed from its own thread
+    def __on_socket_open(self, client, userdata, sock):
+        call_in_loop(self.loop, self.loop.add_reader, sock, client.loop_read)
+
+    def __on_socket_close(self, client, userdata, sock):
+        # The socket is closed after the callback, so remove it by its descriptor
+        call_in_loop(self.loop, self.loop.remove_reader, sock.fileno())
+
+    def __on_socket_register_write(self, client, userdata, sock):
+        call_in_loop(self.loop, self.loop.add_writer, sock, client.loop_write)
+
+    def __on_socket_unregister_write(self, client, userdata, sock):
+        call_in_loop(self.loop, self.loop.remove_writer, sock.fileno())
@@ -0,0 +1,281 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import heapq
+import logging as log
+import math
+
+from shapely.geometry.linestring import LineString
+from shapely.geometry.polygon import orient
+from shapely.prepared import prep
+
+from gps import Gps
+
+
+class VisibilityGraph:
+
+    """
+    Build the visibility graph of the free area of a lake. Only the reflex vertices of
+    the free area are used as nodes, a shortest path can only bend at those.
+
+    :param free:  area the paths between nodes have to stay in
+    :param reach: area the start and goal points may be connected through
+    """
+
+    def __init__(self, free, reach=None):
+        self.free = free
+        self.reach = reach if reach is not None else free
+        self.__free = prep(free)
+        self.__reach = prep(self.reach)
+
+        vertices = VisibilityGraph.reflex_vertices(free)
+        self.nodes = [v[1] for v in vertices]
+        self.__neighbours = [(v[0], v[2]) for v in vertices]
+        self.edges = [[] for _ in self.nodes]
+        for i, a in enumerate(self.nodes):
+            for j in range(i + 1, len(self.nodes)):
+                b = self.nodes[j]
+                # Cheap tangent test first, the geometry check is only done for candidate edges
+                if self.__tangent(i, a, b) and self.__tangent(j, b, a) and \
+                        self.__free.covers(LineString((a, b))):
+                    d = Gps.get_distance(a, b)
+                    self.edges[i].append((j, d))
+                    self.edges[j].append((i, d))
+
+    # Prepared geometries can not be pickled, they are prepared again after loading
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_VisibilityGraph__free']
+        del state['_VisibilityGraph__reach']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__free = prep(self.free)
+        self.__reach = prep(self.reach)
+
+    """
+    Get the vertices of an area at which the area is not convex.
+
+    :param area: polygon or multipolygon
+    :returns:    list of previous vertex, reflex vertex and next vertex
+    """
+
+    @staticmethod
+    def reflex_vertices(area):
+        vertices = []
+        for polygon in getattr(area, 'geoms', [area]):
+            # Free area lies left of every ring, so reflex vertices are right turns
+            polygon = orient(polygon, sign=1.0)
+            for ring in [polygon.exterior] + list(polygon.interiors):
+                coords = list(ring.coords)[:-1]
+                n = len(coords)
+                for i in range(n):
+                    (ax, ay), (bx, by), (cx, cy) = coords[i - 1], coords[i], coords[(i + 1) % n]
+                    if (bx - ax) * (cy - by) - (by - ay) * (cx - bx) < 0:
+                        vertices.append((coords[i - 1], coords[i], coords[(i + 1) % n]))
+        return vertices
+
+    """
+    Check if the line from a node to a point only touches the boundary at the node.
+    A shortest path can only bend at a node if both neighbours of the node lie on
+    the same side of the line.
+
+    :param i: index of the node
+    :param a: the node
+    :param b: the other point of the line
+    :returns: true if the line is tangent to the boundary at the node
+    """
+
+    def __tangent(self, i, a, b):
+        (px, py), (nx, ny) = self.__neighbours[i]
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        sp = dx * (py - a[1]) - dy * (px - a[0])
+        sn = dx * (ny - a[1]) - dy * (nx - a[0])
+        return sp * sn >= 0
+
+    """
+    Check if the straight line between two points stays inside the reachable area.
+
+    :param a: first point
+    :param b: second point
+    :returns: true if the line is collision free
+    """
+
+    def visible(self, a, b):
+        return self.__reach.covers(LineString((a, b)))
+
+    """
+    Find the shortest collision free path between two points with A*.
+
+    :param start: start point
+    :param goal:  goal point
+    :returns:     list of points after start up to and including goal, None if there is no path
+    """
+
+    def find_path(self, start, goal):
+        if self.visible(start, goal):
+            return [goal]
+
+        # Connect start and goal to all visible nodes. No tangent test here, start and goal may
+        # lie outside of the free area and lines to them do not have to bend at the node.
+        start_edges = [(i, Gps.get_distance(start, n)) for i, n in enumerate(self.nodes) if self.visible(start, n)]
+        goal_edges = {i: Gps.get_distance(n, goal) for i, n in enumerate(self.nodes) if self.visible(n, goal)}
+        if len(start_edges) == 0 or len(goal_edges) == 0:
+            return None
+
+        goal_index = len(self.nodes)
+        h = [Gps.get_distance(n, goal) for n in self.nodes]
+        g = {}
+        came_from = {}
+        heap = []
+        for i, d in start_edges:
+            g[i] = d
+            came_from[i] = None
+            heapq.heappush(heap, (d + h[i], d, i))
+
+        best = None
+        while len(heap) > 0:
+            f, d, i = heapq.heappop(heap)
+            if i == goal_index:
+                break
+            if d > g.get(i, float('inf')):
+                continue
+
+            if i in goal_edges:
+                total = d + goal_edges[i]
+                if best is None or total < best:
+                    best = total
+                    came_from[goal_index] = i
+                    g[goal_index] = total
+                    heapq.heappush(heap, (total, total, goal_index))
+
+            for j, w in self.edges[i]:
+                nd = d + w
+                if nd < g.get(j, float('inf')):
+                    g[j] = nd
+                    came_from[j] = i
+                    heapq.heappush(heap, (nd + h[j], nd, j))
+
+        if best is None:
+            return None
+
+        path = [goal]
+        i = came_from[goal_index]
+        while i is not None:
+            path.append(self.nodes[i])
+            i = came_from[i]
+        path.reverse()
+        return path
+
+
+class RoutePlan:
+
+    """
+    Flat list of waypoints with the length and bearing of the leg leading to each waypoint.
+
+    :param start:     start point of the plan
+    :param waypoints: points to be driven to in order
+    """
+
+    def __init__(self, start, waypoints):
+        self.start = start
+        self.waypoints = waypoints
+        self.lengths = []
+        self.bearings = []
+
+        prev = start
+        for p in waypoints:
+            self.lengths.append(Gps.get_distance(prev, p))
+            self.bearings.append(Gps.get_direction(prev, p))
+            prev = p
+
+        self.length = sum(self.lengths)
+        self.__frame = None
+        self.__local = None
+
+    """
+    Create a plan starting at a new position and driving to the start of this plan first.
+
+    :param lake: lake the route is driven on, None to drive straight
+    :param pos:  new start position
+    :returns:    new plan or None if the start of this plan cannot be reached
+    """
+
+    def from_position(self, lake, pos):
+        approach = plan_route(lake, [pos, self.start])
+        if approach is None:
+            return None
+        return RoutePlan(pos, approach.waypoints + self.waypoints)
+
+    """
+    Find the point a lookahead distance ahead on the path for pure pursuit. The position
+    is projected on the current segment and the point is moved along the path from there.
+
+    :param pos:      current position
+    :param index:    index of the waypoint at the end of the current segment
+    :param distance: lookahead distance in meters
+    :returns:        index of the current segment and the lookahead point
+    """
+
+    def lookahead(self, pos, index, distance):
+        frame = Gps.frame
+        if frame is None:
+            return index, self.waypoints[index]
+        if frame is not self.__frame:
+            self.__frame = frame
+            self.__local = [frame.to_local(p) for p in [self.start] + self.waypoints]
+
+        points = self.__local
+        last = len(self.waypoints) - 1
+        px, py = frame.to_local(pos)
+
+        # Switch to the next segment as soon as the current waypoint is within the lookahead distance
+        while index < last and math.hypot(points[index + 1][0] - px, points[index + 1][1] - py) < distance:
+            index += 1
+
+        (ax, ay), (bx, by) = points[index], points[index + 1]
+        dx, dy = bx - ax, by - ay
+        length = math.hypot(dx, dy)
+        t = ((px - ax) * dx + (py - ay) * dy) / length if length > 0 else 0
+        along = max(0, min(length, t)) + distance
+
+        i = index
+        while True:
+            (ax, ay), (bx, by) = points[i], points[i + 1]
+            length = math.hypot(bx - ax, by - ay)
+            if along <= length:
+                f = along / length if length > 0 else 1
+                return index, frame.to_gps(ax + f * (bx - ax), ay + f * (by - ay))
+            if i == last:
+                return index, self.waypoints[last]
+            along -= length
+            i += 1
+
+
+"""
+Plan a whole route on a lake. Every leg is checked against the lake and
+detours are expanded, so the driver only has to follow the waypoints.
+
+:param lake:   lake the route is driven on, None to drive straight
+:param points: points of the route, the first point is the start
+:returns:      plan of the route or None if a leg cannot be driven
+"""
+
+
+def plan_route(lake, points):
+    if len(points) == 0:
+        return None
+
+    waypoints = []
+    for i, (a, b) in enumerate(zip(points, points[1:])):
+        path = lake.find_path(a, b) if lake is not None else [b]
+        if path is None:
+            log.error(f"Leg {i} of route cannot be driven: From: {a}, To: {b}")
+            return None
+        waypoints.extend(path)
+
+    return RoutePlan(tuple(points[0]), waypoints)
@@ -0,0 +1,222 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import struct
+
+from command import Command as Cmd
+
+
+class Protocol:
+    TEXT = 'text'
+    BINARY = 'binary'
+
+    # Start byte of a binary frame, text lines never start with it
+    SYNC = 0xA5
+
+    # Message types of binary frames
+    ENGINE = 0x01
+    MODE = 0x02
+    CONN = 0x03
+
+    # Frame layout: sync, type, sequence number, payload, crc
+    HEADER = struct.Struct('<BBB')
+    PAYLOADS = {
+        ENGINE: struct.Struct('<bb'),
+        MODE: struct.Struct('<B'),
+        CONN: struct.Struct('<B')
+    }
+
+    PREFIXES = {
+        'engine': ENGINE,
+        'mode': MODE,
+        'conn': CONN
+    }
+    TYPES = {v: k for k, v in PREFIXES.items()}
+
+    MODES = ['auto', 'radio-remote', 'emergency']
+    DEVICES = ['raspberry-pi', 'arduino']
+
+    # Maximum length of a text line before it is discarded
+    MAX_LINE = 100
+
+    """
+    Calculate the CRC-8 (polynomial 0x07) of the given bytes.
+
+    :param data: bytes to calculate the checksum of
+    :returns:    checksum between 0 and 255
+    """
+
+    @staticmethod
+    def crc8(data):
+        crc = 0
+        for b in data:
+            crc = CRC8_TABLE[crc ^ b]
+        return crc
+
+    """
+    Encode a command as a text line.
+
+    :param prefix: The name of the message
+    :param value:  The payload of the message, tuples are joined by comma
+    :returns:      encoded line
+    """
+
+    @staticmethod
+    def encode_text(prefix, value):
+        if isinstance(value, tuple):
+            value = ','.join(str(v) for v in value)
+        return f"{prefix}: {value}\n".encode('utf-8')
+
+    """
+    Encode a command as a binary frame.
+
+    :param prefix: The name of the message
+    :param value:  The payload of the message
+    :param seq:    Sequence number of the frame
+    :returns:      encoded frame or None if the command has no binary representation
+    """
+
+    @staticmethod
+    def encode_binary(prefix, value, seq):
+        t = Protocol.PREFIXES.get(prefix)
+        if t is None:
+            return None
+
+        try:
+            if t == Protocol.ENGINE:
+                if not isinstance(value, tuple):
+                    value = tuple(int(v) for v in value.split(','))
+                payload = Protocol.PAYLOADS[t].pack(*value)
+            elif t == Protocol.MODE:
+                payload = Protocol.PAYLOADS[t].pack(Protocol.MODES.index(value))
+            else:
+                payload = Protocol.PAYLOADS[t].pack(Protocol.DEVICES.index(value))
+        except (ValueError, struct.error):
+            return None
+
+        frame = Protocol.HEADER.pack(Protocol.SYNC, t, seq & 0xFF) + payload
+        return frame + bytes((Protocol.crc8(frame[1:]),))
+
+    """
+    Encode a command with the given protocol. Commands without a binary
+    representation are sent as text line.
+
+    :param protocol: Protocol.TEXT or Protocol.BINARY
+    :param prefix:   The name of the message
+    :param value:    The payload of the message
+    :param seq:      Sequence number of the frame
+    :returns:        encoded command
+    """
+
+    @staticmethod
+    def encode(protocol, prefix, value, seq=0):
+        if protocol == Protocol.BINARY:
+            frame = Protocol.encode_binary(prefix, value, seq)
+            if frame is not None:
+                return frame
+        return Protocol.encode_text(prefix, value)
+
+
+class Decoder:
+
+    def __init__(self):
+        self.__buffer = bytearray()
+        self.__seq = None
+        self.crc_errors = 0
+        self.lost = 0
+
+    """
+    Add received bytes and decode all complete commands.
+
+    :param data: received bytes
+    :returns:    list of decoded commands
+    """
+
+    def feed(self, data):
+        buf = self.__buffer
+        buf.extend(data)
+        commands = []
+
+        while len(buf) > 0:
+            if buf[0] == Protocol.SYNC:
+                if len(buf) < Protocol.HEADER.size:
+                    break
+                payload = Protocol.PAYLOADS.get(buf[1])
+                if payload is None:
+                    # Not a frame, resync on next byte
+                    del buf[0]
+                    continue
+                size = Protocol.HEADER.size + payload.size + 1
+                if len(buf) < size:
+                    break
+                frame = bytes(buf[:size])
+                if Protocol.crc8(frame[1:-1]) != frame[-1]:
+                    self.crc_errors += 1
+                    del buf[0]
+                    continue
+                del buf[:size]
+                commands.append(self.__decode_frame(frame, payload))
+            else:
+                end = buf.find(b'\n')
+                sync = buf.find(Protocol.SYNC)
+                if sync >= 0 and (end < 0 or sync < end):
+                    # Drop garbage in front of a frame
+                    del buf[:sync]
+                    continue
+                if end < 0:
+                    if len(buf) > Protocol.MAX_LINE:
+                        buf.clear()
+                    break
+                line = bytes(buf[:end])
+                del buf[:end + 1]
+                cmd = Decoder.parse_line(line.decode('utf-8', errors='replace'))
+                if cmd is not None:
+                    commands.append(cmd)
+
+        return commands
+
+    """
+    Parse a received text line into a Command object.
+
+    :param line: received line
+    :returns:    command or None if the line is not a command
+    """
+
+    @staticmethod
+    def parse_line(line):
+        line_splits = line.split(':')
+        if len(line_splits) == 2:
+            return Cmd(line_splits[0].strip(), line_splits[1].strip())
+        return None
+
+    def __decode_frame(self, frame, payload):
+        t, seq = frame[1], frame[2]
+        if self.__seq is not None:
+            self.lost += (seq - self.__seq - 1) & 0xFF
+        self.__seq = seq
+
+        values = payload.unpack(frame[Protocol.HEADER.size:-1])
+        if t == Protocol.ENGINE:
+            data = values
+        elif t == Protocol.MODE:
+            data = Protocol.MODES[values[0]] if values[0] < len(Protocol.MODES) else str(values[0])
+        else:
+            data = Protocol.DEVICES[values[0]] if values[0] < len(Protocol.DEVICES) else str(values[0])
+
+        return Cmd(Protocol.TYPES[t], data)
+
+
+def _crc8_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return table
+
+
+CRC8_TABLE = _crc8_table()
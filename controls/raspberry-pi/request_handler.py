@@ -1,20 +1,122 @@
 """
 Authors: Manuel Gasser, Julian Haldimann
 Created: 21.03.2021
-Last Modified: 01.05.2021
+Last Modified: 18.10.2026
 """
 
 import json
+import logging as log
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from config import Config
+from mqtt import OfflineQueue
 
 headers = {
     'Accept': '*/*',
     'Content-Type': 'application/json'
 }
 
+# Timeouts for connecting to and reading from the aws api in seconds
+TIMEOUT = (5, 15)
+# Retries of failed GET requests, the waits between them grow exponentially
+RETRIES = 3
+BACKOFF = .5
+# Connections kept open to the aws api
+POOL_SIZE = 4
+# Maximum wait between retries of an upload in seconds
+MAX_UPLOAD_BACKOFF = 60
+# Maximum size of the file of waiting uploads in bytes
+UPLOAD_SPILL_SIZE = 10 * 1024 * 1024
+
+"""
+Create a session with keep-alive connections to the aws api. Idempotent
+requests are retried on connection errors and server errors.
+
+:returns: session
+"""
+
+
+def create_session():
+    retry = Retry(total=RETRIES, backoff_factor=BACKOFF, status_forcelist=(500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+    s = requests.Session()
+    s.headers.update(headers)
+    s.mount('http://', adapter)
+    s.mount('https://', adapter)
+    return s
+
+
+# Session and upload queue are created on first use, so importing the module starts nothing
+session = None
+uploads = None
+lock = threading.Lock()
+# Thread pool for fetching from the aws api concurrently, threads are started on first use
+executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='api')
+
+"""
+Get the session to the aws api, created on first use.
+
+:returns: session
+"""
+
+
+def get_session():
+    global session
+
+    with lock:
+        if session is None:
+            session = create_session()
+        return session
+
+
+"""
+Start the upload queue. Waiting uploads are stored in a file and sent after a restart.
+Has to be called before the first upload, otherwise the uploads are only kept in memory.
+
+:param fn: path of the file of waiting uploads, None to keep them in memory
+:returns:  upload queue
+"""
+
+
+def start_uploads(fn=None):
+    global uploads
+
+    with lock:
+        if uploads is None:
+            uploads = UploadQueue(fn)
+        return uploads
+
+
+"""
+Get the upload queue, started without file if it was not started before.
+
+:returns: upload queue
+"""
+
+
+def get_uploads():
+    return uploads if uploads is not None else start_uploads()
+
+"""
+Get JSON from the aws api.
+
+:param path: of the api endpoint
+:returns:    decoded JSON of the response
+"""
+
+
+def get(path):
+    res = get_session().get(f"{Config.HOST}{path}", timeout=TIMEOUT)
+    res.raise_for_status()
+    return res.json()
+
+
 """
 Get route by id from the aws api.
 
@@ -23,8 +125,7 @@ Get route by id from the aws api.
 
 
 def get_route_by_id(id):
-    res = requests.get(f"{Config.HOST}/api/routes/id/{id}", headers=headers)
-    return res.json()
+    return get(f"/api/routes/id/{id}")
 
 
 """
@@ -35,12 +136,115 @@ Get lake by id from the aws api.
 
 
 def get_lake_by_id(id):
-    res = requests.get(f"{Config.HOST}/api/lakes/id/{id}", headers=headers)
-    return res.json()
+    return get(f"/api/lakes/id/{id}")
+
+
+"""
+Get a route and its lake from the aws api. If the id of the lake is known,
+both are fetched at the same time. The lake is fetched again if the route
+belongs to another lake.
+
+:param id:      of the route
+:param lake_id: expected id of the lake, None if unknown
+:returns:       JSON of the route and the lake
+"""
+
+
+def get_route_and_lake(id, lake_id=None):
+    if lake_id is None:
+        route_json = get_route_by_id(id)
+        return route_json, get_lake_by_id(route_json['lake'])
+
+    route_future = executor.submit(get_route_by_id, id)
+    lake_future = executor.submit(get_lake_by_id, lake_id)
+    route_json = route_future.result()
+    if route_json['lake'] != lake_id:
+        lake_future.cancel()
+        return route_json, get_lake_by_id(route_json['lake'])
+    return route_json, lake_future.result()
+
+
+class UploadQueue:
+    # Priority of the requests in the OfflineQueue, the path is stored as topic
+    PRIORITY = 0
+
+    """
+    Queue of POST requests to the aws api. The requests are sent in order by a
+    background thread and retried with exponential backoff until they succeed.
+    The requests are stored in the spill file of an OfflineQueue, which keeps
+    them over a restart. A request interrupted by a restart is sent again.
+
+    :param fn: path of the file of waiting requests, None to keep them in memory
+    """
+
+    def __init__(self, fn=None):
+        # Without memory part every request is written to the file immediately
+        memory_size = OfflineQueue.MEMORY_SIZE if fn is None else 0
+        self.__queue = OfflineQueue(fn, memory_size=memory_size, spill_size=UPLOAD_SPILL_SIZE)
+        self.__cond = threading.Condition()
+        self.sent = 0
+        self.rejected = 0
+        self.retries = 0
+
+        self.__thread = threading.Thread(target=self.__upload_loop, name='api-upload')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    """
+    Add a POST request to the queue.
+
+    :param path: of the api endpoint
+    :param data: JSON body of the request
+    """
+
+    def put(self, path, data):
+        self.__queue.put(UploadQueue.PRIORITY, path, json.dumps(data), 0, False)
+        with self.__cond:
+            self.__cond.notify()
+
+    """
+    Get the counters of the queue.
+
+    :returns: waiting, sent and rejected uploads and retries
+    """
+
+    def stats(self):
+        return {
+            'pending': len(self.__queue),
+            'dropped': self.__queue.dropped,
+            'sent': self.sent,
+            'rejected': self.rejected,
+            'retries': self.retries
+        }
+
+    def __upload_loop(self):
+        while True:
+            with self.__cond:
+                while len(self.__queue) == 0:
+                    self.__cond.wait()
+            path, body, _, _ = self.__queue.pop()
+            wait = BACKOFF
+            while True:
+                try:
+                    res = get_session().post(f"{Config.HOST}{path}", data=body, timeout=TIMEOUT)
+                    # Client errors will not succeed on a retry
+                    if res.status_code < 500:
+                        if not res.ok:
+                            self.rejected += 1
+                            log.error(f"Upload to {path} was rejected with status {res.status_code}")
+                        else:
+                            self.sent += 1
+                        break
+                    log.warning(f"Upload to {path} failed with status {res.status_code}, retry in {wait} s")
+                except requests.RequestException as ex:
+                    log.warning(f"Upload to {path} failed, retry in {wait} s, Stacktrace {ex}")
+                self.retries += 1
+                time.sleep(wait)
+                wait = min(wait * 2, MAX_UPLOAD_BACKOFF)
 
 
 """
-Save route to database with aws api.
+Save route to database with aws api. The route is uploaded in the background.
 
 :param name: of the route
 :param description: of the route
@@ -61,4 +265,4 @@ def save_route(name, description, gj, lake_id):
         "data": json.dumps(data)
     }
 
-    requests.post(f"{Config.HOST}/api/save-route", headers=headers, data=json.dumps(json_data))
+    get_uploads().put('/api/save-route', json_data)
@@ -0,0 +1,156 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import hashlib
+import json
+import logging as log
+import os
+import pickle
+import threading
+
+
+class RouteCache:
+    # Version of the stored lakes, increase when the Lake class changes
+    # so old pickles are rebuilt instead of loaded
+    VERSION = 1
+
+    """
+    On-disk cache of the routes and lakes of the api. Routes and lakes are stored
+    as the received JSON by their id. Lakes are also stored as pickled Lake with the
+    prepared geometry and the visibility graph, keyed by the hash of their GeoJSON.
+
+    :param directory: directory the cache files are stored in, created if it does not exist
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    """
+    Calculate the hash of the GeoJSON of a route or lake.
+
+    :param data: JSON of the route or lake as received from the api
+    :returns:    hex digest of the GeoJSON
+    """
+
+    @staticmethod
+    def content_hash(data):
+        gj = data['json']
+        if not isinstance(gj, str):
+            gj = json.dumps(gj, sort_keys=True)
+        return hashlib.sha256(gj.encode('utf-8')).hexdigest()
+
+    """
+    Get a cached route.
+
+    :param id: of the route
+    :returns:  JSON of the route or None if it is not cached
+    """
+
+    def get_route(self, id):
+        return self.__read_json(f"route_{id}.json")
+
+    """
+    Store a route.
+
+    :param id:   of the route
+    :param data: JSON of the route as received from the api
+    """
+
+    def put_route(self, id, data):
+        self.__write(f"route_{id}.json", json.dumps(data).encode('utf-8'))
+
+    """
+    Get a cached lake with its prepared geometry.
+
+    :param id: of the lake
+    :returns:  JSON of the lake and the Lake or None if it is not cached
+    """
+
+    def get_lake(self, id):
+        data = self.__read_json(f"lake_{id}.json")
+        if data is None:
+            self.misses += 1
+            return None
+
+        fn = self.__lake_file(id, RouteCache.content_hash(data))
+        try:
+            with open(fn, 'rb') as f:
+                lake = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as ex:
+            self.misses += 1
+            log.warning(f"Cached lake {fn} can not be loaded, Stacktrace {ex}")
+            return None
+
+        self.hits += 1
+        return data, lake
+
+    """
+    Store a lake with its prepared geometry. The visibility graph is built
+    before the lake is stored, so it does not have to be built after loading.
+
+    :param id:   of the lake
+    :param data: JSON of the lake as received from the api
+    :param lake: Lake built from the JSON
+    """
+
+    def put_lake(self, id, data, lake):
+        lake.get_planner()
+        h = RouteCache.content_hash(data)
+        self.__write(os.path.basename(self.__lake_file(id, h)), pickle.dumps(lake, pickle.HIGHEST_PROTOCOL))
+        # JSON is written last, it points to the pickle by its hash
+        self.__write(f"lake_{id}.json", json.dumps(data).encode('utf-8'))
+
+        # Remove the pickles of older versions of the lake
+        keep = os.path.basename(self.__lake_file(id, h))
+        for fn in os.listdir(self.directory):
+            if fn.startswith(f"lake_{id}_") and fn.endswith('.pickle') and fn != keep:
+                try:
+                    os.remove(os.path.join(self.directory, fn))
+                except OSError:
+                    pass
+
+    """
+    Get the counters of the cache.
+
+    :returns: lakes loaded from and missing in the cache
+    """
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def __lake_file(self, id, h):
+        return os.path.join(self.directory, f"lake_{id}_{h[:16]}_v{RouteCache.VERSION}.pickle")
+
+    def __read_json(self, fn):
+        try:
+            with open(os.path.join(self.directory, fn), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as ex:
+            log.warning(f"Cache file {fn} can not be read, Stacktrace {ex}")
+            return None
+
+    # Files are replaced atomically, a power loss never leaves a half written file
+    def __write(self, fn, data):
+        path = os.path.join(self.directory, fn)
+        tmp = f"{path}.tmp"
+        with self.__lock:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
@@ -0,0 +1,157 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import asyncio
+import collections
+import threading
+import time
+
+
+class Scheduler:
+    # Number of samples kept per loop for the percentiles
+    SAMPLES = 1000
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__loops = {}
+
+    """
+    Create the timing of a control loop running at a fixed rate.
+
+    :param name:   name the timing of the loop is recorded under
+    :param period: period of the loop in seconds
+    :returns:      Rate to be called once per step of the loop
+    """
+
+    def rate(self, name, period):
+        return Rate(self, name, period)
+
+    """
+    Record the timing of one step of a loop.
+
+    :param name:    name of the loop
+    :param jitter:  difference between the real and the configured period in seconds
+    :param latency: duration of the step in seconds
+    :param missed:  true if the step took longer than the period
+    """
+
+    def record(self, name, jitter, latency, missed):
+        with self.__lock:
+            loop = self.__loops.get(name)
+            if loop is None:
+                loop = self.__loops[name] = {
+                    'steps': 0,
+                    'missed': 0,
+                    'jitter': collections.deque(maxlen=Scheduler.SAMPLES),
+                    'latency': collections.deque(maxlen=Scheduler.SAMPLES)
+                }
+            loop['steps'] += 1
+            loop['missed'] += missed
+            loop['jitter'].append(abs(jitter))
+            loop['latency'].append(latency)
+
+    """
+    Get the timing of all loops since the last reset.
+
+    :param reset: clear the recorded timing afterwards
+    :returns:     steps, missed deadlines and jitter and latency percentiles in milliseconds by loop
+    """
+
+    def stats(self, reset=False):
+        with self.__lock:
+            stats = {}
+            for name, loop in self.__loops.items():
+                if loop['steps'] == 0:
+                    continue
+                stats[name] = {
+                    'steps': loop['steps'],
+                    'missed': loop['missed'],
+                    'jitter_ms': Scheduler.percentiles(loop['jitter']),
+                    'latency_ms': Scheduler.percentiles(loop['latency'])
+                }
+                if reset:
+                    loop['steps'] = 0
+                    loop['missed'] = 0
+                    loop['jitter'].clear()
+                    loop['latency'].clear()
+            return stats
+
+    """
+    Calculate the percentiles of samples in milliseconds.
+
+    :param samples: samples in seconds
+    :returns:       p50, p95, p99 and max of the samples
+    """
+
+    @staticmethod
+    def percentiles(samples):
+        if len(samples) == 0:
+            return {}
+        s = sorted(samples)
+        n = len(s)
+        return {
+            'p50': round(s[int(n * .5)] * 1000, 3),
+            'p95': round(s[min(n - 1, int(n * .95))] * 1000, 3),
+            'p99': round(s[min(n - 1, int(n * .99))] * 1000, 3),
+            'max': round(s[-1] * 1000, 3)
+        }
+
+
+class Rate:
+
+    """
+    Timing of a loop running at a fixed rate on the monotonic clock. The time the
+    step took is subtracted from the sleep, so the period does not drift.
+
+    :param scheduler: Scheduler the timing is recorded in
+    :param name:      name of the loop
+    :param period:    period of the loop in seconds
+    """
+
+    def __init__(self, scheduler, name, period):
+        self.scheduler = scheduler
+        self.name = name
+        self.period = period
+        self.__deadline = time.monotonic()
+        self.__wake = self.__deadline
+
+    """
+    Sleep until the next step of the loop is due. If the step missed its deadline
+    the loop continues immediately and the following deadlines are shifted,
+    missed steps are not caught up.
+    """
+
+    def sleep(self):
+        delay, latency = self.__begin()
+        if delay > 0:
+            time.sleep(delay)
+        self.__end(delay < 0, latency)
+
+    """
+    Same as sleep for loops running as task on an asyncio event loop.
+    """
+
+    async def sleep_async(self):
+        delay, latency = self.__begin()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.__end(delay < 0, latency)
+
+    def __begin(self):
+        now = time.monotonic()
+        latency = now - self.__wake
+        self.__deadline += self.period
+
+        delay = self.__deadline - now
+        if delay < 0:
+            self.__deadline = now
+        return delay, latency
+
+    def __end(self, missed, latency):
+        wake = time.monotonic()
+        jitter = wake - self.__wake - self.period
+        self.__wake = wake
+        self.scheduler.record(self.name, jitter, latency, missed)
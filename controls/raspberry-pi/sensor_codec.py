@@ -0,0 +1,128 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import math
+import struct
+
+
+class SensorCodec:
+    TEXT = 'text'
+    BINARY = 'binary'
+
+    # First byte of binary payloads. The bytes are never valid in UTF-8,
+    # so binary payloads cannot be mistaken for text.
+    POSITION_TAG = 0xC1
+    HEADING_TAG = 0xC0
+
+    # Tag, latitude and longitude
+    POSITION = struct.Struct('<Bdd')
+    # Tag and heading in degrees
+    HEADING = struct.Struct('<Bf')
+
+    """
+    Check if a payload is binary encoded.
+
+    :param payload: received payload
+    :returns:       true if the payload has to be decoded as binary
+    """
+
+    @staticmethod
+    def is_binary(payload):
+        return isinstance(payload, (bytes, bytearray)) and len(payload) > 0 and \
+            payload[0] in (SensorCodec.POSITION_TAG, SensorCodec.HEADING_TAG)
+
+    """
+    Encode a GPS position.
+
+    :param pos: position (lat, lng)
+    :param fmt: SensorCodec.TEXT or SensorCodec.BINARY
+    :returns:   payload
+    """
+
+    @staticmethod
+    def encode_position(pos, fmt=TEXT):
+        if fmt == SensorCodec.BINARY:
+            return SensorCodec.POSITION.pack(SensorCodec.POSITION_TAG, float(pos[0]), float(pos[1]))
+        return f"{pos[0]},{pos[1]}"
+
+    """
+    Encode a heading.
+
+    :param heading: heading in degrees
+    :param fmt:     SensorCodec.TEXT or SensorCodec.BINARY
+    :returns:       payload
+    """
+
+    @staticmethod
+    def encode_heading(heading, fmt=TEXT):
+        if fmt == SensorCodec.BINARY:
+            return SensorCodec.HEADING.pack(SensorCodec.HEADING_TAG, float(heading))
+        return str(heading)
+
+    """
+    Decode a GPS position from a binary or a comma separated text payload.
+    Additional text fields after latitude and longitude are ignored.
+
+    :param payload: received payload
+    :returns:       position [lat, lng] or None if the payload is malformed
+    """
+
+    @staticmethod
+    def decode_position(payload):
+        try:
+            if SensorCodec.is_binary(payload):
+                tag, lat, lng = SensorCodec.POSITION.unpack(payload)
+                if tag != SensorCodec.POSITION_TAG:
+                    return None
+            else:
+                if isinstance(payload, (bytes, bytearray)):
+                    payload = payload.decode('utf-8')
+                fields = payload.split(',', 2)
+                lat, lng = float(fields[0]), float(fields[1])
+        except (struct.error, UnicodeDecodeError, ValueError, IndexError):
+            return None
+
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return None
+        return [lat, lng]
+
+    """
+    Decode a heading from a binary or a text payload.
+
+    :param payload: received payload
+    :returns:       heading in degrees or None if the payload is malformed
+    """
+
+    @staticmethod
+    def decode_heading(payload):
+        try:
+            if SensorCodec.is_binary(payload):
+                tag, heading = SensorCodec.HEADING.unpack(payload)
+                if tag != SensorCodec.HEADING_TAG:
+                    return None
+            else:
+                if isinstance(payload, (bytes, bytearray)):
+                    payload = payload.decode('utf-8')
+                heading = float(payload)
+        except (struct.error, UnicodeDecodeError, ValueError):
+            return None
+
+        if not math.isfinite(heading):
+            return None
+        return heading % 360
+
+    """
+    Decode a binary payload into a value that can be serialized as JSON.
+
+    :param payload: binary payload
+    :returns:       position [lat, lng], heading or None if the payload is malformed
+    """
+
+    @staticmethod
+    def decode(payload):
+        if len(payload) > 0 and payload[0] == SensorCodec.HEADING_TAG:
+            return SensorCodec.decode_heading(payload)
+        return SensorCodec.decode_position(payload)
@@ -0,0 +1,184 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import logging as log
+import os
+import threading
+import time
+
+import serial
+from serial.serialutil import SerialException
+
+from aggregator import TelemetryAggregator
+from config import Config
+from dispatcher import Dispatcher
+from fusion import GpsFusion
+from gps import Gps
+from mqtt import Mqtt
+from sensor_codec import SensorCodec
+from sensor_state import SensorState
+from thread_handler import start_thread
+from topics import Topics
+
+# Timeout for reading from the Dragino in seconds
+SERIAL_TIMEOUT = .5
+# Interval of checking if the control process is still running in seconds
+PARENT_CHECK_INTERVAL = 1
+
+
+class SensorProcess:
+
+    """
+    Sensor ingestion of the AUGIS. The GPS devices and the heading sensor are fused
+    and the estimate is published to the shared SensorState after every update.
+
+    :param state: SensorState the estimate is published to
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.fusion = GpsFusion()
+        # Monotonic time and position of the last fix by source
+        self.fixes = {}
+        self.heading = None
+        self.heading_time = None
+        # The state has a single writer, the handlers run in the MQTT and the Dragino thread
+        self.__lock = threading.Lock()
+
+    """
+    Create the dispatcher with the handlers of the sensor topics.
+
+    :returns: dispatcher with all routes registered
+    """
+
+    def create_dispatcher(self):
+        d = Dispatcher(workers=0)
+        d.route(Topics.RTK_ROVER_EVENT, self.on_rtk_event)
+        d.route(Topics.SENSOR_GPS_ALL, self.on_sensor_gps)
+        d.route(Topics.SENSOR_HEADING, self.on_sensor_heading)
+        return d
+
+    def on_rtk_event(self, topic, payload):
+        pos = SensorCodec.decode_position(payload)
+        if pos is None:
+            log.error(f"Could not read RTK data: {payload}")
+            return
+        self.update_gps(Gps.RTK, pos)
+
+    def on_sensor_gps(self, topic, payload):
+        t = topic.split('/')[-1]
+        pos = SensorCodec.decode_position(payload)
+        if pos is None or t not in GpsFusion.NOISE:
+            log.error(f"Could not read GPS data on topic: {topic}, Payload: {payload}")
+            return
+        self.update_gps(t, pos)
+
+    def on_sensor_heading(self, topic, payload):
+        h = SensorCodec.decode_heading(payload)
+        if h is None:
+            log.error(f"Could not read heading: {payload}")
+            return
+        with self.__lock:
+            self.heading = h
+            self.heading_time = time.monotonic()
+            self.fusion.update_heading(h, self.heading_time)
+            self.__publish()
+
+    """
+    Add a GPS fix of a source and publish the new estimate.
+
+    :param source: GPS source (Gps.RTK, Gps.PHONE, Gps.DRG)
+    :param pos:    position of the fix
+    """
+
+    def update_gps(self, source, pos):
+        with self.__lock:
+            now = time.monotonic()
+            # Failsafe D of the control process drops the estimate when no source is current
+            if all(now - t > Gps.WAIT for t, _ in self.fixes.values()):
+                self.fusion.reset()
+            self.fixes[source] = (now, pos)
+            self.fusion.update_gps(source, pos, now)
+            self.__publish()
+
+    def __publish(self):
+        self.state.publish(self.fusion, self.fixes, self.heading, self.heading_time)
+
+
+"""
+Callback method if the subscription receive a message.
+
+:param dispatcher: Dispatcher of the sensor topics
+:param msg:        The message itself with topic and payload inside
+"""
+
+
+def on_message(dispatcher, msg):
+    payload = msg.payload
+
+    # Binary sensor payloads are passed on undecoded
+    if type(payload) is bytes and not SensorCodec.is_binary(payload):
+        payload = payload.decode('utf-8', errors='replace')
+
+    dispatcher.dispatch(msg.topic, payload)
+
+
+def on_connect(c, userdata, flags, rc):
+    log.info(f"Sensor process connected to MQTT Broker on {Config.DOMAIN}:{Config.PORT}")
+    c.sub(Topics.RTK_ROVER_EVENT)
+    c.sub(Topics.SENSOR_GPS_ALL)
+    c.sub(Topics.SENSOR_HEADING)
+
+
+"""
+Exit when the control process is gone, the sensor process is not needed without it.
+
+:param parent: process id of the control process
+"""
+
+
+def parent_thread(parent):
+    while os.getppid() == parent:
+        time.sleep(PARENT_CHECK_INTERVAL)
+    log.warning('Control process is gone, stopping sensor process.')
+    os._exit(0)
+
+
+"""
+Entry point of the sensor process.
+
+:param name:   name of the shared memory of the SensorState
+:param parent: process id of the control process
+:param fmt:    encoding of the published Dragino positions (SensorCodec.TEXT or SensorCodec.BINARY)
+:param window: window of the telemetry frames in seconds
+:param legacy: also publish the Dragino positions on their own topic
+"""
+
+
+def run(name, parent, fmt=SensorCodec.TEXT, window=TelemetryAggregator.WINDOW, legacy=False):
+    log.basicConfig(filename='sensor.log', format='%(asctime)s %(levelname)s %(message)s',
+                    datefmt='%m/%d/%Y %H:%M:%S', level=log.INFO)
+    start_thread(parent_thread, (parent,))
+
+    sensors = SensorProcess(SensorState(name))
+    dispatcher = sensors.create_dispatcher()
+
+    client = Mqtt()
+    client.on_connect = on_connect
+    client.on_message = lambda c, userdata, msg: on_message(dispatcher, msg)
+    client.connect_to_client(Config.DOMAIN, Config.PORT, keepalive=3)
+
+    # The Dragino fixes are published in the telemetry frames and delivered directly to the dispatcher
+    uplink = TelemetryAggregator(client, window, legacy, dispatcher.dispatch, Topics.INFO_TELEMETRY_SENSORS)
+
+    try:
+        serial_drg = serial.Serial(Config.SERIAL_PORT_DRG, baudrate=Config.BAUDRATE, timeout=SERIAL_TIMEOUT)
+        start_thread(Gps.gps_reader, (serial_drg, uplink, fmt,))
+    except SerialException as ex:
+        log.error(f"Sensor process could not connect on Serial Port: {Config.SERIAL_PORT_DRG}, Stacktrace {ex}")
+        client.pub(Topics.ERROR_CONN, f"Raspberry Pi could not connect on Serial Port: {Config.SERIAL_PORT_DRG}")
+
+    client.loop_forever()
@@ -0,0 +1,166 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import math
+import time
+
+from fusion import GpsFusion
+from gps import Gps, LocalFrame
+from shared_state import SharedState
+
+
+class SensorState:
+    # GPS sources in the order they are stored
+    SOURCES = (Gps.RTK, Gps.PHONE, Gps.DRG)
+    # Time, position, velocity and standard deviations of the estimate, heading and its time,
+    # time and position of the last fix and number of fixes of every source
+    FORMAT = '<7d2d9d3Q'
+
+    """
+    Fused sensor state in shared memory. The sensor process publishes the estimate
+    of its GpsFusion after every update, the control process reads it without locking
+    through the same interface as GpsFusion. Unknown values are stored as NaN.
+
+    :param name: name of the shared memory to attach to, None to create it
+    """
+
+    def __init__(self, name=None):
+        self.shared = SharedState(SensorState.FORMAT, name)
+
+    @property
+    def name(self):
+        return self.shared.name
+
+    def close(self):
+        self.shared.close()
+
+    """
+    Remove the shared memory, only called by the process that created it.
+    """
+
+    def unlink(self):
+        self.shared.unlink()
+
+    """
+    Publish the estimate of a fusion. Only called by the sensor process.
+
+    :param fusion:       GpsFusion with the current estimate
+    :param fixes:        monotonic time and position of the last fix by source
+    :param heading:      last heading of the heading sensor, None if there is none
+    :param heading_time: monotonic time of the heading
+    """
+
+    def publish(self, fusion, fixes, heading=None, heading_time=None):
+        t = time.monotonic()
+        pos = fusion.position(t) or (math.nan, math.nan)
+        stats = fusion.stats()
+        values = [t, pos[Gps.LAT], pos[Gps.LNG], *fusion.velocity(), stats['pos_std'], stats['speed_std'],
+                  math.nan if heading is None else heading, math.nan if heading_time is None else heading_time]
+        for source in SensorState.SOURCES:
+            fix_time, fix = fixes.get(source, (math.nan, (math.nan, math.nan)))
+            values += [fix_time, fix[Gps.LAT], fix[Gps.LNG]]
+        values += [stats['updates'][source] for source in SensorState.SOURCES]
+        self.shared.write(*values)
+
+    """
+    Read the published state.
+
+    :returns: dictionary with the state and its sequence number, None if nothing was published yet
+    """
+
+    def read(self):
+        result = self.shared.read()
+        if result is None:
+            return None
+        seq, v = result
+
+        fixes = {}
+        for i, source in enumerate(SensorState.SOURCES):
+            t, lat, lng = v[9 + 3 * i:12 + 3 * i]
+            fixes[source] = (None, None) if math.isnan(t) else (t, [lat, lng])
+        return {
+            'seq': seq,
+            'time': v[0],
+            'pos': None if math.isnan(v[1]) else (v[1], v[2]),
+            'velocity': (v[3], v[4]),
+            'pos_std': v[5],
+            'speed_std': v[6],
+            'heading': None if math.isnan(v[7]) else v[7],
+            'heading_time': None if math.isnan(v[8]) else v[8],
+            'fixes': fixes,
+            'updates': dict(zip(SensorState.SOURCES, v[18:21]))
+        }
+
+    """
+    Get the estimated position, dead reckoned from the published estimate.
+
+    :param t: monotonic time of the estimate, now if None
+    :returns: position (lat, lng) or None if there is no estimate
+    """
+
+    def position(self, t=None):
+        state = self.read()
+        if state is None or state['pos'] is None:
+            return None
+        t = time.monotonic() if t is None else t
+        dt = max(0, t - state['time'])
+        ve, vn = state['velocity']
+        return LocalFrame(state['pos']).to_gps(ve * dt, vn * dt)
+
+    """
+    Get the estimated velocity.
+
+    :returns: east and north speed in m/s
+    """
+
+    def velocity(self):
+        state = self.read()
+        return (0, 0) if state is None else state['velocity']
+
+    def course(self):
+        return GpsFusion.course_of(*self.velocity())
+
+    """
+    Get the heading of the AUGIS. The heading sensor is used as long as it is
+    current, otherwise the course over ground.
+
+    :returns: heading in degrees (0-360) or None if it is unknown
+    """
+
+    def heading(self):
+        state = self.read()
+        if state is None:
+            return None
+        if state['heading_time'] is not None and time.monotonic() - state['heading_time'] <= Gps.WAIT:
+            return state['heading']
+        return GpsFusion.course_of(*state['velocity'])
+
+    def speed(self, heading=None):
+        return GpsFusion.speed_of(*self.velocity(), heading)
+
+    """
+    The sensor process starts a new estimate by itself when all sources were stale.
+    """
+
+    def reset(self):
+        pass
+
+    """
+    Get the counters and uncertainty of the published estimate.
+
+    :returns: fixes by source, standard deviation of position and speed and retried reads
+    """
+
+    def stats(self):
+        state = self.read()
+        if state is None:
+            return {'retries': self.shared.retries}
+        return {
+            'updates': state['updates'],
+            'pos_std': state['pos_std'],
+            'speed_std': state['speed_std'],
+            'retries': self.shared.retries
+        }
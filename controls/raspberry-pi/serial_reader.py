@@ -0,0 +1,120 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import logging as log
+import threading
+
+from serial.serialutil import SerialException
+
+from protocol import Decoder
+
+
+class SerialReader:
+    # Time to wait for a serial connection in seconds
+    IDLE_WAIT = .1
+
+    def __init__(self, s=None):
+        self.serial = s
+        self.failed = False
+        self.on_error = None
+        self.__subscribers = {}
+        self.__decoder = Decoder()
+        self.__cond = threading.Condition()
+        # Port the reader thread is blocked on
+        self.__reading = None
+
+        self.__thread = threading.Thread(target=self.__read_loop, name='serial-reader')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    """
+    Replace the serial connection. Returns when the reader thread has left
+    the replaced port, so it can be closed afterwards.
+
+    :param s: serial connection, None if not connected
+    """
+
+    def set_serial(self, s):
+        with self.__cond:
+            old = self.serial
+            self.serial = s
+            self.failed = False
+            self.__decoder = Decoder()
+            self.__cond.notify_all()
+            while old is not None and old is not s and self.__reading is old:
+                old.cancel_read()
+                self.__cond.wait(SerialReader.IDLE_WAIT)
+
+    """
+    Subscribe to commands with the given prefix. The callback is executed
+    in the reader thread and should return quickly.
+
+    :param prefix:   Prefix of the commands
+    :param callback: Function called with the received command
+    """
+
+    def subscribe(self, prefix, callback):
+        with self.__cond:
+            self.__subscribers.setdefault(prefix, []).append(callback)
+
+    """
+    Get the counters of the decoder.
+
+    :returns: frames with invalid checksum and frames lost according to the sequence numbers
+    """
+
+    def stats(self):
+        return {
+            'crc_errors': self.__decoder.crc_errors,
+            'lost': self.__decoder.lost
+        }
+
+    def __read_loop(self):
+        while True:
+            with self.__cond:
+                while self.serial is None or self.failed:
+                    self.__cond.wait(SerialReader.IDLE_WAIT)
+                s = self.__reading = self.serial
+                decoder = self.__decoder
+
+            try:
+                # Block for the first byte, then take everything that has arrived
+                data = s.read(max(1, s.in_waiting))
+            except SerialException as ex:
+                log.error(f"Raspberry Pi could not read from Serial USB connection, Stacktrace {ex}")
+                self.__fail(s)
+                continue
+            finally:
+                with self.__cond:
+                    self.__reading = None
+                    self.__cond.notify_all()
+
+            if not data:
+                # Read timed out
+                continue
+
+            for cmd in decoder.feed(data):
+                self.__publish(cmd)
+
+    def __publish(self, cmd):
+        with self.__cond:
+            callbacks = list(self.__subscribers.get(cmd.get_prefix(), ()))
+
+        for callback in callbacks:
+            try:
+                callback(cmd)
+            except Exception as ex:
+                log.exception(f"Subscriber for serial command {cmd.get_prefix()} failed, Stacktrace {ex}")
+
+    def __fail(self, s):
+        with self.__cond:
+            # Ignore errors from a connection that was already replaced
+            if self.serial is not s:
+                return
+            self.failed = True
+
+        if self.on_error is not None:
+            self.on_error()
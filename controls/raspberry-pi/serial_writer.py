@@ -0,0 +1,119 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import collections
+import logging as log
+import threading
+import time
+
+from serial.serialutil import SerialException
+
+import thread_handler as th
+from protocol import Protocol
+
+
+class SerialWriter:
+    # Commands where only the latest value has to be sent
+    COALESCE = ('engine',)
+
+    def __init__(self, s=None):
+        self.serial = s
+        self.protocol = Protocol.TEXT
+        self.__seq = 0
+        self.__cond = threading.Condition()
+        self.__queue = collections.deque()
+        # Pending coalescable commands by prefix
+        self.__pending = {}
+        self.__written = 0
+        self.__coalesced = 0
+        self.__failed = 0
+        self.__latency_total = 0.0
+        self.__latency_max = 0.0
+
+        self.__thread = threading.Thread(target=self.__write_loop, name='serial-writer')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def set_serial(self, s):
+        with th.locks["serial_lock"]:
+            self.serial = s
+            # A new connection always starts with the text protocol
+            self.protocol = Protocol.TEXT
+
+    def set_protocol(self, protocol):
+        with th.locks["serial_lock"]:
+            self.protocol = protocol
+
+    """
+    Queue a command to be sent to the Arduino. A coalescable command replaces
+    a not yet sent command with the same prefix and keeps its position in the queue.
+
+    :param prefix:  The name of the message
+    :param value:   The payload of the message
+    """
+
+    def send(self, prefix, value):
+        with self.__cond:
+            entry = self.__pending.get(prefix)
+            if entry is not None:
+                entry[1] = value
+                self.__coalesced += 1
+                return
+
+            entry = [prefix, value, time.perf_counter()]
+            if prefix in SerialWriter.COALESCE:
+                self.__pending[prefix] = entry
+            self.__queue.append(entry)
+            self.__cond.notify()
+
+    """
+    Get the counters of the writer.
+
+    :returns: written, coalesced and failed commands and write latency in milliseconds
+    """
+
+    def stats(self):
+        with self.__cond:
+            return {
+                'written': self.__written,
+                'coalesced': self.__coalesced,
+                'failed': self.__failed,
+                'queued': len(self.__queue),
+                'avg_latency_ms': self.__latency_total / self.__written * 1000 if self.__written > 0 else 0,
+                'max_latency_ms': self.__latency_max * 1000
+            }
+
+    def __write_loop(self):
+        while True:
+            with self.__cond:
+                while len(self.__queue) == 0:
+                    self.__cond.wait()
+                prefix, value, queued = entry = self.__queue.popleft()
+                if self.__pending.get(prefix) is entry:
+                    del self.__pending[prefix]
+
+            written = self.__write(prefix, value)
+
+            latency = time.perf_counter() - queued
+            with self.__cond:
+                if written:
+                    self.__written += 1
+                    self.__latency_total += latency
+                    self.__latency_max = max(self.__latency_max, latency)
+                else:
+                    self.__failed += 1
+
+    def __write(self, prefix, value):
+        with th.locks["serial_lock"]:
+            if self.serial is None:
+                return False
+            self.__seq = (self.__seq + 1) & 0xFF
+            try:
+                self.serial.write(Protocol.encode(self.protocol, prefix, value, self.__seq))
+                return True
+            except SerialException as ex:
+                log.error(f"Raspberry Pi could not write on Serial USB connection, Stacktrace {ex}")
+                return False
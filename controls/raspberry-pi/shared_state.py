@@ -0,0 +1,88 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import struct
+import time
+import zlib
+from multiprocessing import shared_memory
+
+
+class SharedState:
+    # Sequence number and checksum in front of the values
+    HEADER = struct.Struct('<QI')
+    # Reads retried before a read gives up, only happens if the writer died while writing
+    MAX_RETRIES = 1000
+
+    """
+    Fixed layout struct in shared memory, written by one process and read by others
+    without locking. The struct is protected by a seqlock: the sequence number is odd
+    while the writer changes the values, a reader retries if the number was odd or
+    changed during the read. The checksum of the values is checked as well, so a read
+    torn by reordered memory accesses is never returned.
+
+    :param fmt:  struct format of the values
+    :param name: name of the shared memory to attach to, None to create it
+    """
+
+    def __init__(self, fmt, name=None):
+        self.values = struct.Struct(fmt)
+        size = SharedState.HEADER.size + self.values.size
+        # The shared memory can be larger than requested on some systems
+        self.__shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.__buf = self.__shm.buf
+        self.__seq = 0
+        self.retries = 0
+        if name is None:
+            SharedState.HEADER.pack_into(self.__buf, 0, 0, 0)
+
+    @property
+    def name(self):
+        return self.__shm.name
+
+    """
+    Write the values. Only one process and thread may write.
+
+    :param values: values in the order of the struct format
+    """
+
+    def write(self, *values):
+        data = self.values.pack(*values)
+        seq = self.__seq + 1
+        # Odd sequence number marks the values as being written
+        struct.pack_into('<Q', self.__buf, 0, seq)
+        self.__buf[SharedState.HEADER.size:SharedState.HEADER.size + len(data)] = data
+        struct.pack_into('<I', self.__buf, 8, zlib.crc32(data))
+        self.__seq = seq + 1
+        struct.pack_into('<Q', self.__buf, 0, self.__seq)
+
+    """
+    Read the values.
+
+    :returns: sequence number and tuple of the values or None if nothing was written yet
+    """
+
+    def read(self):
+        start = SharedState.HEADER.size
+        end = start + self.values.size
+        for i in range(SharedState.MAX_RETRIES):
+            seq, crc = SharedState.HEADER.unpack_from(self.__buf, 0)
+            if seq == 0:
+                return None
+            if seq % 2 == 0:
+                data = bytes(self.__buf[start:end])
+                if struct.unpack_from('<Q', self.__buf, 0)[0] == seq and zlib.crc32(data) == crc:
+                    return seq, self.values.unpack(data)
+            self.retries += 1
+            # Let the writer finish
+            time.sleep(0)
+        return None
+
+    def close(self):
+        self.__buf = None
+        self.__shm.close()
+
+    def unlink(self):
+        self.__shm.unlink()
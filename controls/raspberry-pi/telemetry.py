@@ -0,0 +1,204 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import logging as log
+import math
+import os
+import queue
+import struct
+import threading
+import time
+from datetime import datetime as dt
+
+
+class TelemetryLogger:
+    # Formats of the data file
+    TEXT = 'text'
+    BINARY = 'binary'
+
+    # Never fsync, leave it to the operating system
+    FSYNC_NEVER = 'never'
+    # Fsync after every written batch
+    FSYNC_BATCH = 'batch'
+    # Fsync at most once per fsync interval
+    FSYNC_INTERVAL = 'interval'
+
+    # Maximum time a record waits in memory in seconds
+    FLUSH_INTERVAL = 1
+    # Number of records that trigger a write
+    FLUSH_SIZE = 50
+    FSYNC_WAIT = 10
+    QUEUE_SIZE = 5000
+
+    # Binary file header: magic, version, record size, epoch time of monotonic clock zero
+    MAGIC = b'AUGT'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHHd')
+    # Binary record: monotonic time, lat, lng, heading, speed, target lat, target lng,
+    # left engine, right engine, event code, padding, three event arguments
+    RECORD = struct.Struct('<dddffddbbBx3f')
+    ARGS = 3
+
+    # Event codes of the binary format, unknown events are stored as 0
+    EVENTS = {
+        'throttle': 1,
+        'turn_to_on_spot': 2,
+        'turn_to': 3,
+        'halt': 4,
+        'autonomous': 5,
+        'Started autonomous drive': 6,
+        'End autonomous drive': 7,
+        'follow_path': 8,
+        'mission': 9,
+        # Timing of a control loop without own event code, the loop name is only kept in the text format
+        'timing': 10,
+        # Timing of the control loops of the Scheduler
+        'timing_stop_and_turn': 11,
+        'timing_follow_path': 12,
+        'timing_turn_to_on_spot': 13,
+        'timing_turn_to': 14,
+        'timing_halt': 15
+    }
+
+    def __init__(self, fn, fmt=TEXT, flush_interval=FLUSH_INTERVAL, flush_size=FLUSH_SIZE, fsync=FSYNC_INTERVAL,
+                 fsync_interval=FSYNC_WAIT, queue_size=QUEUE_SIZE):
+        self.fn = fn
+        self.fmt = fmt
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.written = 0
+        self.dropped = 0
+        self.__queue = queue.Queue(maxsize=queue_size)
+        # Offset to convert monotonic times of the records to epoch times
+        self.__epoch = time.time() - time.monotonic()
+        self.__last_fsync = time.monotonic()
+
+        if fmt == TelemetryLogger.BINARY:
+            self.__file = open(fn, 'ab')
+            if self.__file.tell() == 0:
+                self.__file.write(TelemetryLogger.HEADER.pack(TelemetryLogger.MAGIC, TelemetryLogger.VERSION,
+                                                              TelemetryLogger.RECORD.size, self.__epoch))
+                # A file without records can be read as well
+                self.__file.flush()
+            self.__format = self.__format_binary
+            self.__join = b''.join
+        else:
+            self.__file = open(fn, 'a')
+            self.__format = self.__format_text
+            self.__join = ''.join
+
+        self.__thread = threading.Thread(target=self.__write_loop, name='telemetry-logger')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    """
+    Queue a record to be written to the data file. Never blocks, the record
+    is dropped and counted if the queue is full.
+
+    :param record: tuple of monotonic time, position, heading, speed, target,
+                   left and right engine followed by the event and its arguments
+    :returns:      true if the record was queued
+    """
+
+    def log(self, record):
+        try:
+            self.__queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    """
+    Get the counters of the logger.
+
+    :returns: written, dropped and queued records
+    """
+
+    def stats(self):
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'queued': self.__queue.qsize()
+        }
+
+    """
+    Format a record as line of the text data file.
+
+    :param record: tuple of values
+    :returns:      formatted line
+    """
+
+    def __format_text(self, record):
+        values = (dt.fromtimestamp(self.__epoch + record[0]),) + record[1:]
+        return ' '.join(str(v) for v in values) + ' \n'
+
+    """
+    Pack a record into the fixed size binary format.
+
+    :param record: tuple of values
+    :returns:      packed record
+    """
+
+    def __format_binary(self, record):
+        t, pos, heading, speed, target, eng_l, eng_r = record[:7]
+        data = record[7:]
+
+        event = 0
+        if len(data) > 0:
+            event = TelemetryLogger.EVENTS.get(data[0], 0)
+            data = data[1:]
+        args = [TelemetryLogger.__float(v) for v in data[:TelemetryLogger.ARGS]]
+        args += [math.nan] * (TelemetryLogger.ARGS - len(args))
+
+        if pos is None:
+            pos = (math.nan, math.nan)
+        if target is None:
+            target = (math.nan, math.nan)
+
+        return TelemetryLogger.RECORD.pack(t, pos[0], pos[1], TelemetryLogger.__float(heading),
+                                           TelemetryLogger.__float(speed), target[0], target[1], int(eng_l),
+                                           int(eng_r), event, *args)
+
+    @staticmethod
+    def __float(v):
+        try:
+            return float(v)
+        except (TypeError, ValueError):
+            return math.nan
+
+    def __write_loop(self):
+        while True:
+            batch = [self.__queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            # Collect records until the batch is full or the oldest record waited long enough
+            while len(batch) < self.flush_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.__queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            self.__write(batch)
+
+    def __write(self, batch):
+        try:
+            self.__file.write(self.__join([self.__format(r) for r in batch]))
+            self.__file.flush()
+
+            now = time.monotonic()
+            if self.fsync == TelemetryLogger.FSYNC_BATCH or \
+                    (self.fsync == TelemetryLogger.FSYNC_INTERVAL and now - self.__last_fsync >= self.fsync_interval):
+                os.fsync(self.__file.fileno())
+                self.__last_fsync = now
+
+            self.written += len(batch)
+        except (OSError, struct.error) as err:
+            log.error(f"Could not write telemetry to file: {self.fn}, Stacktrace {err}")
@@ -0,0 +1,107 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import paho.mqtt.client as paho
+import pytest
+
+# mqtt.py reads the broker settings from config.py, which only exists on the boat
+pytest.importorskip('config')
+
+from mqtt import Mqtt, OfflineQueue  # noqa: E402
+
+
+def drain(queue):
+    messages = []
+    while True:
+        msg = queue.pop()
+        if msg is None:
+            return messages
+        messages.append(msg)
+
+
+def test_priorities_in_order():
+    queue = OfflineQueue()
+    queue.put(2, 'c', '1', 1, False)
+    queue.put(0, 'a', '2', 1, False)
+    queue.put(2, 'c', '3', 1, True)
+    queue.put(1, 'b', '4', 0, False)
+
+    assert drain(queue) == [('a', '2', 1, False), ('b', '4', 0, False), ('c', '1', 1, False), ('c', '3', 1, True)]
+
+
+def test_drop_without_spill_file():
+    queue = OfflineQueue(memory_size=2)
+    for i in range(3):
+        queue.put(1, 't', str(i), 1, False)
+
+    assert [m[1] for m in drain(queue)] == ['0', '1']
+    assert queue.stats()['dropped'] == 1
+
+
+def test_spill_keeps_order(tmp_path):
+    queue = OfflineQueue(str(tmp_path / 'queue'), memory_size=2)
+    for i in range(5):
+        queue.put(1, 't', str(i), 1, False)
+    # Memory is full, the next messages of a spilled priority go to the file as well
+    queue.pop()
+    queue.put(1, 't', '5', 1, False)
+
+    assert queue.stats()['spilled'] == 4
+    assert len(queue) == 5
+    assert [m[1] for m in drain(queue)] == ['1', '2', '3', '4', '5']
+    assert queue.stats()['spill_bytes'] == 0
+
+
+def test_spill_binary_and_retain(tmp_path):
+    queue = OfflineQueue(str(tmp_path / 'queue'), memory_size=0)
+    queue.put(0, 'bin', b'\x00\xff', 2, True)
+    queue.put(0, 'text', 'ä', 1, False)
+
+    assert drain(queue) == [('bin', b'\x00\xff', 2, True), ('text', 'ä', 1, False)]
+
+
+def test_spill_recovered_after_restart(tmp_path):
+    fn = str(tmp_path / 'queue')
+    queue = OfflineQueue(fn, memory_size=0)
+    queue.put(1, 'b', '1', 1, False)
+    queue.put(0, 'a', '2', 1, False)
+    queue.put(1, 'b', '3', 1, False)
+    # A record that was only partially written when the process stopped
+    with open(f"{fn}.1", 'ab') as f:
+        f.write(OfflineQueue.RECORD.pack(1, 1, 0, 1, 10) + b'b12')
+
+    restarted = OfflineQueue(fn, memory_size=0)
+
+    assert len(restarted) == 3
+    assert [m[1] for m in drain(restarted)] == ['2', '1', '3']
+
+
+def test_spill_size_limit(tmp_path):
+    record = OfflineQueue.RECORD.size + len('t') + len('0')
+    queue = OfflineQueue(str(tmp_path / 'queue'), memory_size=0, spill_size=2 * record)
+    for i in range(3):
+        queue.put(1, 't', str(i), 1, False)
+
+    assert queue.stats()['dropped'] == 1
+    assert [m[1] for m in drain(queue)] == ['0', '1']
+
+
+def test_push_front_is_sent_first(tmp_path):
+    queue = OfflineQueue(str(tmp_path / 'queue'), memory_size=0)
+    queue.put(1, 't', '1', 1, False)
+    queue.put(1, 't', '2', 1, False)
+
+    # The first message could not be sent and is put back
+    topic, payload, qos, retain = queue.pop()
+    queue.push_front(1, topic, payload, qos, retain)
+
+    assert [m[1] for m in drain(queue)] == ['1', '2']
+
+
+def test_kept_by_client():
+    assert Mqtt.kept_by_client(paho.MQTT_ERR_NO_CONN, 1)
+    assert not Mqtt.kept_by_client(paho.MQTT_ERR_NO_CONN, 0)
+    assert not Mqtt.kept_by_client(paho.MQTT_ERR_SUCCESS, 1)
@@ -0,0 +1,101 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import pickle
+
+import pytest
+from shapely.geometry.polygon import Polygon
+
+from gps import Gps
+from planner import RoutePlan, VisibilityGraph, plan_route
+
+ORIGIN = (47.0, 7.0)
+SCALE = .001
+
+
+def p(x, y):
+    return ORIGIN[0] + x * SCALE, ORIGIN[1] + y * SCALE
+
+
+# U shaped lake, the two arms are separated by a notch from (1, 1) to (2, 3)
+U = Polygon([p(0, 0), p(3, 0), p(3, 3), p(2, 3), p(2, 1), p(1, 1), p(1, 3), p(0, 3)])
+
+
+def test_reflex_vertices():
+    assert sorted(v[1] for v in VisibilityGraph.reflex_vertices(U)) == sorted([p(1, 1), p(2, 1)])
+
+
+def test_straight_path():
+    graph = VisibilityGraph(U)
+
+    assert graph.find_path(p(.5, .5), p(2.5, .5)) == [p(2.5, .5)]
+
+
+def test_path_around_notch():
+    graph = VisibilityGraph(U)
+
+    path = graph.find_path(p(.5, 2.5), p(2.5, 2.5))
+
+    assert path == [pytest.approx(p(1, 1)), pytest.approx(p(2, 1)), p(2.5, 2.5)]
+
+
+def test_path_around_obstacle():
+    square = Polygon([p(0, 0), p(4, 0), p(4, 4), p(0, 4)])
+    obstacle = Polygon([p(1.5, 1), p(2.5, 1), p(2.5, 3.5), p(1.5, 3.5)])
+    graph = VisibilityGraph(square.difference(obstacle))
+
+    path = graph.find_path(p(1, 3), p(3, 3))
+
+    # Shorter way around the top of the obstacle
+    assert path == [pytest.approx(p(1.5, 3.5)), pytest.approx(p(2.5, 3.5)), p(3, 3)]
+
+
+def test_no_path():
+    graph = VisibilityGraph(U)
+
+    assert graph.find_path(p(.5, .5), p(5, 5)) is None
+
+
+def test_pickled_graph_finds_path():
+    graph = pickle.loads(pickle.dumps(VisibilityGraph(U)))
+
+    assert len(graph.find_path(p(.5, 2.5), p(2.5, 2.5))) == 3
+
+
+def test_plan_route_without_lake():
+    plan = plan_route(None, [p(0, 0), p(1, 0), p(1, 1)])
+
+    assert plan.start == p(0, 0)
+    assert plan.waypoints == [p(1, 0), p(1, 1)]
+    assert plan.length == pytest.approx(sum(plan.lengths))
+    assert plan.lengths[0] == pytest.approx(Gps.get_distance(p(0, 0), p(1, 0)))
+
+
+def test_plan_route_empty():
+    assert plan_route(None, []) is None
+
+
+def test_lookahead_without_frame(monkeypatch):
+    monkeypatch.setattr(Gps, 'frame', None)
+    plan = RoutePlan(p(0, 0), [p(1, 0), p(2, 0)])
+
+    assert plan.lookahead(p(0, 0), 0, 10) == (0, p(1, 0))
+
+
+def test_lookahead_moves_along_path(monkeypatch):
+    monkeypatch.setattr(Gps, 'frame', None)
+    Gps.set_origin(p(0, 0))
+    plan = RoutePlan(p(0, 0), [p(1, 0), p(1, 1)])
+    leg = Gps.get_distance(p(0, 0), p(1, 0))
+
+    index, target = plan.lookahead(p(0, 0), 0, leg / 2)
+    assert index == 0
+    assert Gps.get_distance(p(0, 0), target) == pytest.approx(leg / 2, rel=1e-3)
+
+    # Close to the first waypoint the lookahead point lies on the next segment
+    index, target = plan.lookahead(p(.9, 0), 0, leg / 2)
+    assert index == 1
+    assert target[1] > p(1, 0)[1]
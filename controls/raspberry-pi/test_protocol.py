@@ -0,0 +1,86 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+from protocol import Decoder, Protocol
+
+
+def decode(decoder, data):
+    return [(c.get_prefix(), c.get_data()) for c in decoder.feed(data)]
+
+
+def test_crc8_check_value():
+    # Check value of CRC-8 with polynomial 0x07 and initial value 0
+    assert Protocol.crc8(b'123456789') == 0xF4
+    assert Protocol.crc8(b'') == 0
+
+
+def test_encode_text():
+    assert Protocol.encode(Protocol.TEXT, 'engine', (10, -10)) == b'engine: 10,-10\n'
+    assert Protocol.encode(Protocol.TEXT, 'mode', 'auto') == b'mode: auto\n'
+
+
+def test_encode_binary_frame():
+    frame = Protocol.encode(Protocol.BINARY, 'engine', (10, -10), 7)
+
+    assert frame[:3] == bytes((Protocol.SYNC, Protocol.ENGINE, 7))
+    assert len(frame) == Protocol.HEADER.size + 2 + 1
+    assert frame[-1] == Protocol.crc8(frame[1:-1])
+
+
+def test_encode_binary_falls_back_to_text():
+    assert Protocol.encode(Protocol.BINARY, 'hello', 'world') == b'hello: world\n'
+    # Values out of range of the payload are sent as text as well
+    assert Protocol.encode(Protocol.BINARY, 'engine', (200, 0)) == b'engine: 200,0\n'
+
+
+def test_decode_binary_round_trip():
+    data = Protocol.encode(Protocol.BINARY, 'engine', '10,-10', 1) + \
+           Protocol.encode(Protocol.BINARY, 'mode', 'emergency', 2) + \
+           Protocol.encode(Protocol.BINARY, 'conn', 'arduino', 3)
+
+    assert decode(Decoder(), data) == [('engine', (10, -10)), ('mode', 'emergency'), ('conn', 'arduino')]
+
+
+def test_decode_mixed_text_and_frames():
+    decoder = Decoder()
+    data = b'mode: auto\n' + Protocol.encode(Protocol.BINARY, 'engine', (1, 2), 1) + b'conn: arduino\n'
+
+    assert decode(decoder, data) == [('mode', 'auto'), ('engine', (1, 2)), ('conn', 'arduino')]
+
+
+def test_decode_split_frame():
+    decoder = Decoder()
+    frame = Protocol.encode(Protocol.BINARY, 'engine', (5, 6), 1)
+
+    assert decode(decoder, frame[:2]) == []
+    assert decode(decoder, frame[2:4]) == []
+    assert decode(decoder, frame[4:]) == [('engine', (5, 6))]
+
+
+def test_decode_crc_error_resyncs():
+    decoder = Decoder()
+    bad = bytearray(Protocol.encode(Protocol.BINARY, 'engine', (5, 6), 1))
+    bad[-1] ^= 0xFF
+    good = Protocol.encode(Protocol.BINARY, 'engine', (7, 8), 2)
+
+    assert decode(decoder, bytes(bad) + good) == [('engine', (7, 8))]
+    assert decoder.crc_errors == 1
+
+
+def test_decode_counts_lost_frames():
+    decoder = Decoder()
+    decode(decoder, Protocol.encode(Protocol.BINARY, 'mode', 'auto', 254))
+    # Sequence numbers wrap around, 255 and 0 are missing
+    decode(decoder, Protocol.encode(Protocol.BINARY, 'mode', 'auto', 1))
+
+    assert decoder.lost == 2
+
+
+def test_decode_discards_long_line():
+    decoder = Decoder()
+
+    assert decode(decoder, b'x' * (Protocol.MAX_LINE + 1)) == []
+    assert decode(decoder, b'mode: auto\n') == [('mode', 'auto')]
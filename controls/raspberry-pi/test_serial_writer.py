@@ -0,0 +1,79 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import time
+
+import thread_handler as th
+from protocol import Protocol
+from serial_writer import SerialWriter
+
+
+class FakeSerial:
+
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+
+
+def wait_for(condition, timeout=2):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, 'timeout'
+        time.sleep(.001)
+
+
+def test_write_in_order():
+    s = FakeSerial()
+    writer = SerialWriter(s)
+
+    writer.send('mode', 'auto')
+    writer.send('engine', (10, 10))
+    wait_for(lambda: writer.stats()['written'] == 2)
+
+    assert s.written == [b'mode: auto\n', b'engine: 10,10\n']
+
+
+def test_engine_commands_are_coalesced():
+    s = FakeSerial()
+    writer = SerialWriter(s)
+
+    # Block the writer on the serial lock while the first command is written
+    with th.locks['serial_lock']:
+        writer.send('engine', (1, 1))
+        wait_for(lambda: writer.stats()['queued'] == 0)
+        writer.send('engine', (2, 2))
+        writer.send('mode', 'auto')
+        writer.send('engine', (3, 3))
+        writer.send('engine', (4, 4))
+
+    wait_for(lambda: writer.stats()['written'] == 3)
+
+    # The pending engine command keeps its position in front of the mode command
+    assert s.written == [b'engine: 1,1\n', b'engine: 4,4\n', b'mode: auto\n']
+    assert writer.stats()['coalesced'] == 2
+
+
+def test_new_serial_starts_with_text():
+    s = FakeSerial()
+    writer = SerialWriter(s)
+    writer.set_protocol(Protocol.BINARY)
+    writer.set_serial(s)
+
+    writer.send('engine', (1, 1))
+    wait_for(lambda: writer.stats()['written'] == 1)
+
+    assert s.written == [b'engine: 1,1\n']
+
+
+def test_write_without_serial_fails():
+    writer = SerialWriter()
+
+    writer.send('mode', 'auto')
+    wait_for(lambda: writer.stats()['failed'] == 1)
+
+    assert writer.stats()['written'] == 0
@@ -0,0 +1,91 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import numpy as np
+
+from track import TrackStore
+
+# About 11 m between two points
+STEP = .0001
+
+
+def point(i):
+    return 47.0 + i * STEP, 7.0
+
+
+def test_points_in_order():
+    track = TrackStore(capacity=10)
+    for i in range(3):
+        assert track.append(point(i), t=i)
+
+    points, start, end = track.points()
+
+    assert points == [list(point(i)) for i in range(3)]
+    assert (start, end) == (0, 3)
+
+
+def test_ring_buffer_drops_oldest():
+    track = TrackStore(capacity=4)
+    for i in range(7):
+        track.append(point(i), t=i)
+
+    rows, start = track.array()
+
+    assert len(track) == 4
+    assert start == 3
+    assert list(rows[:, 0]) == [3, 4, 5, 6]
+
+
+def test_points_since_sequence_number():
+    track = TrackStore(capacity=4)
+    for i in range(7):
+        track.append(point(i), t=i)
+
+    assert track.points(5) == ([list(point(5)), list(point(6))], 5, 7)
+    # Points that were already dropped are not returned
+    assert track.points(0)[1] == 3
+    assert track.points(7) == ([], 7, 7)
+
+
+def test_close_points_are_skipped():
+    track = TrackStore(capacity=10, min_distance=5)
+
+    assert track.append(point(0))
+    assert not track.append((47.0 + STEP / 10, 7.0))
+    assert not track.append(None)
+
+    assert track.stats() == {'points': 1, 'seq': 1, 'skipped': 1}
+
+
+def test_clear_keeps_sequence_numbers():
+    track = TrackStore(capacity=10)
+    track.append(point(0))
+    track.append(point(1))
+
+    track.clear()
+    track.append(point(2))
+
+    assert track.points() == ([list(point(2))], 2, 3)
+
+
+def test_douglas_peucker():
+    xy = np.array([[0, 0], [1, .1], [2, 0], [3, 5], [4, 0]], dtype=float)
+
+    assert list(TrackStore.douglas_peucker(xy, 1)) == [True, False, True, True, True]
+    assert list(TrackStore.douglas_peucker(xy, 10)) == [True, False, False, False, True]
+
+
+def test_simplified_keeps_corner():
+    track = TrackStore(capacity=100)
+    for i in range(10):
+        track.append(point(i))
+    for i in range(1, 10):
+        track.append((47.0 + 9 * STEP, 7.0 + i * STEP))
+
+    points, seq = track.simplified(1)
+
+    assert points == [list(point(0)), list(point(9)), [47.0 + 9 * STEP, 7.0 + 9 * STEP]]
+    assert seq == 19
@@ -8,13 +8,11 @@ import threading
 
 locks = {
     "print_lock": threading.Lock(),
-    "pub_lock": threading.Lock(),
     "engine_halt_lock": threading.Lock(),
     "engine_reset_lock": threading.Lock(),
     "engine_stop_lock": threading.Lock(),
     "engine_update_lock": threading.Lock(),
-    "serial_lock": threading.Lock(),
-    "serial_read_lock": threading.Lock()
+    "serial_lock": threading.Lock()
 
 }
 
@@ -0,0 +1,246 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import heapq
+import itertools
+import logging as log
+import threading
+import time
+
+from loop_handler import call_in_loop
+
+
+class Timer:
+
+    """
+    Callback scheduled on a Timers service.
+
+    :param callback: function called when the deadline is reached
+    :param args:     arguments of the callback
+    """
+
+    def __init__(self, callback, args=()):
+        self.callback = callback
+        self.args = args
+        self.deadline = None
+        self.cancelled = False
+        # Deadline the timer is queued with in the heap, None if it is not queued
+        self.queued = None
+        # Callback handle on the event loop, only used by AsyncTimers
+        self.handle = None
+
+
+class Timers:
+
+    def __init__(self):
+        self.__cond = threading.Condition()
+        self.__heap = []
+        self.__counter = itertools.count()
+        self.fired = 0
+        self.failed = 0
+
+        self.__thread = threading.Thread(target=self.__run, name='timers')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    """
+    Call a function once after a delay.
+
+    :param delay:    delay in seconds
+    :param callback: function to be called in the timer thread, has to return quickly
+    :param args:     arguments of the callback
+    :returns:        Timer that can be cancelled or re-armed
+    """
+
+    def schedule(self, delay, callback, args=()):
+        timer = Timer(callback, args)
+        self.rearm(timer, delay)
+        return timer
+
+    """
+    Move the deadline of a timer to a delay from now. A timer that already fired
+    or was cancelled is scheduled again. Moving a deadline back does not touch
+    the heap, the timer is requeued when its old deadline is reached.
+
+    :param timer: Timer to be re-armed
+    :param delay: delay in seconds
+    """
+
+    def rearm(self, timer, delay):
+        with self.__cond:
+            timer.deadline = time.monotonic() + delay
+            timer.cancelled = False
+            if timer.queued is None or timer.deadline < timer.queued:
+                self.__push(timer)
+                self.__cond.notify()
+
+    """
+    Cancel a timer, its callback is not called.
+
+    :param timer: Timer to be cancelled, None is ignored
+    """
+
+    def cancel(self, timer):
+        if timer is None:
+            return
+        with self.__cond:
+            timer.cancelled = True
+
+    """
+    Get the counters of the timer service.
+
+    :returns: queued, fired and failed timers
+    """
+
+    def stats(self):
+        with self.__cond:
+            return {
+                'queued': len(self.__heap),
+                'fired': self.fired,
+                'failed': self.failed
+            }
+
+    def __push(self, timer):
+        timer.queued = timer.deadline
+        heapq.heappush(self.__heap, (timer.deadline, next(self.__counter), timer))
+
+    def __next(self):
+        with self.__cond:
+            while True:
+                if len(self.__heap) == 0:
+                    self.__cond.wait()
+                    continue
+
+                deadline, _, timer = self.__heap[0]
+                # Entry was replaced by an earlier deadline of the same timer
+                if timer.queued != deadline:
+                    heapq.heappop(self.__heap)
+                    continue
+
+                now = time.monotonic()
+                if deadline > now:
+                    self.__cond.wait(deadline - now)
+                    continue
+
+                heapq.heappop(self.__heap)
+                timer.queued = None
+                if timer.cancelled:
+                    continue
+                # Deadline was moved back since the timer was queued
+                if timer.deadline > now:
+                    self.__push(timer)
+                    continue
+
+                self.fired += 1
+                return timer
+
+    def __run(self):
+        while True:
+            timer = self.__next()
+            try:
+                timer.callback(*timer.args)
+            except Exception as ex:
+                self.failed += 1
+                log.error(f"Timer callback {timer.callback.__name__} failed, Stacktrace {ex}")
+
+
+class AsyncTimers:
+
+    """
+    Timer service on an asyncio event loop with the same interface as Timers.
+    Callbacks are called in the event loop and have to return quickly. Timers
+    can be scheduled, re-armed and cancelled from other threads as well.
+
+    :param loop: event loop the callbacks are called in
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queued = 0
+        self.fired = 0
+        self.failed = 0
+
+    """
+    Call a function once after a delay.
+
+    :param delay:    delay in seconds
+    :param callback: function to be called in the event loop, has to return quickly
+    :param args:     arguments of the callback
+    :returns:        Timer that can be cancelled or re-armed
+    """
+
+    def schedule(self, delay, callback, args=()):
+        timer = Timer(callback, args)
+        self.rearm(timer, delay)
+        return timer
+
+    """
+    Move the deadline of a timer to a delay from now. Moving a deadline back
+    does not touch the event loop, the timer is requeued when its old deadline is reached.
+
+    :param timer: Timer to be re-armed
+    :param delay: delay in seconds
+    """
+
+    def rearm(self, timer, delay):
+        deadline = self.loop.time() + delay
+        call_in_loop(self.loop, self.__rearm, timer, deadline)
+
+    """
+    Cancel a timer, its callback is not called.
+
+    :param timer: Timer to be cancelled, None is ignored
+    """
+
+    def cancel(self, timer):
+        if timer is None:
+            return
+        timer.cancelled = True
+
+    """
+    Get the counters of the timer service.
+
+    :returns: queued, fired and failed timers
+    """
+
+    def stats(self):
+        return {
+            'queued': self.queued,
+            'fired': self.fired,
+            'failed': self.failed
+        }
+
+    def __rearm(self, timer, deadline):
+        timer.deadline = deadline
+        timer.cancelled = False
+        if timer.queued is None or deadline < timer.queued:
+            if timer.handle is not None:
+                timer.handle.cancel()
+                self.queued -= 1
+            self.__push(timer)
+
+    def __push(self, timer):
+        timer.queued = timer.deadline
+        timer.handle = self.loop.call_at(timer.deadline, self.__fire, timer)
+        self.queued += 1
+
+    def __fire(self, timer):
+        self.queued -= 1
+        timer.queued = None
+        timer.handle = None
+        if timer.cancelled:
+            return
+        # Deadline was moved back since the timer was queued
+        if timer.deadline > self.loop.time():
+            self.__push(timer)
+            return
+
+        self.fired += 1
+        try:
+            timer.callback(*timer.args)
+        except Exception as ex:
+            self.failed += 1
+            log.error(f"Timer callback {timer.callback.__name__} failed, Stacktrace {ex}")
@@ -8,6 +8,7 @@ Last Modified: 02.06.2021
 class Topics:
     ITEM_ROUTE_ID = 'augis/item/route'
     ITEM_CURRENT_ROUTE = 'augis/item/current-route'
+    ITEM_CURRENT_ROUTE_DELTA = 'augis/item/current-route/delta'
     RTK_ROVER_ONLINE = 'Rover/9C8BE24C22/online'
     RTK_ROVER_EVENT = 'Rover/9C8BE24C22/event'
     RTK_ROVER_INTENT = 'Rover/9C8BE24C22/intent'
@@ -22,6 +23,10 @@ class Topics:
     INFO_MODE = 'augis/info/mode'
     INFO_SPEED = 'augis/info/speed'
     INFO_CONN = 'augis/info/conn'
+    INFO_TIMING = 'augis/info/timing'
+    INFO_TELEMETRY = 'augis/info/telemetry'
+    # Frames of the sensor process, its sequence numbers are counted separately
+    INFO_TELEMETRY_SENSORS = 'augis/info/telemetry/sensors'
     ERROR_CONN = 'augis/error/conn'
     ERROR_DRIVE = 'augis/error/drive'
     ERROR_SENSOR = 'augis/error/sensor'
@@ -37,3 +42,54 @@ class Topics:
     MOCK_DS = 'augis/mock/ds'
     MOCK_STOP = 'augis/mock/stop'
     MOCK_DONE = 'augis/mock/done'
+
+    # Quality of service of published messages. High rate telemetry is sent
+    # with QoS 0, a lost value is replaced by the next one. Commands, errors
+    # and everything not listed are sent with QoS 1.
+    DEFAULT_QOS = 1
+    QOS = {
+        INFO_SPEED: 0,
+        INFO_TIMING: 0,
+        INFO_TELEMETRY: 0,
+        INFO_TELEMETRY_SENSORS: 0,
+        ITEM_CURRENT_ROUTE_DELTA: 0,
+        SENSOR_GPS_PHONE: 0,
+        SENSOR_GPS_DRG: 0,
+        SENSOR_HEADING: 0
+    }
+
+    # Priority of messages queued while the broker is not reachable, lower values are
+    # sent first after the reconnect. Topics not listed are queued with DEFAULT_PRIORITY
+    # if they are published with QoS > 0, otherwise they are dropped.
+    DEFAULT_PRIORITY = 2
+    PRIORITY = {
+        ERROR_CONN: 0,
+        ERROR_DRIVE: 0,
+        ERROR_SENSOR: 0,
+        ITEM_CURRENT_ROUTE_DELTA: 1,
+        INFO_STATUS: 1
+    }
+
+    """
+    Get the priority of a topic for the offline queue.
+
+    :param topic: topic of the message
+    :returns:     priority or None if messages of the topic are not queued
+    """
+
+    @staticmethod
+    def priority(topic):
+        if topic in Topics.PRIORITY:
+            return Topics.PRIORITY[topic]
+        return Topics.DEFAULT_PRIORITY if Topics.qos(topic) > 0 else None
+
+    """
+    Get the quality of service a topic is published with.
+
+    :param topic: topic of the message
+    :returns:     QoS level 0, 1 or 2
+    """
+
+    @staticmethod
+    def qos(topic):
+        return Topics.QOS.get(topic, Topics.DEFAULT_QOS)
@@ -0,0 +1,178 @@
+"""
+Authors: Manuel Gasser, Julian Haldimann
+Created: 18.10.2026
+Last Modified: 18.10.2026
+"""
+
+import threading
+import time
+from array import array
+
+import numpy as np
+
+from gps import Gps, LocalFrame
+
+
+class TrackStore:
+    # Maximum number of points kept, the oldest points are dropped
+    CAPACITY = 50000
+    # Minimum distance between two stored points in meters
+    MIN_DISTANCE = .5
+
+    """
+    Driven track stored in fixed size ring buffers of timestamps and coordinates.
+    Every point gets a sequence number, which keeps counting when old points are dropped.
+
+    :param capacity:     maximum number of points kept
+    :param min_distance: points closer than this to the last point are not stored
+    """
+
+    def __init__(self, capacity=CAPACITY, min_distance=MIN_DISTANCE):
+        self.capacity = capacity
+        self.min_distance = min_distance
+        self.__lock = threading.Lock()
+        self.__time = array('d', bytes(8 * capacity))
+        self.__lat = array('d', bytes(8 * capacity))
+        self.__lng = array('d', bytes(8 * capacity))
+        self.__count = 0
+        # Sequence number of the next point
+        self.seq = 0
+        self.skipped = 0
+
+    def __len__(self):
+        return self.__count
+
+    """
+    Add a point to the track if it is far enough from the last point.
+
+    :param pos: position (lat, lng)
+    :param t:   monotonic time of the position, now if None
+    :returns:   true if the point was stored
+    """
+
+    def append(self, pos, t=None):
+        if pos is None:
+            return False
+        t = time.monotonic() if t is None else t
+
+        with self.__lock:
+            if self.__count > 0:
+                i = (self.seq - 1) % self.capacity
+                if Gps.get_distance((self.__lat[i], self.__lng[i]), pos) < self.min_distance:
+                    self.skipped += 1
+                    return False
+
+            i = self.seq % self.capacity
+            self.__time[i] = t
+            self.__lat[i] = pos[Gps.LAT]
+            self.__lng[i] = pos[Gps.LNG]
+            self.seq += 1
+            self.__count = min(self.__count + 1, self.capacity)
+            return True
+
+    """
+    Remove all points, the sequence numbers keep counting.
+    """
+
+    def clear(self):
+        with self.__lock:
+            self.__count = 0
+
+    """
+    Get the stored points in order.
+
+    :param since: only return points with a sequence number of at least this, None for all
+    :returns:     N×3 array of time, lat and lng and the sequence number of the first row
+    """
+
+    def array(self, since=None):
+        with self.__lock:
+            first = self.seq - self.__count
+            start = first if since is None else min(max(since, first), self.seq)
+            n = self.seq - start
+            rows = np.empty((n, 3))
+            for col, buf in enumerate((self.__time, self.__lat, self.__lng)):
+                data = np.frombuffer(buf, dtype=float)
+                i = start % self.capacity
+                head = min(n, self.capacity - i)
+                rows[:head, col] = data[i:i + head]
+                rows[head:, col] = data[:n - head]
+            return rows, start
+
+    """
+    Get the stored points as list of positions.
+
+    :param since: only return points with a sequence number of at least this, None for all
+    :returns:     list of points (lat, lng), sequence number of the first point and the one after the last point
+    """
+
+    def points(self, since=None):
+        rows, start = self.array(since)
+        return rows[:, 1:].tolist(), start, start + len(rows)
+
+    """
+    Get a simplified view of the track with the Douglas-Peucker algorithm.
+
+    :param tolerance: maximum distance of a dropped point to the simplified track in meters
+    :returns:         list of points (lat, lng) and the sequence number after the last point
+    """
+
+    def simplified(self, tolerance):
+        rows, start = self.array()
+        seq = start + len(rows)
+        if len(rows) < 3 or tolerance <= 0:
+            return rows[:, 1:].tolist(), seq
+
+        # Distances are calculated in a local frame at the first point
+        frame = LocalFrame(rows[0, 1:])
+        xy = np.column_stack(((rows[:, 2] - frame.origin[Gps.LNG]) * frame.m_lng,
+                              (rows[:, 1] - frame.origin[Gps.LAT]) * frame.m_lat))
+        return rows[TrackStore.douglas_peucker(xy, tolerance), 1:].tolist(), seq
+
+    """
+    Simplify a polyline with the Douglas-Peucker algorithm.
+
+    :param xy:        N×2 array of points in meters
+    :param tolerance: maximum distance of a dropped point to the simplified line
+    :returns:         boolean mask of the kept points
+    """
+
+    @staticmethod
+    def douglas_peucker(xy, tolerance):
+        keep = np.zeros(len(xy), dtype=bool)
+        keep[0] = keep[-1] = True
+        stack = [(0, len(xy) - 1)]
+
+        while len(stack) > 0:
+            a, b = stack.pop()
+            if b - a < 2:
+                continue
+            d = xy[b] - xy[a]
+            rel = xy[a + 1:b] - xy[a]
+            length = np.hypot(d[0], d[1])
+            if length > 0:
+                dist = np.abs(d[0] * rel[:, 1] - d[1] * rel[:, 0]) / length
+            else:
+                dist = np.hypot(rel[:, 0], rel[:, 1])
+            i = int(np.argmax(dist))
+            if dist[i] > tolerance:
+                i += a + 1
+                keep[i] = True
+                stack.append((a, i))
+                stack.append((i, b))
+
+        return keep
+
+    """
+    Get the counters of the track.
+
+    :returns: stored points, next sequence number and skipped points
+    """
+
+    def stats(self):
+        with self.__lock:
+            return {
+                'points': self.__count,
+                'seq': self.seq,
+                'skipped': self.skipped
+            }
@@ -8,6 +8,7 @@
 const Topics = {
     ITEM_ROUTE_ID: 'augis/item/route',
     ITEM_CURRENT_ROUTE: 'augis/item/current-route',
+    ITEM_CURRENT_ROUTE_DELTA: 'augis/item/current-route/delta',
     SENSOR_GPS: 'augis/sensor/gps/phone',
     SENSOR_GPS_RTK: 'Rover/9C8BE24C22/event',
     SENSOR_HEADING: 'augis/sensor/heading',
@@ -17,6 +18,7 @@ const Topics = {
     INFO_STATUS: 'augis/info/status',
     INFO_MODE: 'augis/info/mode',
     INFO_SPEED: 'augis/info/speed',
+    INFO_TELEMETRY: 'augis/info/telemetry',
     INFO_CONN: 'augis/info/conn',
     ERROR_CONN: 'augis/error/conn',
     LWT: 'augis/lwt',
@@ -25,9 +27,22 @@ const Topics = {
     RECORD: 'augis/record'
 };
 
+// First byte of binary sensor payloads, never valid in UTF-8
+const SensorTags = {
+    POSITION: 0xC1,
+    HEADING: 0xC0
+};
+
 // Variables for map
 let map;
 let routePointsAUGIS = [];
+// Sequence number of the next point of the driven route
+let routeSeq;
+// Missing points of the driven route were requested, deltas after the gap are dropped until they arrive
+let routeDeltaRequested = false;
+let routeDeltaRequestTime;
+// Time to wait for the missing points before the whole route is requested in milliseconds
+const ROUTE_RESYNC_TIMEOUT = 5000;
 let routeJson;
 let routeCreated;
 let startPos;
@@ -240,9 +255,11 @@ function onConnect() {
     client.subscribe(Topics.INFO_MODE, options);
     client.subscribe(Topics.INFO_STATUS, options);
     client.subscribe(Topics.INFO_SPEED, options);
+    client.subscribe(Topics.INFO_TELEMETRY);
     client.subscribe(Topics.INFO_CONN, options);
     client.subscribe(Topics.ERROR_CONN, options);
     client.subscribe(Topics.ITEM_CURRENT_ROUTE, options);
+    client.subscribe(Topics.ITEM_CURRENT_ROUTE_DELTA, options);
     client.subscribe(Topics.LWT, options);
     client.subscribe(Topics.HELLO_REQ, options)
     client.subscribe(Topics.HELLO_RESP, options);
@@ -261,6 +278,30 @@ function onConnectionLost(responseObject) {
     }
 }
 
+/**
+ * Read the payload of a message as text. Binary sensor payloads are decoded
+ * to the text format of the sensor topics.
+ *
+ * @param msg message from mqtt
+ * @returns payload as text, empty if a binary payload is malformed
+ */
+function readPayload(msg) {
+    const bytes = msg.payloadBytes;
+    if (bytes.length === 0 || (bytes[0] !== SensorTags.POSITION && bytes[0] !== SensorTags.HEADING)) {
+        return msg.payloadString;
+    }
+
+    // Little-endian latitude and longitude as double or heading as float after the tag
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    if (bytes[0] === SensorTags.POSITION && bytes.length === 17) {
+        return `${view.getFloat64(1, true)},${view.getFloat64(9, true)}`;
+    }
+    if (bytes[0] === SensorTags.HEADING && bytes.length === 5) {
+        return `${view.getFloat32(1, true)}`;
+    }
+    return '';
+}
+
 /**
  * Callback function when message from subscribed topic is received.
  *
@@ -268,12 +309,45 @@ function onConnectionLost(responseObject) {
  */
 function onMessageArrived(msg) {
     let topic = msg.destinationName;
-    let payload = msg.payloadString;
+    let payload = readPayload(msg);
 
     switch (topic) {
         case Topics.ITEM_CURRENT_ROUTE:
-            if (payload.toLowerCase() !== 'none' && payload.toLowerCase() !== 'get') {
-                routePointsAUGIS = parseGeoJSON(JSON.parse(payload));
+            if (payload.startsWith('{')) {
+                const gj = JSON.parse(payload);
+                routePointsAUGIS = parseGeoJSON(gj.features.map(f => f.coordinates));
+                routeSeq = gj.seq;
+                routeDeltaRequested = false;
+                updateLine();
+
+                let rideSave = document.querySelector('.save-ride');
+                rideSave.disabled = false;
+            }
+            break;
+        case Topics.ITEM_CURRENT_ROUTE_DELTA:
+            const delta = JSON.parse(payload);
+            if (routeSeq === undefined) {
+                routeSeq = delta.from;
+            }
+            if (delta.from > routeSeq) {
+                if (!routeDeltaRequested) {
+                    // Points are missing, ask for all points since the last received one
+                    routeDeltaRequested = true;
+                    routeDeltaRequestTime = Date.now();
+                    sendMessage(Topics.ITEM_CURRENT_ROUTE, `since ${routeSeq}`);
+                } else if (Date.now() - routeDeltaRequestTime > ROUTE_RESYNC_TIMEOUT) {
+                    // The missing points are no longer stored on the AUGIS, get the whole route again
+                    routeDeltaRequestTime = Date.now();
+                    sendMessage(Topics.ITEM_CURRENT_ROUTE, 'get');
+                }
+                // Deltas after the gap are dropped, the answer contains their points as well
+                break;
+            }
+            routeDeltaRequested = false;
+            if (delta.to > routeSeq) {
+                // Skip points that were already received
+                routePointsAUGIS.push(...delta.points.slice(Math.max(0, routeSeq - delta.from)));
+                routeSeq = delta.to;
                 updateLine();
 
                 let rideSave = document.querySelector('.save-ride');
@@ -290,12 +364,7 @@ function onMessageArrived(msg) {
                 startPos = addMarker([lat_rtk, lng_rtk], 'AUGIS Start Position');
             }
             currentPos = addMarker([lat_rtk, lng_rtk], 'Current Position AUGIS');
-            routePointsAUGIS.push([lat_rtk, lng_rtk]);
-            if (routePointsAUGIS.length === 1) {
-                let rideSave = document.querySelector('.save-ride');
-                rideSave.disabled = false;
-            }
-            updateLine();
+            // The driven route is updated with the deltas of the current route
             updateValue('gps', `${lat_rtk}, ${lng_rtk}`);
             break;
         case Topics.SENSOR_GPS:
@@ -344,6 +413,12 @@ function onMessageArrived(msg) {
         case Topics.INFO_SPEED:
             updateValue('speed', payload);
             break;
+        case Topics.INFO_TELEMETRY:
+            const frame = JSON.parse(payload);
+            if (frame.speed !== undefined) {
+                updateValue('speed', frame.speed);
+            }
+            break;
         case Topics.INFO_CONN:
             if (payload === 'rasp-ard') {
                 updateValue('rasp-ard-conn', 'Raspberry Pi connected to Arduino');